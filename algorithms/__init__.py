@@ -1 +1,7 @@
-from .search import DFS, BFS, Uniform, Greedy, AStar, IDS
+from .search import DFS, BFS, LevelBFS, Uniform, Greedy, AStar, WAStar, Focal, AnytimeAStar, IDS, IDAStar, \
+    BiUniform, BiAStar, CH, NearestGoal, KNearestGoals, search_by_coordinates
+from .levels import hop_distances
+from .batch import batch_search, distance_matrix
+from .parallel import parallel_search, threaded_search
+from .memo import QueryCache
+from .incremental import DStarLite
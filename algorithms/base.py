@@ -1,55 +1,188 @@
-from utils import Graph, Result, Container
+import heapq
+import math
+from collections import defaultdict
 
+import numpy as np
 
-def General_Graph_Search(graph: Graph, frontiers: Container) -> Result:
+from utils import Graph, Problem, Result, Container, SearchStats
+
+
+def trace_path(parents, node):
+    """
+    rebuild the path from the start to the node by following the parent pointers
+
+    :param parents: a dict that maps every visited node to its predecessor(None for the start)
+    """
+    path = []
+    while node is not None:
+        path.append(node)
+        node = parents[node]
+    path.reverse()
+    return path
+
+
+def General_Graph_Search(graph: Graph, problem: Problem, frontiers: Container, stats: SearchStats = None,
+                         vectorised=False) -> Result:
     """
     General graph search algorithm that can be transformed to [DFS, BFS, Uniform, AStar, Greedy]
     by utilizing the polymorphism of the Container object
 
-    :param graph: A Graph object to collect all information about the search problem
+    :param graph: A Graph object to collect all information about the map
+
+    :param problem: A Problem object of the start, the end and the heuristic function
 
-    :param frontiers: A Container object to store the tuples: (path, cost, heuristic_value),
+    :param frontiers: A Container object to store the tuples: (node, cost, heuristic_value, parent),
                     container should implement: append, pop and __len__
 
+    :param stats: A SearchStats object to collect the counters of the search into,
+                The search runs on the instrumented proxies only if it is given
+
+    :param vectorised: If True, expand every node with vectorised_expansion_search
+
     :return: If solution exists,return a Result object that stores the
             final path, cost, memory used and time cost of the problem,
-            otherwise return an empty Result object(except time consumption)
+            otherwise return an empty Result object(except time consumption and settled nodes)
     """
+    if stats is not None:
+        res = General_Graph_Search(*stats.instrument(graph, problem, frontiers))
+        # every pop that was neither settled nor the goal was a stale entry
+        stats.finish(settled=res.settled_nodes + (res.path is not None))
+        res.stats = stats
+        return res
+    if vectorised and graph.dense:
+        return vectorised_expansion_search(graph, problem, frontiers)
 
-    start = graph.get_initial_state()
-    frontiers.append(([start], 0, graph.heuristic(start)))
-    visited = set()  # stores the nodes that have been popped from the frontiers
+    start = problem.start
+    heuristic = problem.heuristic
+    if graph.dense:
+        # the visited nodes are stamped in the scratch workspace of the thread,
+        # mapped to their predecessors that paths are rebuilt from
+        workspace = graph.workspace()
+        stamps, parents, generation = workspace.stamps, workspace.parents, workspace.begin()
+    else:  # node ids that can not index the workspace
+        stamps, parents, generation = defaultdict(int), dict(), 1
+    frontiers.append((start, 0, heuristic(start), None))
+    settled = 0  # number of the nodes that have been popped from the frontiers(visited nodes)
     expanded = 1  # max number of nodes between frontiers and visited
 
     while frontiers:
-        path, cost, _ = frontiers.pop()
-        cur_node = path[-1]
+        cur_node, cost, _, parent = frontiers.pop()
 
-        if graph.is_goal(cur_node):
-            return Result(path=path, cost=cost, expanded_nodes=expanded)
+        if problem.is_goal(cur_node):
+            path = [*trace_path(parents, parent), cur_node]
+            return Result(path=path, cost=cost, expanded_nodes=expanded, settled_nodes=settled)
 
-        if cur_node in visited:
+        if stamps[cur_node] == generation:
             continue
-        visited.add(cur_node)
+        # the predecessor is only recorded when the node is popped,
+        # so the path follows the entry that the container chose(FIFO, LIFO or the best one)
+        stamps[cur_node] = generation
+        parents[cur_node] = parent
+        settled += 1
 
-        successors = graph.successors(cur_node)
-        for next_node in successors:
-            if next_node in visited:
+        successors = graph.weighted_successors(cur_node)  # edge lengths are precomputed by the graph
+        for next_node, distance in successors:
+            if stamps[next_node] == generation:
                 continue
 
-            new_cost = cost + graph.distance(cur_node, next_node)
-            new_path = [*path, next_node]  # copy the path and append the next_node into new_path
-            new_h_val = graph.heuristic(next_node)
+            new_cost = cost + distance
+            new_h_val = heuristic(next_node)
 
-            frontiers.append((new_path, new_cost, new_h_val))
-            expanded = max(expanded, len(frontiers), len(visited))
+            frontiers.append((next_node, new_cost, new_h_val, cur_node))
+            expanded = max(expanded, len(frontiers), settled)
+
+    return Result(settled_nodes=settled)
 
-    return Result()
 
+def vectorised_expansion_search(graph: Graph, problem: Problem, frontiers: Container) -> Result:
+    """
+    General_Graph_Search that expands the whole successor block of a node at once:
+    the successor ids and edge lengths are array views of the adjacency, the visited successors are
+    masked out with the stamps array of the workspace, and the costs and heuristic values
+    of the rest are computed in one vectorised operation before they are pushed
+
+    Only for graphs with dense node ids, the paths and costs are the same as General_Graph_Search,
+    numpy has a fixed cost per call, so it only pays off for nodes of high degree
+    """
+    start = problem.start
+    heuristic = problem.heuristic
+    heuristics = problem.heuristics
+    if heuristics is None:  # a provider without a vectorised heuristic
+        def heuristics(indices):
+            return np.fromiter(map(heuristic, indices.tolist()), dtype=np.float64, count=len(indices))
+
+    workspace = graph.workspace()
+    stamps, parents, generation = workspace.stamp_array, workspace.parents, workspace.begin()
+    frontiers.append((start, 0, heuristic(start), None))
+    settled = 0
+    expanded = 1
+
+    while frontiers:
+        cur_node, cost, _, parent = frontiers.pop()
+
+        if problem.is_goal(cur_node):
+            path = [*trace_path(parents, parent), cur_node]
+            return Result(path=path, cost=cost, expanded_nodes=expanded, settled_nodes=settled)
+
+        if stamps[cur_node] == generation:
+            continue
+        stamps[cur_node] = generation
+        parents[cur_node] = parent
+        settled += 1
+
+        successors, distances = graph.successor_arrays(cur_node)
+        fresh = stamps[successors] != generation
+        successors = successors[fresh]
+        costs = (cost + distances[fresh]).tolist()
+        h_vals = heuristics(successors).tolist()
+        for next_node, new_cost, new_h_val in zip(successors.tolist(), costs, h_vals):
+            frontiers.append((next_node, new_cost, new_h_val, cur_node))
+        expanded = max(expanded, len(frontiers), settled)
+
+    return Result(settled_nodes=settled)
+
+
+def shortest_path_tree(graph: Graph, source, targets=None):
+    """
+    Dijkstra from the source to every reachable node,
+    or until all of the targets are settled
 
-def tree_like_search(graph: Graph, frontiers):
-    start = graph.get_initial_state()
-    if graph.is_goal(start):
+    :return: (distances, parents), dicts that map every reached node to its cost from the source
+            and to its predecessor on the shortest path(None for the source),
+            the costs and predecessors of the targets and every node closer than them are final
+    """
+    distances = {source: 0}
+    parents = {source: None}
+    settled = set()
+    remaining = None if targets is None else set(targets)
+    frontiers = [(0, source)]
+    while frontiers:
+        cost, cur_node = heapq.heappop(frontiers)
+        if cur_node in settled:  # a stale entry of a decreased node
+            continue
+        settled.add(cur_node)
+        if remaining is not None:
+            remaining.discard(cur_node)
+            if not remaining:
+                break
+        for next_node, distance in graph.weighted_successors(cur_node):
+            new_cost = cost + distance
+            if new_cost < distances.get(next_node, math.inf):
+                distances[next_node] = new_cost
+                parents[next_node] = cur_node
+                heapq.heappush(frontiers, (new_cost, next_node))
+    return distances, parents
+
+
+def tree_like_search(graph: Graph, problem: Problem, frontiers, stats: SearchStats = None):
+    if stats is not None:
+        res = tree_like_search(*stats.instrument(graph, problem, frontiers))
+        stats.finish()
+        res.stats = stats
+        return res
+
+    start = problem.start
+    if problem.is_goal(start):
         return Result(path=[start], cost=0, expanded_nodes=0)
     frontiers.append([start, ])
     expanded = 1  # number of the expanded nodes
@@ -61,8 +194,8 @@ def tree_like_search(graph: Graph, frontiers):
         for next_node in successors:
             new_path = [*path, next_node]
 
-            if graph.is_goal(next_node):
-                cost = graph.distance(new_path)
+            if problem.is_goal(next_node):
+                cost = sum(map(graph.edge_cost, new_path[:-1], new_path[1:]))
                 return Result(path=new_path, cost=cost, expanded_nodes=expanded)
 
             if graph.has_circle(new_path):
@@ -74,34 +207,69 @@ def tree_like_search(graph: Graph, frontiers):
     return Result()
 
 
-def depth_limited_search(graph: Graph, frontiers, max_iter) -> Result:
-    start = graph.get_initial_state()
-    if graph.is_goal(start):
-        return Result(path=[start], cost=0, expanded_nodes=0)
-    frontiers.append([start, ])
-    expanded = 1  # number of the expanded nodes
-    res = Result()
-    while frontiers:
-        path = frontiers.pop()
-        cur_node = path[-1]
+def bounded_depth_first_search(graph: Graph, problem: Problem, bound, informed=False, stats: SearchStats = None):
+    """
+    One pass of a depth-first tree search that keeps a single path stack,
+    instead of a frontier of path copies, the nodes of the path are also kept in a set,
+    so the circle check of a successor takes constant time
 
-        if len(path) > max_iter:
-            res.prune = True
-            continue
+    A successor is cut off if its value exceeds the bound, the value is the depth(number of edges)
+    of the successor, or f = cost + heuristic_value if informed(IDA*)
 
-        successors = graph.successors(cur_node)
-        for next_node in successors:
-            new_path = [*path, next_node]
+    :return: (Result, next_bound), next_bound is the smallest value that exceeded the bound,
+            the next pass of iterative deepening should use it, and it is inf if nothing was cut off,
+            Result.prune is True if something was cut off,
+            Result.expanded_nodes is the max length of the path stack,
+            the path stack is not a Container, so stats only counts the successor reads and the heuristic
+    """
+    if stats is not None:
+        graph, problem, _ = stats.instrument(graph, problem)
+        res, next_bound = bounded_depth_first_search(graph, problem, bound, informed)
+        stats.finish()
+        res.stats = stats
+        return res, next_bound
 
-            if graph.is_goal(next_node):
-                cost = graph.distance(new_path)
-                res = Result(path=new_path, cost=cost, expanded_nodes=expanded)
-                return res
+    start = problem.start
+    if problem.is_goal(start):
+        return Result(path=[start], cost=0, expanded_nodes=1), math.inf
 
-            if graph.has_circle(new_path):
+    heuristic = problem.heuristic
+    path, costs, on_path = [start], [0], {start}
+    stack = [graph.weighted_successors(start)]  # the successors left to visit of every node in the path
+    next_bound = math.inf
+    expanded = 1  # max number of nodes in the path
+
+    while stack:
+        for next_node, distance in stack[-1]:
+            if next_node in on_path:
                 continue
 
-            frontiers.append(new_path)
-            expanded = max(expanded, len(frontiers))
+            cost = costs[-1] + distance
+            value = cost + heuristic(next_node) if informed else len(path)
+            if value > bound:
+                next_bound = min(next_bound, value)
+                continue
+
+            path.append(next_node)
+            costs.append(cost)
+            if problem.is_goal(next_node):
+                return Result(path=path, cost=cost, expanded_nodes=max(expanded, len(path)),
+                              prune=next_bound < math.inf), next_bound
+            on_path.add(next_node)
+            stack.append(graph.weighted_successors(next_node))
+            expanded = max(expanded, len(path))
+            break
+        else:  # all successors of the last node are visited, backtrack
+            stack.pop()
+            on_path.discard(path.pop())
+            costs.pop()
+
+    return Result(expanded_nodes=expanded, prune=next_bound < math.inf), next_bound
 
+
+def depth_limited_search(graph: Graph, problem: Problem, max_iter, stats: SearchStats = None) -> Result:
+    """
+    depth-first tree search that only expands the paths of at most max_iter edges
+    """
+    res, _ = bounded_depth_first_search(graph, problem, max_iter, stats=stats)
     return res
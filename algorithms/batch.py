@@ -0,0 +1,73 @@
+import math
+import time
+
+import numpy as np
+
+from utils import Graph, Result
+from algorithms.base import shortest_path_tree, trace_path
+
+
+def group_by_source(pairs):
+    """
+    :return: {start: [indices of the pairs that start from it]}, in the order of first appearance
+    """
+    groups = dict()
+    for i, (start, _) in enumerate(pairs):
+        groups.setdefault(start, []).append(i)
+    return groups
+
+
+def batch_search(graph: Graph, pairs, paths=True):
+    """
+    answer a batch of (start, end) queries with one Dijkstra per distinct start,
+    that stops as soon as all the ends of that start are settled
+
+    :param pairs: list of (start, end)
+    :param paths: if False, the paths are not rebuilt and Result.path is None
+
+    :return: a list of Result objects in the order of the pairs,
+            the time of every Result is its share of the time of its Dijkstra
+    """
+    results = [None] * len(pairs)
+    for start, indices in group_by_source(pairs).items():
+        begin = time.perf_counter()
+        # the ends in another component are discarded with the component labels,
+        # so the Dijkstra stops at the last reachable end instead of exhausting the component
+        targets = {pairs[i][1] for i in indices if graph.connected(start, pairs[i][1])}
+        distances, parents = shortest_path_tree(graph, start, targets=targets) if targets else ({}, {})
+        for i in indices:
+            end = pairs[i][1]
+            if end in distances:
+                path = trace_path(parents, end) if paths else None
+                results[i] = Result(path=path, cost=distances[end], expanded_nodes=len(distances))
+            else:
+                results[i] = Result()
+
+        elapsed = (time.perf_counter() - begin) / len(indices)
+        for i in indices:
+            results[i].algorithms = 'batch_search'
+            results[i].start, results[i].end = pairs[i]
+            results[i].time = elapsed
+    return results
+
+
+def distance_matrix(graph: Graph, sources, targets, paths=False):
+    """
+    shortest distances from every source to every target, with one Dijkstra per source
+
+    :return: a float64 matrix of shape (len(sources), len(targets)), np.inf for unreachable pairs,
+            and if paths is True, also a nested list where paths[i][j] is the path from
+            sources[i] to targets[j](None for unreachable pairs)
+    """
+    matrix = np.full((len(sources), len(targets)), np.inf)
+    path_matrix = [[None] * len(targets) for _ in sources]
+    for i, source in enumerate(sources):
+        reachable = [target for target in targets if graph.connected(source, target)]
+        distances, parents = shortest_path_tree(graph, source, targets=reachable) if reachable else ({}, {})
+        for j, target in enumerate(targets):
+            cost = distances.get(target, math.inf)
+            matrix[i, j] = cost
+            if paths and cost < math.inf:
+                path_matrix[i][j] = trace_path(parents, target)
+
+    return (matrix, path_matrix) if paths else matrix
@@ -0,0 +1,96 @@
+import heapq
+import math
+
+from utils import Graph, Result, SearchStats
+from utils.graph import no_heuristic
+from algorithms.base import trace_path
+
+
+def bidirectional_search(graph: Graph, start, end, heuristic=False, stats: SearchStats = None) -> Result:
+    """
+    Bidirectional Dijkstra(or A*) that runs a forward search from the start and
+    a backward search from the end(edges are bi-directional, so both use the same successors),
+    always expanding the side with the smaller frontier
+
+    With heuristic, both sides are guided by the average potential
+    p(v) = (euclidean(v, end) - euclidean(v, start)) / 2,
+    the forward side is ordered by g + p(v) and the backward side by g - p(v),
+    both potentials are consistent, so the sides stay two Dijkstra searches on the reduced costs
+
+    Meet-in-the-middle stopping rule: let mu be the length of the best path found through
+    a node reached by both sides, the search stops once top(forward) + top(backward) >= mu,
+    since no path through the unsettled nodes can be shorter than mu
+
+    :param stats: the frontiers are plain heaps, not Containers, so stats only counts the successor reads
+                and the evaluations of the potential as the heuristic
+
+    :return: a Result object with the shortest path, or an empty Result object if end is unreachable
+    """
+    potential = average_potential(graph, start, end) if heuristic else no_heuristic
+    if stats is not None:
+        instrumented, _, _ = stats.instrument(graph)
+        res = _bidirectional_search(instrumented, start, end,
+                                    potential if potential is no_heuristic else stats.timed_heuristic(potential))
+        stats.finish()
+        res.stats = stats
+        return res
+    return _bidirectional_search(graph, start, end, potential)
+
+
+def average_potential(graph: Graph, start, end):
+    """
+    p(v) = (euclidean(v, end) - euclidean(v, start)) / 2, the potential of the forward side
+    """
+    (x_start, y_start), (x_end, y_end) = graph.position(start), graph.position(end)
+
+    def potential(node):
+        x, y = graph.position(node)
+        return (math.sqrt((x - x_end) ** 2 + (y - y_end) ** 2) -
+                math.sqrt((x - x_start) ** 2 + (y - y_start) ** 2)) / 2
+
+    return potential
+
+
+def _bidirectional_search(graph: Graph, start, end, potential) -> Result:
+    if start == end:
+        return Result(path=[start], cost=0, expanded_nodes=1, settled_nodes=1)
+
+    signs = (1, -1)  # forward and backward potentials
+    distances = ({start: 0}, {end: 0})  # best known cost from the start/to the end
+    parents = ({start: None}, {end: None})
+    settled = (set(), set())
+    frontiers = ([(potential(start), start)], [(-potential(end), end)])
+    best, meet = math.inf, None
+
+    while frontiers[0] and frontiers[1]:
+        if frontiers[0][0][0] + frontiers[1][0][0] >= best:
+            break
+
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        frontier, distance, parent = frontiers[side], distances[side], parents[side]
+        _, cur_node = heapq.heappop(frontier)
+        if cur_node in settled[side]:  # a stale entry of a decreased node
+            continue
+        settled[side].add(cur_node)
+
+        cost = distance[cur_node]
+        other = distances[1 - side]
+        sign = signs[side]
+        for next_node, length in graph.weighted_successors(cur_node):
+            new_cost = cost + length
+            if new_cost < distance.get(next_node, math.inf):
+                distance[next_node] = new_cost
+                parent[next_node] = cur_node
+                heapq.heappush(frontier, (new_cost + sign * potential(next_node), next_node))
+
+                if next_node in other and new_cost + other[next_node] < best:
+                    best, meet = new_cost + other[next_node], next_node
+
+    if meet is None:
+        return Result()
+
+    # start -> meet from the forward parents, meet -> end from the backward parents
+    path = trace_path(parents[0], meet) + trace_path(parents[1], meet)[-2::-1]
+    return Result(path=path, cost=best,
+                  expanded_nodes=len(distances[0]) + len(distances[1]),
+                  settled_nodes=len(settled[0]) + len(settled[1]))
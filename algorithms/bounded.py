@@ -0,0 +1,164 @@
+import heapq
+import itertools
+import math
+import time
+
+from utils import Graph, Problem, Result, SearchStats
+from algorithms.base import trace_path
+
+
+def focal_search(graph: Graph, problem: Problem, epsilon, stats: SearchStats = None) -> Result:
+    """
+    Focal search(A*epsilon): OPEN is ordered by f = g + h, and FOCAL holds the open nodes with
+    f <= (1 + epsilon) * min f, the search always expands the node of FOCAL closest to the end(the smallest h),
+    so it dives to the end like greedySearch, as long as that stays within the bound
+
+    A node is reopened when a cheaper path to it is found, so with an admissible heuristic
+    the cost of the path is at most (1 + epsilon) times the optimal cost
+
+    :param stats: the heaps are plain lists, not Containers, so stats only counts the successor reads
+                and the heuristic
+
+    :return: a Result object with the path, and suboptimality = cost / min f at the end of the search,
+            min f is a lower bound of the optimal cost, so the bound is usually tighter than 1 + epsilon
+    """
+    if stats is not None:
+        graph, problem, _ = stats.instrument(graph, problem)
+        res = focal_search(graph, problem, epsilon)
+        stats.finish()
+        res.stats = stats
+        return res
+
+    start, heuristic = problem.start, problem.heuristic
+    weight = 1 + epsilon
+    counter = itertools.count()  # tie breaker, so the entries never compare the nodes
+    distances = {start: 0}
+    parents = {start: None}
+    closed = set()
+    h_start = heuristic(start)
+    # (f, node, g) of every open entry, for min f, stale when g is not distances[node] or the node is closed
+    opened = [(h_start, start, 0)]
+    # (f, tie, node, g, h) of the open entries that are not in FOCAL yet
+    pending = []
+    focal = [(h_start, next(counter), start, 0, h_start)]  # (h, tie, node, g, f)
+    expanded = 1
+
+    while opened:
+        # drop the stale entries of the smallest f
+        while opened and (opened[0][1] in closed or opened[0][2] != distances[opened[0][1]]):
+            heapq.heappop(opened)
+        if not opened:
+            break
+        bound = weight * opened[0][0]
+        while pending and pending[0][0] <= bound:
+            f, tie, node, g, h = heapq.heappop(pending)
+            heapq.heappush(focal, (h, tie, node, g, f))
+
+        h, _, cur_node, cost, f = heapq.heappop(focal)
+        if cur_node in closed or cost != distances[cur_node]:  # a stale entry
+            continue
+
+        if problem.is_goal(cur_node):
+            return Result(path=trace_path(parents, cur_node), cost=cost, expanded_nodes=expanded,
+                          settled_nodes=len(closed), suboptimality=cost / opened[0][0] if opened[0][0] else 1.0)
+        closed.add(cur_node)
+
+        for next_node, distance in graph.weighted_successors(cur_node):
+            new_cost = cost + distance
+            if new_cost < distances.get(next_node, math.inf):
+                distances[next_node] = new_cost
+                parents[next_node] = cur_node
+                closed.discard(next_node)  # reopen
+                new_h = heuristic(next_node)
+                new_f = new_cost + new_h
+                heapq.heappush(opened, (new_f, next_node, new_cost))
+                if new_f <= bound:
+                    heapq.heappush(focal, (new_h, next(counter), next_node, new_cost, new_f))
+                else:
+                    heapq.heappush(pending, (new_f, next(counter), next_node, new_cost, new_h))
+        expanded = max(expanded, len(opened))
+
+    return Result(settled_nodes=len(closed))
+
+
+def anytime_search(graph: Graph, problem: Problem, epsilon, deadline=None, max_expansions=None, decay=0.5,
+                   stats: SearchStats = None) -> Result:
+    """
+    Anytime weighted A*: a weighted A* ordered by g + (1 + epsilon) * h finds a first path quickly,
+    then the search goes on with the same frontier to improve it, epsilon is multiplied by decay
+    after every path found(down to 0, plain A*), the nodes whose admissible f = g + h
+    can not beat the best path are pruned, and a node is reopened when a cheaper path to it is found
+
+    The search stops when the frontier is exhausted(the best path is optimal),
+    or when a budget runs out, then the best path found so far is returned
+
+    :param deadline: time budget in seconds, None for no limit
+    :param max_expansions: budget of the expanded nodes, None for no limit
+    :param stats: like focal_search, stats only counts the successor reads and the heuristic
+
+    :return: a Result object with the best path, and suboptimality = cost / min f of the open nodes,
+            an upper bound of cost / optimal cost(1.0 if the search finished),
+            or an empty Result object if no path was found within the budget
+    """
+    if stats is not None:
+        graph, problem, _ = stats.instrument(graph, problem)
+        res = anytime_search(graph, problem, epsilon, deadline, max_expansions, decay)
+        stats.finish()
+        res.stats = stats
+        return res
+
+    stop = math.inf if deadline is None else time.perf_counter() + deadline
+    max_expansions = math.inf if max_expansions is None else max_expansions
+    start, heuristic = problem.start, problem.heuristic
+    weight = 1 + epsilon
+    distances = {start: 0}
+    parents = {start: None}
+    closed = set()
+    best_path, best_cost = None, math.inf
+    h_start = heuristic(start)
+    frontiers = [(weight * h_start, start, 0, h_start)]  # (g + weight * h, node, g, h)
+    # (f, node, g) of every open entry, for min f, stale when g is not distances[node] or the node is closed
+    opened = [(h_start, start, 0)]
+    expansions = 0
+
+    while frontiers and expansions < max_expansions:
+        if expansions & 255 == 0 and time.perf_counter() > stop:  # look at the clock every 256 expansions
+            break
+        _, cur_node, cost, h = heapq.heappop(frontiers)
+        if cost != distances[cur_node] or cost + h >= best_cost:  # a stale entry, or it can not improve
+            continue
+
+        if problem.is_goal(cur_node):
+            best_path, best_cost = trace_path(parents, cur_node), cost
+            # reorder the frontier with the smaller weight, and drop the entries that can not improve
+            epsilon = epsilon * decay if epsilon * decay > 1e-3 else 0
+            weight = 1 + epsilon
+            frontiers = [(g + weight * h, node, g, h) for _, node, g, h in frontiers
+                         if g == distances[node] and g + h < best_cost]
+            heapq.heapify(frontiers)
+            continue
+        closed.add(cur_node)
+        expansions += 1
+
+        for next_node, distance in graph.weighted_successors(cur_node):
+            new_cost = cost + distance
+            if new_cost < distances.get(next_node, math.inf):
+                new_h = heuristic(next_node)
+                if new_cost + new_h >= best_cost:
+                    continue
+                distances[next_node] = new_cost
+                parents[next_node] = cur_node
+                closed.discard(next_node)  # reopen
+                heapq.heappush(frontiers, (new_cost + weight * new_h, next_node, new_cost, new_h))
+                heapq.heappush(opened, (new_cost + new_h, next_node, new_cost))
+
+    if best_path is None:
+        return Result(settled_nodes=expansions)
+
+    # the open nodes that can still improve the path bound the optimal cost from below
+    while opened and (opened[0][1] in closed or opened[0][2] != distances[opened[0][1]]
+                      or opened[0][0] >= best_cost):
+        heapq.heappop(opened)
+    lower = opened[0][0] if opened and frontiers else best_cost
+    return Result(path=best_path, cost=best_cost, expanded_nodes=len(distances), settled_nodes=expansions,
+                  suboptimality=best_cost / lower if lower else 1.0)
@@ -0,0 +1,250 @@
+import heapq
+import math
+import time
+
+import numpy as np
+
+from utils import Graph, Result
+from utils.cache import IndexCache
+from algorithms.base import trace_path
+
+
+def witness_search(adjacency, source, excluded, targets, max_cost, settle_limit):
+    """
+    Dijkstra from source that never passes the excluded node,
+    it stops when all targets are settled, max_cost is exceeded, or settle_limit nodes are settled
+
+    :return: the distances from source to the reached nodes
+    """
+    distances = {source: 0}
+    frontier = [(0, source)]
+    remaining = set(targets)
+    settled = 0
+    while frontier and remaining and settled < settle_limit:
+        cost, cur_node = heapq.heappop(frontier)
+        if cost > distances[cur_node]:  # a stale entry of a decreased node
+            continue
+        if cost > max_cost:
+            break
+        remaining.discard(cur_node)
+        settled += 1
+        for next_node, length in adjacency[cur_node].items():
+            if next_node == excluded:
+                continue
+            new_cost = cost + length
+            if new_cost < distances.get(next_node, math.inf):
+                distances[next_node] = new_cost
+                heapq.heappush(frontier, (new_cost, next_node))
+    return distances
+
+
+def required_shortcuts(adjacency, node, settle_limit):
+    """
+    simulate the contraction of the node, a shortcut u-w is required for every pair of its neighbours
+    unless a witness path that avoids the node is not longer than u-node-w
+
+    :return: a list of (u, w, cost)
+    """
+    neighbours = list(adjacency[node].items())
+    shortcuts = []
+    for i, (u, u_cost) in enumerate(neighbours):
+        # edges are bi-directional, so every pair of neighbours is checked once
+        targets = [(w, u_cost + w_cost) for w, w_cost in neighbours[i + 1:]]
+        if not targets:
+            continue
+        max_cost = max(cost for _, cost in targets)
+        distances = witness_search(adjacency, u, node, [w for w, _ in targets], max_cost, settle_limit)
+        shortcuts.extend((u, w, cost) for w, cost in targets if distances.get(w, math.inf) > cost)
+    return shortcuts
+
+
+class ContractionHierarchy:
+    """
+    Contraction Hierarchy of a Graph,
+    nodes are contracted one by one in the order of their rank, and contracting a node adds
+    a shortcut between two of its neighbours when it lies on their only shortest path,
+    every edge is stored once in the upward adjacency of its lower ranked node,
+    together with the middle node it skips(-1 for an original edge) to unpack the paths
+
+    All arrays are indexed by the dense node ids of the graph
+    """
+    CACHE_NAME = 'ch'
+
+    __hierarchies = IndexCache(CACHE_NAME)
+
+    def __init__(self, graph: Graph, rank, indptr, indices, weights, middles):
+        self.nodes = graph.nodes
+        self.index = graph.indexer.__getitem__  # not graph.index, the cached hierarchy must not keep the graph alive
+        self.arrays = {'rank': rank, 'indptr': indptr, 'indices': indices,
+                       'weights': weights, 'middles': middles}
+
+        # plain python mirrors of the arrays for the queries
+        self.__rank = rank.tolist()
+        self.__indptr = indptr.tolist()
+        self.__indices = indices.tolist()
+        self.__weights = weights.tolist()
+        self.__middles = middles.tolist()
+
+    @property
+    def nbytes(self):
+        """
+        the size of the index in bytes
+        """
+        return sum(array.nbytes for array in self.arrays.values())
+
+    @classmethod
+    def of(cls, graph: Graph, cache=True):
+        """
+        the hierarchy of the graph, loaded from the cache next to the csv files,
+        or built(and cached) if the cache does not exist or is stale,
+        a modified graph is contracted again for every version, and it is never cached on disk
+        """
+        return cls.__hierarchies.get(graph, lambda: cls.build(graph), lambda arrays: cls(graph, **arrays),
+                                     cache=cache)
+
+    @classmethod
+    def build(cls, graph: Graph, settle_limit=50):
+        """
+        contract all nodes in the order of the edge difference
+        (number of shortcuts - number of edges) plus the number of contracted neighbours,
+        priorities are updated lazily: a popped node is re-pushed if its priority has grown
+
+        :param settle_limit: the max settled nodes of every witness search, a smaller limit makes
+                            the preprocessing faster, and adds some unnecessary shortcuts
+        """
+        indptr, indices, weights = (array.tolist() for array in graph.csr)
+        n = len(graph)
+        adjacency = [dict() for _ in range(n)]  # edges between the uncontracted nodes
+        for u in range(n):
+            for k in range(indptr[u], indptr[u + 1]):
+                w, length = indices[k], weights[k]
+                if w != u and length < adjacency[u].get(w, math.inf):
+                    adjacency[u][w] = length
+        middles = dict()  # (u, w): the node that the shortcut u-w skips
+        contracted_neighbours = [0] * n
+
+        def priority(node):
+            shortcuts = required_shortcuts(adjacency, node, settle_limit)
+            return len(shortcuts) - len(adjacency[node]) + contracted_neighbours[node]
+
+        queue = [(priority(node), node) for node in range(n)]
+        heapq.heapify(queue)
+
+        rank = np.zeros(n, dtype=np.int32)
+        upward = [None] * n
+        order = 0
+        while queue:
+            _, node = heapq.heappop(queue)
+            new_priority = priority(node)
+            if queue and new_priority > queue[0][0]:
+                heapq.heappush(queue, (new_priority, node))
+                continue
+
+            for u, w, cost in required_shortcuts(adjacency, node, settle_limit):
+                if cost < adjacency[u].get(w, math.inf):
+                    adjacency[u][w] = adjacency[w][u] = cost
+                    middles[u, w] = middles[w, u] = node
+
+            # all the remaining neighbours will be contracted later, so they are ranked higher
+            upward[node] = [(w, length, middles.get((node, w), -1)) for w, length in adjacency[node].items()]
+            for w in adjacency[node]:
+                del adjacency[w][node]
+                contracted_neighbours[w] += 1
+            adjacency[node] = dict()
+            rank[node] = order
+            order += 1
+
+        degrees = np.array([len(edges) for edges in upward], dtype=np.int64)
+        up_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(degrees, out=up_indptr[1:])
+        edges = [edge for edges in upward for edge in edges]
+        return cls(graph, rank,
+                   up_indptr,
+                   np.array([w for w, _, _ in edges], dtype=np.int32),
+                   np.array([length for _, length, _ in edges], dtype=np.float64),
+                   np.array([middle for _, _, middle in edges], dtype=np.int32))
+
+    def upward(self, node):
+        begin, end = self.__indptr[node], self.__indptr[node + 1]
+        return zip(self.__indices[begin:end], self.__weights[begin:end])
+
+    def __middle(self, u, w):
+        """
+        the node that the edge u-w skips, -1 for an original edge
+        """
+        if self.__rank[u] > self.__rank[w]:
+            u, w = w, u
+        for k in range(self.__indptr[u], self.__indptr[u + 1]):
+            if self.__indices[k] == w:
+                return self.__middles[k]
+        raise KeyError((u, w))
+
+    def unpack(self, path):
+        """
+        replace every shortcut in the path by the original edges it skips
+        """
+        unpacked = path[:1]
+        for u, w in zip(path[:-1], path[1:]):
+            stack = [(u, w)]
+            while stack:
+                u, w = stack.pop()
+                middle = self.__middle(u, w)
+                if middle < 0:
+                    unpacked.append(w)
+                else:
+                    stack.append((middle, w))
+                    stack.append((u, middle))
+        return unpacked
+
+    def query(self, start, end) -> Result:
+        """
+        bidirectional Dijkstra that only relaxes the upward edges on both sides,
+        every side stops once its smallest key is not less than the best meeting cost,
+        and the path through the meeting node is unpacked into original edges
+        """
+        source, target = self.index(start), self.index(end)
+        distances = ({source: 0}, {target: 0})
+        parents = ({source: None}, {target: None})
+        frontiers = ([(0, source)], [(0, target)])
+        best, meet = (0, source) if source == target else (math.inf, None)
+        settled = 0
+
+        while True:
+            # expand the side with the smaller key, ignoring the sides that can not improve the best
+            sides = [side for side in (0, 1) if frontiers[side] and frontiers[side][0][0] < best]
+            if not sides:
+                break
+            side = min(sides, key=lambda side: frontiers[side][0][0])
+            frontier, distance, parent = frontiers[side], distances[side], parents[side]
+            cost, cur_node = heapq.heappop(frontier)
+            if cost > distance[cur_node]:  # a stale entry of a decreased node
+                continue
+            settled += 1
+
+            other = distances[1 - side]
+            for next_node, length in self.upward(cur_node):
+                new_cost = cost + length
+                if new_cost < distance.get(next_node, math.inf):
+                    distance[next_node] = new_cost
+                    parent[next_node] = cur_node
+                    heapq.heappush(frontier, (new_cost, next_node))
+
+                    if next_node in other and new_cost + other[next_node] < best:
+                        best, meet = new_cost + other[next_node], next_node
+
+        if meet is None:
+            return Result()
+
+        path = trace_path(parents[0], meet) + trace_path(parents[1], meet)[-2::-1]
+        path = [self.nodes[node] for node in self.unpack(path)]
+        return Result(path=path, cost=best,
+                      expanded_nodes=len(distances[0]) + len(distances[1]),
+                      settled_nodes=settled)
+
+
+if __name__ == '__main__':
+    graph = Graph()
+    start = time.perf_counter()
+    hierarchy = ContractionHierarchy.build(graph)
+    print(f'preprocessing: {time.perf_counter() - start:.2f} s, index size: {hierarchy.nbytes / 1024:.1f} KiB')
+    print(hierarchy.query(0, 1894))
@@ -0,0 +1,152 @@
+import heapq
+import math
+import time
+
+from utils import Graph, Result
+
+
+class DStarLite:
+    """
+    D* Lite incremental planner between a start and an end of a graph that is modified over time
+
+    The search runs backward from the end, g(v) is the cost of v to the end found so far,
+    and rhs(v) = min(cost(v, u) + g(u)) over the successors u of v is its one-step lookahead,
+    a node is inconsistent when g(v) != rhs(v), and only inconsistent nodes are in the queue,
+    ordered by the key (min(g, rhs) + euclidean(start, v) + km, min(g, rhs))
+
+    After the graph is modified, only the ends of the modified edges get a new rhs,
+    and plan() repairs the costs of the nodes whose shortest path went through them,
+    the rest of the search is reused, so a small change near the route costs a small repair
+    instead of a new search, the start may also move(e.g. along the route) between the plans
+
+    The euclidean heuristic must stay consistent, so every edge cost must be
+    at least the straight-line length of its edge
+    """
+
+    def __init__(self, graph: Graph, start, end):
+        self.graph = graph
+        self.start, self.end = start, end
+        self.version = graph.version  # the modifications of the graph up to this version are applied
+        self.g = {}
+        self.rhs = {end: 0}
+        self.km = 0  # the sum of the heuristic distances the start moved, keeps the old keys lower bounds
+        self.heuristic = graph.goal(start)  # the euclidean distance to the start
+        self.queue = []  # heap of (key, node), with lazy deletion
+        self.keys = {}  # the current key of every node in the queue
+        self.__push(end)
+        self.expansions = 0  # expanded nodes of all the plans
+
+    def __key(self, node):
+        cost = min(self.g.get(node, math.inf), self.rhs.get(node, math.inf))
+        return cost + self.heuristic(node) + self.km, cost
+
+    def __push(self, node):
+        key = self.__key(node)
+        self.keys[node] = key
+        heapq.heappush(self.queue, (key, node))
+
+    def __top(self):
+        """
+        the (key, node) of the smallest current key, ((inf, inf), None) if the queue is empty
+        """
+        queue, keys = self.queue, self.keys
+        while queue and keys.get(queue[0][1]) != queue[0][0]:  # drop the stale entries
+            heapq.heappop(queue)
+        return queue[0] if queue else ((math.inf, math.inf), None)
+
+    def __update(self, node):
+        """
+        recompute rhs of the node from its successors, and queue it if it is inconsistent
+        """
+        g, rhs = self.g, self.rhs
+        if node != self.end:
+            rhs[node] = min((cost + g.get(successor, math.inf)
+                             for successor, cost in self.graph.weighted_successors(node)), default=math.inf)
+        self.__queue(node)
+
+    def __queue(self, node):
+        """
+        keep the node in the queue with its current key if it is inconsistent, and out of it otherwise
+        """
+        if self.g.get(node, math.inf) != self.rhs.get(node, math.inf):
+            self.__push(node)
+        else:
+            self.keys.pop(node, None)
+
+    def __compute(self):
+        """
+        expand the inconsistent nodes until the start is consistent and no queued key is below its key
+
+        :return: the number of expanded nodes
+        """
+        g, rhs, graph = self.g, self.rhs, self.graph
+        expansions = 0
+        while True:
+            key, node = self.__top()
+            start_key = self.__key(self.start)
+            if not (key < start_key or rhs.get(self.start, math.inf) > g.get(self.start, math.inf)):
+                return expansions
+            new_key = self.__key(node)
+            if key < new_key:  # the key is outdated by a move of the start
+                self.__push(node)
+                continue
+
+            expansions += 1
+            del self.keys[node]
+            old_g, node_rhs = g.get(node, math.inf), rhs.get(node, math.inf)
+            if old_g > node_rhs:  # overconsistent: the cost of the node is final
+                g[node] = node_rhs
+                for predecessor, cost in graph.weighted_successors(node):  # edges are bi-directional
+                    if predecessor != self.end and cost + node_rhs < rhs.get(predecessor, math.inf):
+                        rhs[predecessor] = cost + node_rhs
+                        self.__queue(predecessor)
+            else:  # underconsistent: the cost of the node grew, its predecessors through it must be repaired
+                g[node] = math.inf
+                self.__update(node)
+                for predecessor, cost in graph.weighted_successors(node):
+                    if rhs.get(predecessor, math.inf) == cost + old_g:
+                        self.__update(predecessor)
+
+    def move(self, start):
+        """
+        move the start, e.g. to the next node of the route, the search state is kept
+        """
+        self.km += self.heuristic(start)
+        self.start = start
+        self.heuristic = self.graph.goal(start)
+
+    def plan(self) -> Result:
+        """
+        apply the modifications of the graph since the last plan, and repair the search
+
+        :return: a Result object with the shortest path from the start to the end,
+                or an empty Result object if the end is unreachable,
+                settled_nodes is the number of nodes expanded by this plan,
+                expanded_nodes is the number of nodes that the search state holds
+        """
+        begin = time.perf_counter()
+        graph = self.graph
+        for node1, node2 in graph.changes(self.version):
+            self.__update(node1)
+            self.__update(node2)
+        self.version = graph.version
+
+        connected = graph.connected(self.start, self.end)
+        expansions = self.__compute() if connected else 0  # the repair waits for a plan that can reach the end
+        self.expansions += expansions
+        g = self.g
+        # the start may stay overconsistent(g > rhs), rhs is its cost through the consistent successors
+        cost = self.rhs.get(self.start, math.inf) if connected else math.inf
+        if cost == math.inf:
+            res = Result(settled_nodes=expansions)
+        else:
+            # follow the cheapest successor, cost(node, successor) + g(successor) = g(node) on the shortest path
+            path = [self.start]
+            node = self.start
+            while node != self.end:
+                node = min(graph.weighted_successors(node), key=lambda item: item[1] + g.get(item[0], math.inf))[0]
+                path.append(node)
+            res = Result(path=path, cost=cost, expanded_nodes=len(self.rhs), settled_nodes=expansions)
+        res.algorithms, res.start, res.end = 'DStarLite', self.start, self.end
+        res.time = time.perf_counter() - begin
+        return res
@@ -0,0 +1,114 @@
+import numpy as np
+
+from utils import Graph
+from utils.cache import IndexCache
+from algorithms.base import shortest_path_tree
+
+# distance of the nodes that a landmark can not reach, finite so that two unreachable
+# nodes give a bound of 0 instead of nan, while a reachable and an unreachable node give a huge bound
+UNREACHABLE = np.finfo(np.float32).max
+
+
+class Landmarks:
+    """
+    ALT(A*, Landmarks and Triangle inequality) heuristic provider,
+    the shortest distances from K landmarks to every node are precomputed in a float32 matrix,
+    and since d(L, end) <= d(L, v) + d(v, end) and d(L, v) <= d(L, end) + d(end, v)
+    for every landmark L, the heuristic of v is the lower bound max(|d(L, end) - d(L, v)|)
+    """
+    CACHE_NAME = 'alt'
+
+    __providers = IndexCache(CACHE_NAME)  # the key of a provider is its number of landmarks
+
+    def __init__(self, graph: Graph, landmarks, distances):
+        """
+        :param landmarks: dense ids of the K landmarks
+        :param distances: float32 matrix of shape (K, number of nodes),
+                        distances[k][i] is the shortest distance from landmarks[k] to the dense node i
+        """
+        self.index = graph.indexer.__getitem__  # not graph.index, the cached provider must not keep the graph alive
+        self.landmarks = landmarks
+        self.distances = distances
+        self.__tables = [row.tolist() for row in distances]
+
+        # float32 rounds every distance by up to half an ulp of the largest one,
+        # subtracting twice that keeps the bound admissible
+        finite = distances[distances < UNREACHABLE]
+        self.__slack = 2 * float(np.spacing(finite.max(initial=np.float32(0))))
+
+    @property
+    def nbytes(self):
+        return self.landmarks.nbytes + self.distances.nbytes
+
+    @property
+    def arrays(self):
+        return {'landmarks': self.landmarks, 'distances': self.distances}
+
+    @classmethod
+    def of(cls, graph: Graph, k=16, cache=True):
+        """
+        the provider with k landmarks of the graph, loaded from the cache next to the csv files,
+        or built(and cached) if the cache does not exist or is stale,
+        a modified graph gets a new provider for every version, and it is never cached on disk
+        """
+        return cls.__providers.get(graph, lambda: cls.build(graph, k), lambda arrays: cls(graph, **arrays),
+                                   key=k, cache=cache)
+
+    @classmethod
+    def build(cls, graph: Graph, k=16):
+        """
+        farthest selection: the first landmark is the node farthest from node 0,
+        every next landmark is the node whose distance to its closest selected landmark is the largest
+        """
+        nodes = graph.nodes
+        distances = np.full((k, len(nodes)), UNREACHABLE, dtype=np.float32)
+        landmarks = np.zeros(k, dtype=np.int64)
+
+        closest = cls.__distances_from(graph, nodes[0])
+        closest[closest == UNREACHABLE] = -1  # never select an unreachable node
+        for i in range(k):
+            landmarks[i] = int(np.argmax(closest))
+            distances[i] = cls.__distances_from(graph, nodes[landmarks[i]])
+            reachable = np.where(distances[i] == UNREACHABLE, -1, distances[i])
+            closest = reachable if i == 0 else np.minimum(closest, reachable)
+        return cls(graph, landmarks, distances)
+
+    @staticmethod
+    def __distances_from(graph: Graph, source):
+        """
+        shortest distances from the source to every dense node
+        """
+        tree, _ = shortest_path_tree(graph, source)
+        distances = np.full(len(graph), UNREACHABLE, dtype=np.float64)
+        distances[[graph.index(node) for node in tree]] = list(tree.values())
+        return distances.astype(np.float32)
+
+    def goal(self, end):
+        """
+        :return: the heuristic function of the nodes for the end
+        """
+        index, slack = self.index, self.__slack
+        target = index(end)
+        tables = [(table, table[target]) for table in self.__tables]
+
+        def heuristic(node):
+            i = index(node)
+            bound = max(abs(to_end - table[i]) for table, to_end in tables) - slack
+            return bound if bound > 0 else 0
+
+        return heuristic
+
+    def goals(self, end):
+        """
+        :return: the vectorised heuristic function of an array of dense ids for the end
+        """
+        slack = self.__slack
+        distances = self.distances.view(np.ndarray)
+        # in float64 like the python floats of the tables, so the bounds are the same as goal(end)
+        to_end = distances[:, self.index(end), None].astype(np.float64)
+
+        def heuristics(indices):
+            bounds = np.abs(to_end - distances[:, indices]).max(axis=0) - slack
+            return np.maximum(bounds, 0)
+
+        return heuristics
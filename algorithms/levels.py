@@ -0,0 +1,88 @@
+import numpy as np
+
+from utils import Graph, Result
+
+
+def expand_levels(graph: Graph, source, target=None):
+    """
+    Level-synchronous BFS over the CSR adjacency: the whole frontier layer is expanded at once,
+    the successors of all its nodes are gathered in one numpy operation, the visited ones are masked out
+    with the visited bitmap, and the first frontier node that reaches a new node becomes its parent
+
+    :param source: the node to search from
+    :param target: the node to stop at, the search stops after the layer that reaches it,
+                None to reach every node
+
+    :return: (hops, parents), int32 arrays indexed by dense ids, hops[i] is the number of edges
+            from the source to the dense node i and parents[i] is the dense id of its predecessor,
+            -1 for the unreached nodes(and for the parent of the source)
+    """
+    indptr, indices, _ = graph.csr
+    indptr, indices = indptr.view(np.ndarray), indices.view(np.ndarray)
+    n = len(graph)
+    visited = np.zeros(n, dtype=bool)
+    hops = np.full(n, -1, dtype=np.int32)
+    parents = np.full(n, -1, dtype=np.int32)
+    goal = None if target is None else graph.index(target)
+
+    frontier = np.array([graph.index(source)], dtype=np.int64)
+    visited[frontier] = True
+    hops[frontier] = 0
+    level = 0
+    while len(frontier) and (goal is None or not visited[goal]):
+        level += 1
+        # the positions of the successors of every frontier node in the adjacency arrays, flattened
+        begins = indptr[frontier]
+        counts = indptr[frontier + 1] - begins
+        ends = np.cumsum(counts)
+        positions = np.arange(ends[-1]) + np.repeat(begins - (ends - counts), counts)
+        successors = indices[positions]
+        owners = np.repeat(frontier, counts)
+
+        fresh = ~visited[successors]
+        successors, owners = successors[fresh], owners[fresh]
+        # the first occurrence of every new node, so its parent is the first frontier node that reached it
+        frontier, first = np.unique(successors, return_index=True)
+        frontier = frontier.astype(np.int64)
+        visited[frontier] = True
+        hops[frontier] = level
+        parents[frontier] = owners[first]
+    return hops, parents
+
+
+def level_search(graph: Graph, start, end) -> Result:
+    """
+    breadth first search with expand_levels, the path has the fewest edges like breadthFirstSearch,
+    but it may be another one of the paths with as few edges
+
+    :return: a Result object with the path, or an empty Result object if end is unreachable,
+            expanded_nodes is the number of reached nodes and settled_nodes the number of expanded nodes
+    """
+    hops, parents = expand_levels(graph, start, end)
+    goal = graph.index(end)
+    reached = int(np.count_nonzero(hops >= 0))
+    if hops[goal] < 0:
+        return Result(settled_nodes=reached)
+
+    nodes = graph.nodes
+    parents = parents.tolist()
+    path = []
+    i = goal
+    while i >= 0:
+        path.append(nodes[i])
+        i = parents[i]
+    path.reverse()
+    # every node of the last layer was reached but not expanded
+    settled = reached - int(np.count_nonzero(hops == hops[goal]))
+    return Result(path=path, cost=sum(map(graph.edge_cost, path[:-1], path[1:])),
+                  expanded_nodes=reached, settled_nodes=settled)
+
+
+def hop_distances(graph: Graph, source):
+    """
+    the number of edges of the shortest(in edges) path from the source to every node
+
+    :return: int32 array indexed by dense ids, -1 for the nodes in another component
+    """
+    hops, _ = expand_levels(graph, source)
+    return hops
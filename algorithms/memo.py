@@ -0,0 +1,209 @@
+import dataclasses
+import functools
+import itertools
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from utils import Graph, Result
+from algorithms.base import shortest_path_tree, trace_path
+
+# algorithms that always return a shortest path, for them a query (end, start) is answered by
+# the reversed path of (start, end), since all edges are bi-directional, and by a shortest-path tree
+OPTIMAL = {'uniformCostSearch', 'aStarSearch', 'biUniformCostSearch', 'biAStarSearch',
+           'contractionHierarchySearch'}
+
+
+class QueryCache:
+    """
+    LRU memoisation of the @timer search functions, keyed by (algorithm, start, end, graph state, kwargs),
+    the state is (serial number of the graph, graph version), so a cache can serve several graphs,
+    the memory is bounded by the total number of nodes of the cached paths,
+    and optionally the shortest-path trees of the recent popular endpoints are kept,
+    so that later queries from or to those endpoints cost only a lookup,
+    an endpoint is popular once it appears in `popularity` missed queries
+    and these searches took at least as long as a tree(the last one built), like renting until
+    the rent paid would have bought it, a tree of the whole graph costs many searches,
+    the answers of the trees are stored like the results of the searches
+
+    Results returned from the cache are copies marked with cached=True,
+    and their time is the time of the lookup instead of the time of the original search
+    """
+
+    def __init__(self, capacity=1_000_000, trees=0, popularity=4):
+        """
+        :param capacity: max total number of nodes of the paths in the cache
+        :param trees: max number of shortest-path trees kept, 0 disables the trees
+        :param popularity: min number of missed queries of an endpoint before its tree is built
+        """
+        if popularity < 1:
+            raise ValueError('popularity must be at least 1')
+        self.capacity = capacity
+        self.trees = trees
+        self.popularity = popularity
+        self.__results = OrderedDict()  # {key: Result}, from the least to the most recently used
+        self.__trees = OrderedDict()  # {(source, graph state): (distances, parents)}
+        self.__serials = weakref.WeakKeyDictionary()  # {graph: serial number}, never reused, unlike id(graph)
+        self.__next_serial = itertools.count()
+        self.__seen = OrderedDict()  # {endpoint: [number of missed queries, seconds of their searches]}
+        self.__tree_time = 0  # seconds of the last tree built, the first tree only waits for the popularity
+        self.__size = 0  # total number of nodes of the cached paths
+        self.__lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+        self.tree_hits = self.tree_builds = self.tree_evictions = 0
+
+    def __len__(self):
+        return len(self.__results)
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'tree hits': self.tree_hits, 'tree builds': self.tree_builds, 'tree evictions': self.tree_evictions,
+                'results': len(self.__results), 'nodes': self.__size, 'trees': len(self.__trees)}
+
+    def clear(self):
+        with self.__lock:
+            self.__results.clear()
+            self.__trees.clear()
+            self.__seen.clear()
+            self.__size = 0
+
+    def wrap(self, func):
+        """
+        :return: func with the same signature, answered from this cache
+        """
+        @functools.wraps(func)
+        def wrapper(graph: Graph, start, end, **kwargs):
+            return self.search(func, graph, start, end, **kwargs)
+
+        return wrapper
+
+    def search(self, func, graph: Graph, start, end, **kwargs) -> Result:
+        """
+        :return: the cached result of func(graph, start, end, **kwargs), or the result of a new search
+        """
+        begin = time.perf_counter()
+        name = func.__name__
+        options = tuple(sorted(kwargs.items()))
+        state = self.__state(graph)
+        key = (name, start, end, state, options)
+        res = self.__lookup(name, key, (name, end, start, state, options), state)
+        if res is not None:
+            res.time = time.perf_counter() - begin
+            return res
+
+        trees = self.trees and name in OPTIMAL
+        source = self.__popular(start, end) if trees else None
+        if source is not None:
+            built = time.perf_counter()
+            distances, parents = shortest_path_tree(graph, source)
+            res = self.__from_tree(name, start, end, distances, parents, reverse=source != start)
+            with self.__lock:
+                self.misses += 1
+                self.tree_builds += 1
+                self.__tree_time = time.perf_counter() - built
+                self.__seen.pop(source, None)  # after an eviction, the endpoint has to be popular again
+                self.__trees[source, state] = (distances, parents)
+                while len(self.__trees) > self.trees:
+                    self.__trees.popitem(last=False)
+                    self.tree_evictions += 1
+                self.__store(key, res)
+            res.cached = False
+            res.time = time.perf_counter() - begin
+            return res
+
+        res = func(graph, start, end, **kwargs)
+        with self.__lock:
+            self.misses += 1
+            self.__store(key, res)
+            if trees:
+                self.__count(start, end, time.perf_counter() - begin)
+        return res
+
+    def __state(self, graph: Graph):
+        """
+        (serial number of the graph, graph version), the version alone begins at 0 for every graph
+        """
+        with self.__lock:
+            serial = self.__serials.get(graph)
+            if serial is None:
+                serial = self.__serials[graph] = next(self.__next_serial)
+        return serial, graph.version
+
+    def __lookup(self, name, key, reversed_key, state):
+        with self.__lock:
+            if key in self.__results:
+                self.hits += 1
+                self.__results.move_to_end(key)
+                res = self.__results[key]
+                return dataclasses.replace(res, path=res.path and list(res.path), cached=True)
+
+            if name not in OPTIMAL:
+                return None
+
+            if reversed_key in self.__results:
+                self.hits += 1
+                self.__results.move_to_end(reversed_key)
+                res = self.__results[reversed_key]
+                return dataclasses.replace(res, start=res.end, end=res.start,
+                                           path=res.path and res.path[::-1], cached=True)
+
+            _, start, end, _, _ = key
+            for source, target, reverse in [(start, end, False), (end, start, True)]:
+                if (source, state) in self.__trees:
+                    self.tree_hits += 1
+                    self.__trees.move_to_end((source, state))
+                    distances, parents = self.__trees[source, state]
+                    res = self.__from_tree(name, start, end, distances, parents, reverse)
+                    self.__store(key, res)  # a copy, the next lookup does not trace the path again
+                    return res
+        return None
+
+    def __popular(self, start, end):
+        """
+        the endpoint of the query whose missed queries paid for a tree, None if none did
+        """
+        with self.__lock:
+            for node in (start, end):
+                misses, seconds = self.__seen.get(node, (0, 0))
+                if misses >= self.popularity and seconds >= self.__tree_time:
+                    return node
+        return None
+
+    def __count(self, start, end, seconds):
+        """
+        count a missed query of the endpoints, and the seconds of its search
+        """
+        for node in {start, end}:
+            seen = self.__seen.setdefault(node, [0, 0])
+            seen[0] += 1
+            seen[1] += seconds
+            self.__seen.move_to_end(node)
+        while len(self.__seen) > 64 * self.trees:
+            self.__seen.popitem(last=False)
+
+    @staticmethod
+    def __from_tree(name, start, end, distances, parents, reverse):
+        """
+        the result of a query answered by the shortest-path tree of start(or of end if reverse)
+        """
+        target = start if reverse else end
+        if target not in distances:
+            res = Result()
+        else:
+            path = trace_path(parents, target)
+            res = Result(path=path[::-1] if reverse else path, cost=distances[target])
+        res.algorithms, res.start, res.end, res.cached = name, start, end, True
+        return res
+
+    def __store(self, key, res: Result):
+        size = len(res.path or ()) + 1
+        if key in self.__results:
+            self.__size -= len(self.__results.pop(key).path or ()) + 1
+        self.__results[key] = dataclasses.replace(res, path=res.path and list(res.path))
+        self.__size += size
+        while self.__size > self.capacity and self.__results:
+            _, evicted = self.__results.popitem(last=False)
+            self.__size -= len(evicted.path or ()) + 1
+            self.evictions += 1
@@ -0,0 +1,52 @@
+import heapq
+import math
+import time
+
+from utils import Graph, MultiGoalProblem, Result
+from algorithms.base import trace_path
+
+
+def multi_goal_search(graph: Graph, problem: MultiGoalProblem, k=1):
+    """
+    Dijkstra(or A* with the heuristic of the nearest goal) from all the starts at once,
+    every start begins with its initial cost, and the search goes on until k goals are settled
+
+    The heuristic value of a goal is 0, so with a consistent heuristic the goals are settled
+    in the order of their costs, and the i-th settled goal is the i-th nearest one
+
+    :return: a list of at most k Result objects, from the nearest goal,
+            Result.goal is the goal that was reached, and the path begins at its nearest start,
+            the time of every Result is the time of the search until its goal was settled
+    """
+    begin = time.perf_counter()
+    heuristic = problem.heuristic
+    # the goals in the components of the starts, the search stops when no other goal is reachable
+    components = {graph.component(start) for start in problem.starts}
+    remaining = sum(graph.component(goal) in components for goal in problem.goals)
+
+    distances = dict(problem.starts)
+    parents = dict.fromkeys(problem.starts)
+    frontiers = [(cost + heuristic(start), cost, start) for start, cost in problem.starts.items()]
+    heapq.heapify(frontiers)
+    settled = set()
+    results = []
+    while frontiers and len(results) < min(k, remaining):
+        _, cost, cur_node = heapq.heappop(frontiers)
+        if cur_node in settled or cost != distances[cur_node]:  # a stale entry
+            continue
+        settled.add(cur_node)
+
+        if problem.is_goal(cur_node):
+            res = Result(path=trace_path(parents, cur_node), cost=cost, expanded_nodes=len(distances),
+                         settled_nodes=len(settled), goal=cur_node)
+            res.start, res.end = res.path[0], cur_node
+            res.time = time.perf_counter() - begin
+            results.append(res)
+
+        for next_node, distance in graph.weighted_successors(cur_node):
+            new_cost = cost + distance
+            if new_cost < distances.get(next_node, math.inf):
+                distances[next_node] = new_cost
+                parents[next_node] = cur_node
+                heapq.heappush(frontiers, (new_cost + heuristic(next_node), new_cost, next_node))
+    return results
@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import Graph
+
+_graph = None  # the graph of a worker process
+
+
+def _load_graph(mirrors):
+    """
+    initializer of the worker processes, the graph arrays are memory-mapped from
+    the cache that the parent process has written, so they are shared through the page cache
+    instead of being pickled into every worker, see worker_mirrors
+    """
+    global _graph
+    _graph = Graph(cache=True, mirrors=mirrors)
+
+
+def worker_mirrors(graph: Graph, workers):
+    """
+    True if every worker process may keep python mirrors of the graph(the mirrors: argument of Graph),
+    the mirrors of all the workers together are bounded by MIRROR_EDGES like the mirrors of one process,
+    the workers of a larger graph read the memory-mapped arrays that they share
+    """
+    return len(graph.csr[1]) * workers <= graph.MIRROR_EDGES
+
+
+def _run_chunk(chunk):
+    return [func(_graph, start, end, **kwargs) for func, start, end, kwargs in chunk]
+
+
+def parallel_search(algorithms, points, workers=None, chunksize=16, **kwargs):
+    """
+    run every algorithm on every (start, end) pair on a pool of worker processes,
+    the queries are scheduled in chunks of chunksize, and the results are returned in the same order
+    as the serial loop [func(graph, start, end) for func in algorithms for start, end in points]
+
+    :param algorithms: the @timer functions of algorithms.search, e.g. [Uniform, AStar]
+    :param workers: number of worker processes, default is the number of cpu cores
+    :param kwargs: keyword arguments passed to every algorithm, e.g. heap='lazy'
+
+    :return: a list of Result objects
+    """
+    graph = Graph(cache=True)  # make sure the cache exists before the workers memory-map it
+    workers = workers or os.cpu_count()
+    tasks = [(func, start, end, kwargs) for func in algorithms for start, end in points]
+    chunks = [tasks[i:i + chunksize] for i in range(0, len(tasks), chunksize)]
+
+    with multiprocessing.Pool(workers, initializer=_load_graph,
+                              initargs=(worker_mirrors(graph, workers),)) as pool:
+        # imap keeps the order of the chunks whatever worker finishes first
+        return [res for results in pool.imap(_run_chunk, chunks) for res in results]
+
+
+def threaded_search(graph: Graph, algorithms, points, workers=None, **kwargs):
+    """
+    run every algorithm on every (start, end) pair on a pool of threads that share the graph,
+    every query carries its own Problem, so the graph is only read and never modified,
+    the results are returned in the same order as parallel_search
+
+    :param workers: number of threads, default is the default of ThreadPoolExecutor
+    """
+    tasks = [(func, start, end) for func in algorithms for start, end in points]
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(lambda task: task[0](graph, task[1], task[2], **kwargs), tasks))
@@ -1,80 +1,305 @@
-from utils import DistinctHeap, Queue, Graph, timer
-from algorithms.base import General_Graph_Search, depth_limited_search
+import functools
+import math
+import time
+
+from utils import DistinctHeap, IndexedHeap, LazyHeap, Queue, Graph, Result, SearchStats, timer
+from algorithms.base import General_Graph_Search, bounded_depth_first_search
+from algorithms.bidirectional import bidirectional_search
+from algorithms.bounded import focal_search, anytime_search
+from algorithms.contraction import ContractionHierarchy
+from algorithms.landmarks import Landmarks
+from algorithms.levels import level_search
+from algorithms.multigoal import multi_goal_search
+
+
+def reachable(func):
+    """
+    decorator of the search functions, a query between two components of the graph
+    returns the empty Result of an unreachable end after an O(1) lookup of the component labels,
+    instead of exhausting the component of the start(or, for the iterative deepening, deepening it)
+    """
+    @functools.wraps(func)
+    def wrapper(graph: Graph, start, end, *args, **kwargs) -> Result:
+        if not graph.connected(start, end):
+            return Result(settled_nodes=0)
+        return func(graph, start, end, *args, **kwargs)
+
+    return wrapper
 
 
 @timer
-def depthFirstSearch(graph: Graph, start: int, end: int):
-    graph.set_problem(start=start, end=end, heuristic=False)  # initialize the search problem
+@reachable
+def depthFirstSearch(graph: Graph, start: int, end: int, stats: SearchStats = None):
+    problem = graph.problem(start=start, end=end, heuristic=False)  # initialize the search problem
     stack = list()  # initialize a LIFO stack as the frontier
-    return General_Graph_Search(graph, frontiers=stack)
+    return General_Graph_Search(graph, problem, frontiers=stack, stats=stats)
 
 
 @timer
-def breadthFirstSearch(graph: Graph, start: int, end: int):
-    graph.set_problem(start=start, end=end, heuristic=False)  # initialize the search problem
+@reachable
+def breadthFirstSearch(graph: Graph, start: int, end: int, stats: SearchStats = None):
+    problem = graph.problem(start=start, end=end, heuristic=False)  # initialize the search problem
     queue = Queue()  # initialize a FIFO queue as the frontier
-    return General_Graph_Search(graph, frontiers=queue)
+    return General_Graph_Search(graph, problem, frontiers=queue, stats=stats)
 
 
 @timer
-def uniformCostSearch(graph: Graph, start: int, end: int):
-    graph.set_problem(start=start, end=end, heuristic=False)
+@reachable
+def levelBreadthFirstSearch(graph: Graph, start: int, end: int):
+    '''
+    breadth first search that expands a whole layer of the frontier at once with numpy,
+    instead of pushing every node through the Queue, and stops after the layer that reaches the end,
+    it reads no successor list of a single node, so it takes no stats
+    '''
+    return level_search(graph, start, end)
+
+
+def priority_queue(graph: Graph, heap, weights):
+    """
+    build the priority queue frontier ordered by cost * weights[0] + heuristic_value * weights[1]
+
+    :param heap: 'indexed': IndexedHeap, array-backed with positions indexed by the dense ids,
+                 'lazy': LazyHeap, heapq with lazy deletion of the stale entries,
+                 'distinct': DistinctHeap, ordered by a comparator function
+    """
+    if heap == 'indexed':
+        return IndexedHeap(capacity=len(graph), weights=weights, index=None if graph.dense else graph.index)
+    if heap == 'lazy':
+        return LazyHeap(weights=weights)
+    if heap == 'distinct':
+        cost_weight, heuristic_weight = weights
+        return DistinctHeap(key=lambda item: item[0],
+                            cmp=lambda item: item[1] * cost_weight + item[2] * heuristic_weight)
+    raise ValueError(f'unknown heap: {heap}')
+
+
+@timer
+@reachable
+def uniformCostSearch(graph: Graph, start: int, end: int, heap='lazy', stats: SearchStats = None,
+                      vectorised=False):
+    problem = graph.problem(start=start, end=end, heuristic=False)
     '''
     frontier for uniformCostSearch is a distinct priority queue,
-    where key is item[0][-1]: the last node in a path to make sure that
+    where key is item[0]: the node of an entry to make sure that
     there is only one optimal path to reach that node,
     if two paths has the same destiny, optimal one will be preserved
     different paths in the queue are sorted by it's total cost(item[1])
     '''
-    priority_queue = DistinctHeap(key=lambda item: item[0][-1], cmp=lambda item: item[1])
-    return General_Graph_Search(graph, frontiers=priority_queue)
+    frontier = priority_queue(graph, heap, weights=(1, 0))
+    return General_Graph_Search(graph, problem, frontiers=frontier, stats=stats, vectorised=vectorised)
 
 
 @timer
-def greedySearch(graph: Graph, start: int, end: int):
-    graph.set_problem(start=start, end=end, heuristic=True)
+@reachable
+def greedySearch(graph: Graph, start: int, end: int, heap='lazy', stats: SearchStats = None,
+                 vectorised=False):
+    problem = graph.problem(start=start, end=end, heuristic=True)
     '''
     frontier for greedySearch is a distinct priority queue,
-    where key is item[0][-1]: the last node in a path to make sure that
-                              there is only one optimal path to reach that node,
+    where key is item[0]: the node of an entry to make sure that
+                          there is only one optimal path to reach that node,
 
     and different paths in the queue are sorted by it's heuristic value (item[2])
     '''
-    priority_queue = DistinctHeap(key=lambda item: item[0][-1], cmp=lambda item: item[2])
-    return General_Graph_Search(graph, frontiers=priority_queue)
+    frontier = priority_queue(graph, heap, weights=(0, 1))
+    return General_Graph_Search(graph, problem, frontiers=frontier, stats=stats, vectorised=vectorised)
+
+
+def heuristic_provider(graph: Graph, heuristic):
+    """
+    :param heuristic: 'euclidean': the straight-line distance to the end,
+                      'alt': the landmarks lower bound of Landmarks,
+                      or any heuristic provider that implements goal(end)
+    """
+    if heuristic == 'euclidean':
+        return True
+    if heuristic == 'alt':
+        return Landmarks.of(graph)
+    return heuristic
 
 
 @timer
-def aStarSearch(graph: Graph, start: int, end: int):
-    graph.set_problem(start=start, end=end, heuristic=True)
+@reachable
+def aStarSearch(graph: Graph, start: int, end: int, heap='lazy', heuristic='euclidean', stats: SearchStats = None,
+                vectorised=False):
+    problem = graph.problem(start=start, end=end, heuristic=heuristic_provider(graph, heuristic))
     '''
     frontier for aStarSearch is a distinct priority queue,
-    where key is item[0][-1]: the last node in a path to make sure that
-                              there is only one optimal path to reach that node,
+    where key is item[0]: the node of an entry to make sure that
+                          there is only one optimal path to reach that node,
 
     and different paths in the queue are sorted by sum of total cost and heuristic value
     '''
-    priority_queue = DistinctHeap(key=lambda item: item[0][-1], cmp=lambda item: item[1] + item[2])
-    return General_Graph_Search(graph, frontiers=priority_queue)
+    frontier = priority_queue(graph, heap, weights=(1, 1))
+    return General_Graph_Search(graph, problem, frontiers=frontier, stats=stats, vectorised=vectorised)
 
 
 @timer
-def iterative_deepening_search(graph: Graph, start: int, end: int):
-    graph.set_problem(start=start, end=end)
-    stack = list()
-    for iters in range(int(1e9)):
-        res = depth_limited_search(graph, stack, iters)
-        if res.prune is False:
+@reachable
+def weightedAStarSearch(graph: Graph, start: int, end: int, epsilon=0.5, heap='lazy', heuristic='euclidean',
+                        stats: SearchStats = None):
+    problem = graph.problem(start=start, end=end, heuristic=heuristic_provider(graph, heuristic))
+    '''
+    weighted A*, the same as aStarSearch but the heuristic value is inflated by (1 + epsilon),
+    with a consistent heuristic(euclidean or alt) the cost is at most (1 + epsilon) times the optimal cost,
+    even though a node is never reopened
+    '''
+    frontier = priority_queue(graph, heap, weights=(1, 1 + epsilon))
+    res = General_Graph_Search(graph, problem, frontiers=frontier, stats=stats)
+    if res.path is not None:
+        res.suboptimality = 1 + epsilon
+    return res
+
+
+@timer
+@reachable
+def focalSearch(graph: Graph, start: int, end: int, epsilon=0.5, heuristic='euclidean', stats: SearchStats = None):
+    '''
+    A*epsilon, expands the open node closest to the end among the ones within (1 + epsilon) of the smallest f,
+    the cost is at most (1 + epsilon) times the optimal cost
+    '''
+    problem = graph.problem(start=start, end=end, heuristic=heuristic_provider(graph, heuristic))
+    return focal_search(graph, problem, epsilon, stats=stats)
+
+
+@timer
+@reachable
+def anytimeAStarSearch(graph: Graph, start: int, end: int, epsilon=2.0, deadline=None, max_expansions=None,
+                       heuristic='euclidean', stats: SearchStats = None):
+    '''
+    anytime weighted A*, returns a first path of weighted A* quickly and improves it
+    until it is optimal, or the deadline(seconds) or the max_expansions budget runs out,
+    Result.suboptimality is the bound of the returned path
+    '''
+    problem = graph.problem(start=start, end=end, heuristic=heuristic_provider(graph, heuristic))
+    return anytime_search(graph, problem, epsilon, deadline=deadline, max_expansions=max_expansions, stats=stats)
+
+
+@timer
+@reachable
+def biUniformCostSearch(graph: Graph, start: int, end: int, stats: SearchStats = None):
+    '''
+    bidirectional Dijkstra, searches forward from the start and backward from the end at the same time,
+    and stops when the two frontiers can not meet with a shorter path than the best one found
+    '''
+    return bidirectional_search(graph, start, end, heuristic=False, stats=stats)
+
+
+@timer
+@reachable
+def biAStarSearch(graph: Graph, start: int, end: int, stats: SearchStats = None):
+    '''
+    bidirectional A*, the same as biUniformCostSearch but both searches are guided by
+    the consistent average potential of the euclidean distances to the end and to the start
+    '''
+    return bidirectional_search(graph, start, end, heuristic=True, stats=stats)
+
+
+@timer
+@reachable
+def contractionHierarchySearch(graph: Graph, start: int, end: int):
+    '''
+    bidirectional upward search on the contraction hierarchy of the graph,
+    the hierarchy is preprocessed once and cached on disk next to the csv files,
+    the search never reads the graph, so it takes no stats
+    '''
+    return ContractionHierarchy.of(graph).query(start, end)
+
+
+@timer
+@reachable
+def iterative_deepening_search(graph: Graph, start: int, end: int, stats: SearchStats = None):
+    problem = graph.problem(start=start, end=end)
+    '''
+    repeat the depth-limited search with the depth limit 0, 1, 2...
+    until the end is found, or no path was cut off by the limit(the end is unreachable)
+    '''
+    depth = 0
+    while True:
+        res, depth = bounded_depth_first_search(graph, problem, depth, stats=stats)
+        if res.path is not None or depth == math.inf:
+            return res
+
+
+@timer
+@reachable
+def iterativeDeepeningAStarSearch(graph: Graph, start: int, end: int, heuristic='euclidean',
+                                  stats: SearchStats = None):
+    problem = graph.problem(start=start, end=end, heuristic=heuristic_provider(graph, heuristic))
+    '''
+    IDA*, the same as iterative_deepening_search, but the limit is on f = cost + heuristic_value,
+    it starts from the heuristic value of the start, and every next limit is
+    the smallest f that exceeded the previous one
+    '''
+    bound = problem.heuristic(start)
+    while True:
+        res, bound = bounded_depth_first_search(graph, problem, bound, informed=True, stats=stats)
+        if res.path is not None or bound == math.inf:
             return res
-        iters += 1
+
+
+def kNearestGoalsSearch(graph: Graph, start, goals, k, heuristic='euclidean'):
+    '''
+    the k goals nearest to the start with a single search, instead of a search for every goal,
+    start may be a node, an iterable of nodes, or a dict {start: initial cost} to search from all of them
+
+    :param heuristic: 'euclidean' for A* with the straight-line distance to the nearest goal,
+                    None for Dijkstra
+    :return: a list of at most k Result objects from the nearest goal, Result.goal is the goal of every one
+    '''
+    if heuristic not in ('euclidean', None):
+        raise ValueError(f'unsupported heuristic of a set of goals: {heuristic}')
+    problem = graph.multi_goal_problem(start, goals, heuristic=heuristic == 'euclidean')
+    results = multi_goal_search(graph, problem, k)
+    for res in results:
+        res.algorithms = 'kNearestGoalsSearch'
+    return results
+
+
+def nearestGoalSearch(graph: Graph, start, goals, heuristic='euclidean') -> Result:
+    '''
+    the path to the nearest of the goals, e.g. the closest of the depots, see kNearestGoalsSearch
+
+    :return: a Result object with the goal that was reached, or an empty Result object if no goal is reachable
+    '''
+    begin = time.perf_counter()
+    results = kNearestGoalsSearch(graph, start, goals, k=1, heuristic=heuristic)
+    res = results[0] if results else Result(start=start)
+    res.algorithms = 'nearestGoalSearch'
+    res.time = time.perf_counter() - begin
+    return res
+
+
+def search_by_coordinates(graph: Graph, algorithm, origin, destination, **kwargs):
+    """
+    run the algorithm between the nodes closest to two positions
+
+    :param algorithm: a search function of this module, e.g. AStar
+    :param origin, destination: (longitude, latitude) positions
+    :return: the Result of algorithm(graph, start, end, **kwargs),
+            its start and end are the snapped nodes
+    """
+    start = graph.nearest(*origin)
+    end = graph.nearest(*destination)
+    return algorithm(graph, start, end, **kwargs)
 
 
 DFS = depthFirstSearch
 BFS = breadthFirstSearch
+LevelBFS = levelBreadthFirstSearch
 Uniform = uniformCostSearch
 Greedy = greedySearch
 AStar = aStarSearch
+WAStar = weightedAStarSearch
+Focal = focalSearch
+AnytimeAStar = anytimeAStarSearch
 IDS = iterative_deepening_search
+IDAStar = iterativeDeepeningAStarSearch
+BiUniform = biUniformCostSearch
+BiAStar = biAStarSearch
+CH = contractionHierarchySearch
+NearestGoal = nearestGoalSearch
+KNearestGoals = kNearestGoalsSearch
 
 if __name__ == '__main__':
     graph = Graph()
@@ -0,0 +1,9 @@
+import sys
+
+from benchmarks import BENCHMARKS
+
+if __name__ == '__main__':
+    # python benchmark.py [name ...], run all the benchmarks by default
+    for name in sys.argv[1:] or BENCHMARKS:
+        print(f'===== {name} =====')
+        BENCHMARKS[name]()
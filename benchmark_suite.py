@@ -0,0 +1,197 @@
+"""
+Reproducible benchmark suite of the search algorithms
+
+    python benchmark_suite.py run [--out results.json] [--algorithms AStar CH ...]
+    python benchmark_suite.py compare baseline.json results.json [--threshold 0.1]
+
+The query set is generated once from a seed, bucketed by the length of the shortest route,
+and persisted in QUERIES_FILE, so every run measures exactly the same queries
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import algorithms
+from utils import Graph
+
+QUERIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_queries.json')
+
+# bucket name: [min, max) of the shortest route length, JSON has no infinity, QUERIES_FILE saves it as null
+BUCKETS = {'short': (0, 1), 'medium': (1, 4), 'long': (4, math.inf)}
+ALGORITHMS = ['DFS', 'BFS', 'Uniform', 'Greedy', 'AStar', 'BiUniform', 'BiAStar', 'CH']
+
+# metrics compared against the baseline, a larger value is worse for all of them
+COMPARED = ['p50', 'p95', 'p99', 'peak memory(KiB)']
+# metrics compared against the baseline, a smaller value is worse
+COMPARED_THROUGHPUT = ['qps']
+# the counters of the searches, the same queries settle the same nodes, any change is reported
+COMPARED_COUNTERS = ['settled nodes', 'expanded nodes']
+
+
+def make_queries(graph: Graph, per_bucket=20, seed=0):
+    """
+    draw seeded random pairs until every bucket has per_bucket queries
+    """
+    rng = random.Random(seed)
+    nodes = graph.nodes
+    queries = {bucket: [] for bucket in BUCKETS}
+    while any(len(pairs) < per_bucket for pairs in queries.values()):
+        start = rng.choice(nodes)
+        # a random walk end keeps enough short routes in the set
+        end = rng.choice(nodes) if rng.random() < 0.5 else random_walk(graph, start, rng.randint(1, 200), rng)
+        length = algorithms.Uniform(graph, start, end).cost
+        if length is None:
+            continue
+        for bucket, (low, high) in BUCKETS.items():
+            if low <= length < high and len(queries[bucket]) < per_bucket:
+                queries[bucket].append([start, end])
+    return {'seed': seed, 'buckets': {bucket: [low, None if high == math.inf else high]
+                                      for bucket, (low, high) in BUCKETS.items()},
+            'queries': queries}
+
+
+def random_walk(graph: Graph, start, steps, rng):
+    node = start
+    for _ in range(steps):
+        node = rng.choice(graph.successors(node))
+    return node
+
+
+def load_queries(graph: Graph, file=QUERIES_FILE):
+    """
+    the persisted query set, generated and saved on the first run,
+    a query set of other buckets than BUCKETS is an error, its queries would be in the wrong buckets
+    """
+    if not os.path.exists(file):
+        with open(file, 'w') as f:
+            json.dump(make_queries(graph), f, indent=1, allow_nan=False)
+    with open(file) as f:
+        saved = json.load(f)
+    buckets = {bucket: (low, math.inf if high is None else high) for bucket, (low, high) in saved['buckets'].items()}
+    if buckets != BUCKETS:
+        raise ValueError(f'the queries of {file} were bucketed by {buckets}, not by {BUCKETS}')
+    return saved['queries']
+
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q)) * 1000  # ms
+
+
+def measure(graph: Graph, func, pairs, warmup=1, repeat=5):
+    """
+    latency percentiles(ms) of every query over repeat runs after warmup runs,
+    the nodes counters of the search, and the tracemalloc peak of the most expensive query
+    """
+    for _ in range(warmup):
+        for start, end in pairs:
+            func(graph, start, end)
+
+    samples = []
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        for start, end in pairs:
+            samples.append(func(graph, start, end).time)
+    elapsed = time.perf_counter() - begin
+
+    peak = 0
+    results = []
+    for start, end in pairs:
+        tracemalloc.start()
+        results.append(func(graph, start, end))
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    def mean(attr):
+        values = [getattr(res, attr) for res in results if getattr(res, attr) is not None]
+        return sum(values) / len(values) if values else None
+
+    return {'queries': len(samples),
+            'p50': percentile(samples, 50), 'p95': percentile(samples, 95), 'p99': percentile(samples, 99),
+            'qps': len(samples) / elapsed,
+            'settled nodes': mean('settled_nodes'), 'expanded nodes': mean('expanded_nodes'),
+            'peak memory(KiB)': peak / 1024}
+
+
+def run(names=ALGORITHMS, warmup=1, repeat=5):
+    graph = Graph()
+    queries = load_queries(graph)
+    report = {'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+              'python': platform.python_version(), 'machine': platform.machine(),
+              'warmup': warmup, 'repeat': repeat, 'results': {}}
+    for name in names:
+        func = getattr(algorithms, name)
+        for bucket, pairs in queries.items():
+            metrics = measure(graph, func, pairs, warmup, repeat)
+            report['results'][f'{name}/{bucket}'] = metrics
+            print(f'{name:<10} {bucket:<7} p50: {metrics["p50"]:8.3f} ms, p95: {metrics["p95"]:8.3f} ms, '
+                  f'p99: {metrics["p99"]:8.3f} ms, qps: {metrics["qps"]:9.1f}, '
+                  f'peak: {metrics["peak memory(KiB)"]:8.1f} KiB', file=sys.stderr)
+    return report
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    :return: the list of regressions, metrics of COMPARED that grew more than threshold(relative)
+            from the baseline, of COMPARED_THROUGHPUT that dropped more than threshold,
+            and of COMPARED_COUNTERS that changed at all, the search does something else
+    """
+    regressions = []
+    for key, metrics in current['results'].items():
+        if key not in baseline['results']:
+            continue
+        for metric in COMPARED + COMPARED_THROUGHPUT + COMPARED_COUNTERS:
+            old, new = baseline['results'][key].get(metric), metrics.get(metric)
+            if metric in COMPARED:
+                regressed = old and new > old * (1 + threshold)
+            elif metric in COMPARED_THROUGHPUT:
+                regressed = old and new < old * (1 - threshold)
+            else:
+                regressed = old != new and not (old and new and math.isclose(old, new, rel_tol=1e-9))
+            if regressed:
+                regressions.append({'benchmark': key, 'metric': metric, 'baseline': old, 'current': new,
+                                    'change': new / old - 1 if old and new is not None else None})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run')
+    run_parser.add_argument('--out', help='write the JSON report to this file instead of stdout')
+    run_parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS)
+    run_parser.add_argument('--warmup', type=int, default=1)
+    run_parser.add_argument('--repeat', type=int, default=5)
+    compare_parser = commands.add_parser('compare')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = json.dumps(run(args.algorithms, args.warmup, args.repeat), indent=2, allow_nan=False)
+        if args.out:
+            with open(args.out, 'w') as f:
+                f.write(report)
+        else:
+            print(report)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    print(json.dumps({'threshold': args.threshold, 'regressions': regressions}, indent=2))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+The benchmarks of the searches, every module measures one feature and checks its results
+
+    python benchmark.py [name ...]
+"""
+from .startup import startup_benchmark
+from .search import search_benchmark
+from .heap import heap_benchmark
+from .bidirectional import bidirectional_benchmark
+from .contraction import contraction_benchmark
+from .landmarks import landmarks_benchmark
+from .batch import batch_benchmark
+from .parallel import parallel_benchmark
+from .concurrency import concurrency_stress
+from .cache import cache_benchmark
+from .deepening import deepening_benchmark
+from .instrumentation import instrumentation_benchmark
+from .spatial import spatial_benchmark
+from .suboptimal import suboptimal_benchmark
+from .memory import memory_benchmark
+from .vectorised import vectorised_benchmark
+from .components import components_benchmark
+from .levels import levels_benchmark
+from .replanning import replanning_benchmark
+from .multigoal import multigoal_benchmark
+from .ingest import ingest_benchmark
+from .sink import sink_benchmark
+from .serving import server_benchmark
+
+BENCHMARKS = {'startup': startup_benchmark,
+              'search': search_benchmark,
+              'heap': heap_benchmark,
+              'bidirectional': bidirectional_benchmark,
+              'contraction': contraction_benchmark,
+              'landmarks': landmarks_benchmark,
+              'batch': batch_benchmark,
+              'parallel': parallel_benchmark,
+              'concurrency': concurrency_stress,
+              'cache': cache_benchmark,
+              'deepening': deepening_benchmark,
+              'instrumentation': instrumentation_benchmark,
+              'spatial': spatial_benchmark,
+              'suboptimal': suboptimal_benchmark,
+              'memory': memory_benchmark,
+              'vectorised': vectorised_benchmark,
+              'components': components_benchmark,
+              'levels': levels_benchmark,
+              'replanning': replanning_benchmark,
+              'multigoal': multigoal_benchmark,
+              'ingest': ingest_benchmark,
+              'sink': sink_benchmark,
+              'server': server_benchmark}
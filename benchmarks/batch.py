@@ -0,0 +1,36 @@
+import random
+import time
+
+from algorithms import Uniform, batch_search, distance_matrix
+from utils import Graph
+
+
+def batch_benchmark(sizes=(100, 1000, 10000), sources=50, loop_limit=300):
+    """
+    throughput of batch_search against looping Uniform over the same pairs,
+    the starts of a batch are drawn from a pool of popular sources,
+    and looping Uniform is timed on the first loop_limit pairs of every batch
+    """
+    graph = Graph()
+    rng = random.Random(0)
+    nodes = graph.nodes
+    pool = [rng.choice(nodes) for _ in range(sources)]
+
+    for size in sizes:
+        pairs = [(rng.choice(pool), rng.choice(nodes)) for _ in range(size)]
+        start = time.perf_counter()
+        results = batch_search(graph, pairs)
+        batch_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [Uniform(graph, begin, end) for begin, end in pairs[:loop_limit]]
+        loop_time = (time.perf_counter() - start) / len(expected) * size
+        for res, uniform in zip(results, expected):
+            assert abs(res.cost - uniform.cost) < 1e-9
+
+        print(f'{size:>6} pairs  batch_search: {size / batch_time:9.1f} queries/s, '
+              f'looping Uniform: {size / loop_time:9.1f} queries/s, speedup: {loop_time / batch_time:6.1f}x')
+
+    start = time.perf_counter()
+    matrix = distance_matrix(graph, pool[:10], nodes[:1000])
+    print(f'distance_matrix {matrix.shape}: {(time.perf_counter() - start) * 1000:.1f} ms')
@@ -0,0 +1,26 @@
+from algorithms import Uniform, AStar, BiUniform, BiAStar
+from utils import Graph
+from .common import random_points
+
+
+def bidirectional_benchmark():
+    """
+    check that the bidirectional searches find the same costs as Uniform,
+    and compare the settled nodes and latency on the graph_search_test workload
+    """
+    graph = Graph()
+    points = random_points(graph)
+    results = {func.__name__: [func(graph, start, end) for start, end in points]
+               for func in [Uniform, AStar, BiUniform, BiAStar]}
+
+    for res_lst in results.values():
+        for expected, res in zip(results['uniformCostSearch'], res_lst):
+            assert (res.cost is None) == (expected.cost is None)
+            assert res.cost is None or abs(res.cost - expected.cost) < 1e-9
+            assert res.path is None or graph.distance(res.path) - res.cost < 1e-9
+    print(f'all {len(points)} costs match uniformCostSearch')
+
+    for name, res_lst in results.items():
+        settled = sum(res.settled_nodes or 0 for res in res_lst) / len(res_lst)
+        latency = sum(res.time for res in res_lst) / len(res_lst)
+        print(f'{name:<20} settled nodes: {settled:9.1f}, latency: {latency * 1000:8.2f} ms')
@@ -0,0 +1,39 @@
+import random
+import time
+
+from algorithms import AStar, QueryCache
+from utils import Graph
+
+
+def cache_benchmark(queries=2000, workloads=((300, 20), (2000, 500))):
+    """
+    AStar with and without QueryCache on skewed streams of repeated popular pairs,
+    half of the repeats ask the pair in the reverse direction,
+    a workload is (number of pairs, number of sources the pairs begin from),
+    few sources repeat a lot and pay for their trees, many sources repeat a few times and do not
+    """
+    graph = Graph()
+    for pairs, sources in workloads:
+        rng = random.Random(0)
+        nodes = graph.nodes
+        pool = [rng.choice(nodes) for _ in range(sources)]
+        popular = [(rng.choice(pool), rng.choice(nodes)) for _ in range(pairs)]
+        weights = [1 / (rank + 1) for rank in range(pairs)]  # zipf popularity
+        stream = [pair if rng.random() < 0.5 else pair[::-1]
+                  for pair in rng.choices(popular, weights=weights, k=queries)]
+        print(f'{pairs} pairs from {sources} sources:')
+
+        start = time.perf_counter()
+        expected = [AStar(graph, begin, end) for begin, end in stream]
+        print(f'{"no cache":<36} {time.perf_counter() - start:6.2f} s')
+
+        for name, cache in [('QueryCache', QueryCache()),
+                            ('QueryCache(trees=20)', QueryCache(trees=20)),
+                            ('QueryCache(trees=20, popularity=2)', QueryCache(trees=20, popularity=2)),
+                            ('QueryCache(5000 nodes)', QueryCache(capacity=5000))]:
+            start = time.perf_counter()
+            results = [cache.search(AStar, graph, begin, end) for begin, end in stream]
+            elapsed = time.perf_counter() - start
+            for res, astar in zip(results, expected):
+                assert abs(res.cost - astar.cost) < 1e-9
+            print(f'{name:<36} {elapsed:6.2f} s, {cache.stats}')
@@ -0,0 +1,40 @@
+import random
+
+from algorithms import BFS
+from utils import Graph
+
+# long cross-state routes of the California road network
+LONG_ROUTES = [(0, 1894), (5, 20000), (100, 15000), (7000, 3000), (12, 21000)]
+
+
+def random_points(graph: Graph, samples=100, seed=0):
+    """
+    the random (start, end) pairs of graph_search_test in main.py, but seeded
+    """
+    rng = random.Random(seed)
+    nodes = graph.nodes
+    return [(rng.choice(nodes), rng.choice(nodes)) for _ in range(samples)]
+
+
+def nearby_points(graph: Graph, samples=5, hops=60, seed=0):
+    """
+    (start, end) pairs at most hops edges apart: the end is the node hops edges
+    along the BFS path between two random nodes, the tree-like searches can not finish long routes
+    """
+    points = []
+    for start, end in random_points(graph, samples, seed):
+        path = BFS(graph, start, end).path
+        points.append((start, path[min(hops, len(path) - 1)]))
+    return points
+
+
+def resident_memory(field='VmRSS'):
+    """
+    the resident set size of this process in bytes, from /proc on Linux,
+    field='VmHWM' for the peak resident set size
+    """
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(f'{field}:'):
+                return int(line.split()[1]) * 1024
+    return 0
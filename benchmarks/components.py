@@ -0,0 +1,40 @@
+import time
+
+import numpy as np
+
+from algorithms import DFS, BFS, Uniform
+from utils import Graph
+from .common import random_points
+
+
+def components_benchmark(samples=100, repeat=100):
+    """
+    the component labels on a random query mix: the cost of the O(1) check of every query,
+    and the time of the unreachable queries without it, a search that exhausts the component of the start
+    """
+    graph = Graph()
+    points = random_points(graph, samples)
+    sizes = np.bincount(graph.components)
+    unreachable = sum(not graph.connected(start, end) for start, end in points)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for begin, end in points:
+            graph.connected(begin, end)
+    check = (time.perf_counter() - start) / (repeat * samples)
+    print(f'components: {len(sizes)}, largest: {sizes.max()} nodes, '
+          f'unreachable pairs of the mix: {unreachable}/{samples}, check: {check * 1e9:.0f} ns/query')
+
+    # without a heuristic, the search of an end that is never found costs the same as an end in another component
+    for func in [DFS, BFS, Uniform]:
+        search = func.__wrapped__.__wrapped__  # the search without the @timer and @reachable wrappers
+        start = time.perf_counter()
+        for begin, end in points:
+            search(graph, begin, end)
+        unchecked = time.perf_counter() - start
+        checked = sum(func(graph, begin, end).time for begin, end in points)
+        start = time.perf_counter()
+        for begin, _ in points:
+            search(graph, begin, None)
+        exhausted = (time.perf_counter() - start) / samples
+        print(f'{func.__name__:<20} mix checked: {checked:6.3f} s, unchecked: {unchecked:6.3f} s, '
+              f'unreachable query unchecked: {exhausted * 1000:7.2f} ms, checked: {check * 1000:7.5f} ms')
@@ -0,0 +1,29 @@
+import time
+
+from algorithms import DFS, BFS, Uniform, Greedy, AStar, BiAStar, CH, threaded_search
+from utils import Graph
+from .common import random_points
+
+
+def concurrency_stress(threads=16, rounds=3):
+    """
+    run many concurrent queries against one shared Graph on a thread pool,
+    and check every result against the serial runs
+    """
+    graph = Graph()
+    algorithms = [DFS, BFS, Uniform, Greedy, AStar, BiAStar, CH]
+    points = random_points(graph, samples=50)
+    AStar(graph, 0, 1894, heuristic='alt')  # load the landmarks before the serial runs
+
+    expected = [func(graph, start, end) for func in algorithms for start, end in points]
+    expected_alt = [AStar(graph, start, end, heuristic='alt') for start, end in points]
+    for _ in range(rounds):
+        start = time.perf_counter()
+        results = threaded_search(graph, algorithms, points, workers=threads)
+        results_alt = threaded_search(graph, [AStar], points, workers=threads, heuristic='alt')
+        elapsed = time.perf_counter() - start
+        for res, serial in zip(results + results_alt, expected + expected_alt):
+            assert (res.algorithms, res.start, res.end, res.path, res.cost) == \
+                   (serial.algorithms, serial.start, serial.end, serial.path, serial.cost)
+        print(f'{len(results) + len(results_alt)} queries on {threads} threads: {elapsed:.2f} s, '
+              f'all results match the serial runs')
@@ -0,0 +1,35 @@
+import time
+
+from algorithms import AStar, CH
+from algorithms.contraction import ContractionHierarchy
+from utils import Graph
+from .common import random_points
+
+
+def contraction_benchmark():
+    """
+    preprocessing time and index size of the contraction hierarchy,
+    and its query speedup over AStar on the graph_search_test workload
+    """
+    graph = Graph()
+    start = time.perf_counter()
+    hierarchy = ContractionHierarchy.build(graph)
+    preprocessing = time.perf_counter() - start
+    print(f'preprocessing: {preprocessing:.2f} s, index size: {hierarchy.nbytes / 1024:.1f} KiB, '
+          f'shortcuts: {len(hierarchy.arrays["indices"]) - len(graph.csr[1]) // 2}')
+
+    CH(graph, 0, 1894)  # load the hierarchy before timing the queries
+    points = random_points(graph)
+    results = {func.__name__: [func(graph, start, end) for start, end in points] for func in [AStar, CH]}
+    for expected, res in zip(*results.values()):
+        assert (res.cost is None) == (expected.cost is None)
+        assert res.cost is None or abs(res.cost - expected.cost) < 1e-9
+        assert res.path is None or abs(graph.distance(res.path) - res.cost) < 1e-9
+    print(f'all {len(points)} costs match aStarSearch')
+
+    latencies = {}
+    for name, res_lst in results.items():
+        settled = sum(res.settled_nodes or 0 for res in res_lst) / len(res_lst)
+        latencies[name] = sum(res.time for res in res_lst) / len(res_lst)
+        print(f'{name:<28} settled nodes: {settled:9.1f}, latency: {latencies[name] * 1000:8.2f} ms')
+    print(f'speedup over aStarSearch: {latencies["aStarSearch"] / latencies["contractionHierarchySearch"]:.1f}x')
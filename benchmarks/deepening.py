@@ -0,0 +1,23 @@
+import time
+
+from algorithms import AStar, IDS, IDAStar
+from utils import Graph
+from .common import nearby_points
+
+
+def deepening_benchmark(hops=60):
+    """
+    IDS and IDA* against AStar on the tree_like_search_test workload(5 samples),
+    restricted to nearby pairs
+    """
+    graph = Graph()
+    points = nearby_points(graph, hops=hops)
+    results = {}
+    for func in [IDS, IDAStar, AStar]:
+        start = time.perf_counter()
+        results[func] = [func(graph, begin, end) for begin, end in points]
+        elapsed = time.perf_counter() - start
+        memo = sum(res.expanded_nodes for res in results[func]) / len(points)
+        print(f'{func.__name__:<32} time: {elapsed:8.3f} s, memo cost: {memo:7.1f} nodes')
+    for res, astar in zip(results[IDAStar], results[AStar]):
+        assert abs(res.cost - astar.cost) < 1e-9
@@ -0,0 +1,29 @@
+import random
+import time
+
+from utils import DistinctHeap, IndexedHeap, LazyHeap
+
+
+def heap_benchmark(nodes=20000, pushes=100000, repeat=3):
+    """
+    push random (node, cost, heuristic_value) entries, so that most of the nodes
+    are pushed several times(decrease-key), interleaved with pops, into every heap
+    """
+    random.seed(0)
+    items = [(random.randrange(nodes), random.random(), 0, None) for _ in range(pushes)]
+    heaps = {'DistinctHeap': lambda: DistinctHeap(key=lambda item: item[0], cmp=lambda item: item[1]),
+             'IndexedHeap': lambda: IndexedHeap(capacity=nodes),
+             'LazyHeap': lambda: LazyHeap()}
+    for name, make_heap in heaps.items():
+        best = float('inf')
+        for _ in range(repeat):
+            heap = make_heap()
+            start = time.perf_counter()
+            for i, item in enumerate(items):
+                heap.append(item)
+                if i % 4 == 3:
+                    heap.pop()
+            while heap:
+                heap.pop()
+            best = min(best, time.perf_counter() - start)
+        print(f'{name:<20} time: {best * 1000:8.2f} ms')
@@ -0,0 +1,109 @@
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from algorithms import AStar
+from utils import Graph
+from utils.ingest import read_graph
+from .common import resident_memory
+
+
+def synthetic_graph(directory, edges, dimacs=False, chunk=1_000_000, seed=0):
+    """
+    write a road-like graph of about the given number of edges: a jittered square grid,
+    every node linked to its right and its lower neighbour, as csv files or DIMACS .co and .gr files
+
+    :return: (nodes file, edges file)
+    """
+    side = math.ceil(math.sqrt(edges / 2))
+    n = side * side
+    rng = np.random.default_rng(seed)
+    offset = 1 if dimacs else 0  # the DIMACS ids begin from 1
+    nodes_file = os.path.join(directory, 'synthetic.co' if dimacs else 'synthetic_nodes.csv')
+    edges_file = os.path.join(directory, 'synthetic.gr' if dimacs else 'synthetic_edges.csv')
+    with open(nodes_file, 'w') as f:
+        f.write(f'p aux sp co {n}\n' if dimacs else 'NodeID,Longitude,Latitude\n')
+        for begin in range(0, n, chunk):
+            ids = np.arange(begin, min(begin + chunk, n))
+            x = -120 + (ids % side + rng.uniform(-0.3, 0.3, len(ids))) * 1e-3
+            y = 35 + (ids // side + rng.uniform(-0.3, 0.3, len(ids))) * 1e-3
+            if dimacs:
+                frame = pd.DataFrame({'kind': 'v', 'id': ids + offset,
+                                      'x': np.round(x * 1e6).astype(np.int64),
+                                      'y': np.round(y * 1e6).astype(np.int64)})
+            else:
+                frame = pd.DataFrame({'id': ids, 'x': x, 'y': y})
+            frame.to_csv(f, header=False, index=False, sep=' ' if dimacs else ',', float_format='%.6f')
+
+    with open(edges_file, 'w') as f:
+        f.write(f'p sp {n} {4 * n}\n' if dimacs else 'EdgeID,StartNodeID,EndNodeID\n')
+        written = 0
+        for begin in range(0, n, chunk):
+            ids = np.arange(begin, min(begin + chunk, n))
+            right, down = ids[ids % side < side - 1], ids[ids < n - side]
+            starts = np.concatenate([right, down])
+            ends = np.concatenate([right + 1, down + side])
+            if dimacs:  # every road as two arcs
+                starts, ends = np.column_stack([starts, ends]).ravel(), np.column_stack([ends, starts]).ravel()
+                frame = pd.DataFrame({'kind': 'a', 'u': starts + offset, 'v': ends + offset, 'w': 1})
+            else:
+                frame = pd.DataFrame({'id': np.arange(written, written + len(starts)), 'u': starts, 'v': ends})
+            frame.to_csv(f, header=False, index=False, sep=' ' if dimacs else ',')
+            written += len(starts)
+    return nodes_file, edges_file
+
+
+def measure_ingest(nodes_file, edges_file):
+    """
+    read_graph in a fresh process: (seconds, resident memory before, peak resident memory, bytes of the arrays)
+    """
+    before = resident_memory()
+    start = time.perf_counter()
+    arrays = read_graph(nodes_file, edges_file)
+    elapsed = time.perf_counter() - start
+    return elapsed, before, resident_memory('VmHWM'), sum(array.nbytes for array in arrays.values())
+
+
+def measure_graph(nodes_file, edges_file):
+    """
+    the whole Graph load in a fresh process, read_graph and the structures of the Graph, then an A* search:
+    (seconds of the load, resident memory before, peak resident memory of the load, seconds of the search)
+    """
+    before = resident_memory()
+    start = time.perf_counter()
+    graph = Graph(cache=False, nodes_file=nodes_file, edges_file=edges_file)
+    elapsed = time.perf_counter() - start
+    peak = resident_memory('VmHWM')
+    start = time.perf_counter()
+    AStar(graph, graph.nodes[0], graph.nodes[-1])
+    return elapsed, before, peak, time.perf_counter() - start
+
+
+def ingest_benchmark(sizes=(1_000_000, 10_000_000, 50_000_000), formats=('csv', 'dimacs')):
+    """
+    read_graph on synthetic graphs of the given numbers of edges: throughput and peak resident memory,
+    against the size of the arrays it builds, then the whole Graph load and a search on it,
+    every read runs in a fresh process
+    """
+    context = multiprocessing.get_context('spawn')
+    for size in sizes:
+        for fmt in formats:
+            with tempfile.TemporaryDirectory() as directory:
+                nodes_file, edges_file = synthetic_graph(directory, size, dimacs=fmt == 'dimacs')
+                mib = (os.path.getsize(nodes_file) + os.path.getsize(edges_file)) / 2 ** 20
+                with context.Pool(1) as pool:
+                    elapsed, before, peak, nbytes = pool.apply(measure_ingest, (nodes_file, edges_file))
+                with context.Pool(1) as pool:
+                    load, graph_before, graph_peak, search = pool.apply(measure_graph, (nodes_file, edges_file))
+            edges = size  # about, the grid rounds it up to a square
+            print(f'{size:>11,} edges {fmt:<6} files: {mib:8.1f} MiB, time: {elapsed:7.2f} s, '
+                  f'{edges / elapsed:11,.0f} edges/s, arrays: {nbytes / 2 ** 20:8.1f} MiB, '
+                  f'peak RSS: {peak / 2 ** 20:8.1f} MiB({before / 2 ** 20:.1f} MiB before reading)')
+            print(f'{"":>11}       {fmt:<6} Graph load: {load:7.2f} s, '
+                  f'peak RSS: {graph_peak / 2 ** 20:8.1f} MiB({graph_before / 2 ** 20:.1f} MiB before loading), '
+                  f'corner to corner A*: {search:7.2f} s')
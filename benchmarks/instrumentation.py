@@ -0,0 +1,23 @@
+from algorithms import Uniform, AStar
+from utils import Graph, SearchStats
+from .common import random_points
+
+
+def instrumentation_benchmark(samples=100, repeat=3):
+    """
+    the overhead of the SearchStats hooks, a search without stats must run as fast as before,
+    and the breakdown of the instrumented searches
+    """
+    graph = Graph()
+    points = random_points(graph, samples)
+    for func in [Uniform, AStar]:
+        timings = {}
+        for name, make_stats in [('disabled', lambda: None), ('enabled', SearchStats)]:
+            timings[name] = min(sum(func(graph, start, end, stats=make_stats()).time for start, end in points)
+                                for _ in range(repeat))
+        stats = SearchStats()
+        for start, end in points:
+            func(graph, start, end, stats=stats)
+        print(f'{func.__name__:<20} disabled: {timings["disabled"]:6.3f} s, enabled: {timings["enabled"]:6.3f} s '
+              f'(+{timings["enabled"] / timings["disabled"] - 1:.0%})')
+        print(f'{"":<20} {stats.data}')
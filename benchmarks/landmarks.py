@@ -0,0 +1,30 @@
+import time
+
+from algorithms import AStar
+from algorithms.landmarks import Landmarks
+from utils import Graph
+from .common import random_points
+
+
+def landmarks_benchmark(k=16):
+    """
+    settled nodes and latency of AStar with the euclidean and the ALT heuristic
+    """
+    graph = Graph()
+    start = time.perf_counter()
+    provider = Landmarks.build(graph, k)
+    print(f'{k} landmarks, preprocessing: {time.perf_counter() - start:.2f} s, '
+          f'table size: {provider.nbytes / 1024:.1f} KiB')
+
+    AStar(graph, 0, 1894, heuristic='alt')  # load the landmarks before timing the queries
+    points = random_points(graph)
+    results = {heuristic: [AStar(graph, start, end, heuristic=heuristic) for start, end in points]
+               for heuristic in ['euclidean', 'alt']}
+    for expected, res in zip(*results.values()):
+        assert res.cost is None or abs(res.cost - expected.cost) < 1e-9
+    print(f'all {len(points)} costs match')
+
+    for heuristic, res_lst in results.items():
+        settled = sum(res.settled_nodes or 0 for res in res_lst) / len(res_lst)
+        latency = sum(res.time for res in res_lst) / len(res_lst)
+        print(f'aStarSearch({heuristic:<9}) settled nodes: {settled:9.1f}, latency: {latency * 1000:8.2f} ms')
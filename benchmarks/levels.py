@@ -0,0 +1,34 @@
+import time
+
+from algorithms import BFS, LevelBFS, hop_distances
+from utils import Graph
+from .common import random_points
+
+
+def levels_benchmark(samples=100, sources=10):
+    """
+    LevelBFS against BFS on the random pairs, most of them are hundreds of hops apart,
+    and hop_distances against a BFS that reaches every node
+    """
+    graph = Graph()
+    points = random_points(graph, samples)
+    results = {}
+    for func in [BFS, LevelBFS]:
+        start = time.perf_counter()
+        results[func] = [func(graph, begin, end) for begin, end in points]
+        elapsed = time.perf_counter() - start
+        hops = sum(len(res.path) - 1 for res in results[func]) / samples
+        print(f'{func.__name__:<24} time: {elapsed:6.3f} s, average hops: {hops:6.1f}')
+    for res, bfs in zip(results[LevelBFS], results[BFS]):
+        assert len(res.path) == len(bfs.path)
+
+    search = BFS.__wrapped__.__wrapped__  # the search without the @timer and @reachable wrappers
+    start = time.perf_counter()
+    for begin, _ in points[:sources]:
+        search(graph, begin, None)  # an end that is never found, BFS reaches every node
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    levels = [hop_distances(graph, begin).max() for begin, _ in points[:sources]]
+    print(f'{"all nodes":<24} BFS: {elapsed / sources * 1000:6.2f} ms/source, '
+          f'hop_distances: {(time.perf_counter() - start) / sources * 1000:6.2f} ms/source, '
+          f'average layers: {sum(levels) / sources:6.1f}')
@@ -0,0 +1,36 @@
+import sys
+import tracemalloc
+
+from algorithms import BFS, Uniform, AStar
+from utils import Graph
+from .common import random_points, resident_memory
+
+
+def memory_benchmark(samples=100):
+    """
+    resident memory of a loaded graph(warm cache), the size of its arrays,
+    and the tracemalloc peak and the net allocated blocks of a query, after the workspace of the thread exists
+    """
+    Graph()  # make sure the cache exists
+    before = resident_memory()
+    graph = Graph()
+    loaded = resident_memory()
+    indptr, indices, weights = graph.csr
+    print(f'graph resident memory: {(loaded - before) / 2 ** 20:6.2f} MiB, '
+          f'csr arrays: {(indptr.nbytes + indices.nbytes + weights.nbytes) / 2 ** 20:5.2f} MiB '
+          f'(indices {indices.dtype}), dense ids: {graph.dense}')
+
+    points = random_points(graph, samples)
+    for func in [BFS, Uniform, AStar]:
+        func(graph, *points[0])  # allocate the workspace
+        peaks, blocks = [], []
+        for start, end in points:
+            tracemalloc.start()
+            allocated = sys.getallocatedblocks()
+            res = func(graph, start, end)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            del res
+            blocks.append(sys.getallocatedblocks() - allocated)
+            tracemalloc.stop()
+        print(f'{func.__name__:<20} mean peak: {sum(peaks) / len(peaks) / 1024:8.1f} KiB, '
+              f'max peak: {max(peaks) / 1024:8.1f} KiB, mean net blocks: {sum(blocks) / len(blocks):6.1f}')
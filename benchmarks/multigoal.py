@@ -0,0 +1,33 @@
+import random
+import time
+
+from algorithms import Uniform, AStar, NearestGoal, KNearestGoals
+from utils import Graph
+
+
+def multigoal_benchmark(samples=10, sizes=(4, 16, 64), k=3):
+    """
+    the nearest(and the k nearest) of a set of random goals: a single search of the set,
+    against a search for every goal
+    """
+    graph = Graph()
+    rng = random.Random(0)
+    for size in sizes:
+        queries = [(rng.choice(graph.nodes), rng.sample(graph.nodes, size)) for _ in range(samples)]
+        timings = {}
+        for name, func in [('loop Uniform', Uniform), ('loop AStar', AStar)]:
+            start = time.perf_counter()
+            expected = [min(func(graph, begin, goal).cost for goal in goals) for begin, goals in queries]
+            timings[name] = time.perf_counter() - start
+        for name, heuristic in [('NearestGoal', None), ('NearestGoal(A*)', 'euclidean')]:
+            start = time.perf_counter()
+            results = [NearestGoal(graph, begin, goals, heuristic=heuristic) for begin, goals in queries]
+            timings[name] = time.perf_counter() - start
+            for res, cost in zip(results, expected):
+                assert abs(res.cost - cost) < 1e-9
+        start = time.perf_counter()
+        for begin, goals in queries:
+            KNearestGoals(graph, begin, goals, k)
+        timings[f'KNearestGoals(k={k})'] = time.perf_counter() - start
+        print(f'{size:>4} goals: ' + ', '.join(f'{name}: {elapsed / samples * 1000:8.2f} ms'
+                                              for name, elapsed in timings.items()))
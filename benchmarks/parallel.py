@@ -0,0 +1,28 @@
+import os
+import time
+
+from algorithms import DFS, BFS, Uniform, Greedy, AStar, parallel_search
+from utils import Graph
+from .common import random_points
+
+
+def parallel_benchmark(max_workers=None):
+    """
+    scaling of parallel_search from 1 to N worker processes against the serial loop of graph_search_test
+    """
+    graph = Graph()
+    algorithms = [DFS, BFS, Uniform, Greedy, AStar]
+    points = random_points(graph)
+
+    start = time.perf_counter()
+    expected = [func(graph, begin, end) for func in algorithms for begin, end in points]
+    serial = time.perf_counter() - start
+    print(f'serial loop: {serial:.2f} s')
+
+    max_workers = max_workers or os.cpu_count()
+    for workers in sorted({1, 2, 4, max_workers}):
+        start = time.perf_counter()
+        results = parallel_search(algorithms, points, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert [res.path for res in results] == [res.path for res in expected]
+        print(f'{workers:>3} workers: {elapsed:.2f} s, speedup: {serial / elapsed:.2f}x')
@@ -0,0 +1,66 @@
+import random
+import time
+
+from algorithms import AStar, DStarLite
+from utils import Graph
+from .common import random_points
+
+
+def random_updates(graph: Graph, path, count, rng):
+    """
+    apply count random edge updates, closures and slowdowns of the edges of the path,
+    or if path is None, slowdowns, closures and new roads anywhere in the graph
+    """
+    for _ in range(count):
+        if path is not None:
+            i = rng.randrange(len(path) - 1)
+            node1, node2 = path[i], path[i + 1]
+        elif rng.random() < 0.1:
+            node1, node2 = rng.choice(graph.nodes), rng.choice(graph.nodes)
+            if node1 != node2 and graph.edge_cost(node1, node2) is None:
+                graph.add_edge(node1, node2)
+            continue
+        else:
+            node1 = rng.choice(graph.nodes)
+            node2 = rng.choice(graph.successors(node1) or [None])
+        if graph.edge_cost(node1, node2) is None:  # already closed
+            continue
+        if rng.random() < 0.3:
+            graph.remove_edge(node1, node2)
+        else:
+            graph.set_cost(node1, node2, graph.edge_cost(node1, node2) * rng.uniform(1.5, 4))
+
+
+def replanning_benchmark(routes=10, rounds=5, batches=(1, 10, 100)):
+    """
+    DStarLite against AStar from scratch after every batch of random edge updates,
+    of updates anywhere in the graph, and of updates on the current route
+    """
+    for on_route in (False, True):
+        for batch in batches:
+            graph = Graph()  # a fresh graph for every run
+            rng = random.Random(0)
+            replanned = recomputed = updating = 0.0
+            expansions = settled = plans = 0
+            for start, end in random_points(graph, routes):
+                planner = DStarLite(graph, start, end)
+                res = planner.plan()
+                for _ in range(rounds):
+                    if res.path is None or len(res.path) < 2:
+                        break
+                    begin = time.perf_counter()
+                    random_updates(graph, res.path if on_route else None, batch, rng)
+                    graph.connected(start, end)  # relabel the components out of the timings, if edges were removed
+                    updating += time.perf_counter() - begin
+                    res = planner.plan()
+                    astar = AStar(graph, start, end)
+                    assert res.cost == astar.cost or abs(res.cost - astar.cost) < 1e-9
+                    replanned += res.time
+                    recomputed += astar.time
+                    expansions += res.settled_nodes
+                    settled += astar.settled_nodes
+                    plans += 1
+            print(f'{"on route" if on_route else "anywhere":<8} {batch:>4} updates/batch: '
+                  f'DStarLite replan: {replanned / plans * 1000:7.2f} ms({expansions / plans:7.1f} expansions), '
+                  f'AStar: {recomputed / plans * 1000:7.2f} ms({settled / plans:7.1f} settled), '
+                  f'graph update: {updating / plans / batch * 1000:6.3f} ms/edge')
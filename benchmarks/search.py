@@ -0,0 +1,26 @@
+import time
+import tracemalloc
+
+from algorithms import DFS, BFS, Uniform, Greedy, AStar
+from utils import Graph
+from .common import LONG_ROUTES
+
+
+def search_benchmark(routes=LONG_ROUTES):
+    """
+    wall time and tracemalloc peak memory of the graph search algorithms on long routes
+    """
+    graph = Graph()
+    for func in [DFS, BFS, Uniform, Greedy, AStar]:
+        start = time.perf_counter()
+        for begin, end in routes:
+            func(graph, begin, end)
+        elapsed = time.perf_counter() - start
+
+        peak = 0
+        for begin, end in routes:
+            tracemalloc.start()
+            func(graph, begin, end)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        print(f'{func.__name__:<20} time: {elapsed * 1000:8.2f} ms, peak memory: {peak / 1024:8.1f} KiB')
@@ -0,0 +1,39 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def server_benchmark(duration=10.0, connections=16, sources=8, deadline=0.5):
+    """
+    a QueryServer in another process under the load generator: the sustained throughput and the latency
+    of a closed loop with random starts, and with starts shared by the concurrent queries(coalesced),
+    then an open loop at twice the sustained throughput with deadlines, where the server must shed the load
+    """
+    import server  # only this benchmark needs the server, the others run without its dependencies
+    with tempfile.TemporaryDirectory() as directory:
+        unix = os.path.join(directory, 'server.sock')
+        process = subprocess.Popen([sys.executable, server.__file__, 'serve', '--unix', unix],
+                                   stderr=subprocess.DEVNULL)
+        try:
+            while not os.path.exists(unix) and process.poll() is None:  # the graph is loading
+                time.sleep(0.1)
+            capacity = None
+            scenarios = [('closed loop', {}), (f'{sources} shared starts', {'sources': sources})]
+            for name, kwargs in scenarios:
+                report = asyncio.run(server.load(unix, connections=connections, duration=duration, **kwargs))
+                print(f'{name:<22} qps: {report["qps"]:7.1f}, p50: {report["p50(ms)"]:8.2f} ms, '
+                      f'p99: {report["p99(ms)"]:8.2f} ms, mean batched: {report["mean batched"]:5.2f}')
+                capacity = capacity or report['qps']  # of the random starts
+
+            rate = 2 * capacity
+            report = asyncio.run(server.load(unix, connections=connections, rate=rate, duration=duration,
+                                             deadline=deadline))
+            print(f'open loop {rate:6.1f} q/s    qps: {report["qps"]:7.1f}, p50: {report["p50(ms)"]:8.2f} ms, '
+                  f'p99: {report["p99(ms)"]:8.2f} ms, overloaded: {report.get("overloaded", 0)}, '
+                  f'deadline exceeded: {report.get("deadline exceeded", 0)} of {report["sent"]}')
+        finally:
+            process.terminate()
+            process.wait()
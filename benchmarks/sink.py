@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from algorithms import AStar
+from utils import Graph, JsonlWriter, ColumnarWriter, read_results, read_paths
+from .common import random_points
+
+
+def sink_rows(results, rows):
+    """
+    rows result dicts cycled from the results, every row with its own copy of the path list, like a new query
+    """
+    for i in range(rows):
+        data = results[i % len(results)].data
+        data['path'] = list(data['path'])
+        yield data
+
+
+def write_csv(directory, rows):
+    df = pd.DataFrame(list(rows))
+    df.to_csv(os.path.join(directory, 'results.csv'))
+
+
+def write_sink(writer):
+    def write(directory, rows):
+        with writer(directory) as sink:
+            sink.write_all(rows)
+
+    return write
+
+
+def sink_benchmark(rows=100_000, samples=200):
+    """
+    the results of rows queries written by a DataFrame to csv, against the streaming JsonlWriter and ColumnarWriter:
+    the size of the files, the write throughput, the tracemalloc peak of the write,
+    and the time to read the summary columns and the paths back
+    """
+    graph = Graph()
+    results = [AStar(graph, start, end) for start, end in random_points(graph, samples)]
+    readers = {'csv': lambda directory: pd.read_csv(os.path.join(directory, 'results.csv'), index_col=0),
+               'jsonl': read_results, 'columnar': read_results}
+    writers = [('csv', write_csv), ('jsonl', write_sink(JsonlWriter)), ('columnar', write_sink(ColumnarWriter))]
+    for name, write in writers:
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            write(directory, sink_rows(results, rows))
+            elapsed = time.perf_counter() - start
+            size = sum(entry.stat().st_size for entry in os.scandir(directory))
+
+            start = time.perf_counter()
+            df = readers[name](directory)
+            read_time = time.perf_counter() - start
+            assert len(df) == rows
+            paths = ''
+            if name != 'csv':
+                start = time.perf_counter()
+                assert read_paths(directory)[rows - 1] == results[(rows - 1) % len(results)].path
+                paths = f', paths read: {time.perf_counter() - start:6.2f} s'
+
+        with tempfile.TemporaryDirectory() as directory:
+            tracemalloc.start()
+            write(directory, sink_rows(results, rows))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print(f'{name:<8} size: {size / 2 ** 20:7.1f} MiB, write: {rows / elapsed:9,.0f} rows/s, '
+              f'peak: {peak / 2 ** 20:7.1f} MiB, summary read: {read_time:6.2f} s' + paths)
@@ -0,0 +1,45 @@
+import math
+import time
+
+import numpy as np
+
+from utils import Graph
+
+
+def spatial_benchmark(points=10000, singles=1000, seed=0):
+    """
+    snapping throughput of Graph.snap(vectorised grid) and Graph.nearest(k-d tree) against brute force,
+    on positions near the roads(jittered node positions) and on uniform positions over the bounding box
+    """
+    graph = Graph()
+    positions = np.array([graph.position(node) for node in graph.nodes])
+    rng = np.random.default_rng(seed)
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    near = positions[rng.integers(len(positions), size=points)] + rng.normal(0, 0.01, (points, 2))
+    workloads = {'near roads': near, 'uniform': rng.uniform(low, high, (points, 2))}
+    nodes = graph.nodes
+    longitude, latitude = positions[:, 0].copy(), positions[:, 1].copy()
+    for name, queries in workloads.items():
+        start = time.perf_counter()
+        snapped, distances = graph.snap(queries[:, 0], queries[:, 1])
+        snap_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        brute = [np.sqrt((longitude - x) ** 2 + (latitude - y) ** 2).min() for x, y in queries.tolist()]
+        brute_time = time.perf_counter() - start
+        assert np.allclose(distances, brute)
+
+        start = time.perf_counter()
+        nearest = [graph.nearest(x, y) for x, y in queries[:singles].tolist()]
+        nearest_time = time.perf_counter() - start
+        assert nearest == snapped[:singles].tolist()
+
+        # the linear scan over all the nodes that callers did before
+        start = time.perf_counter()
+        for x, y in queries[:singles // 10].tolist():
+            min(nodes, key=lambda node: math.dist(graph.position(node), (x, y)))
+        scan_time = (time.perf_counter() - start) * 10
+
+        print(f'{name:<12} snap: {points / snap_time:9.0f} points/s, '
+              f'numpy brute force: {points / brute_time:7.0f} points/s, '
+              f'nearest: {singles / nearest_time:8.0f} points/s, python scan: {singles / scan_time:6.0f} points/s')
@@ -0,0 +1,28 @@
+import shutil
+import time
+
+from algorithms import AStar
+from utils import Graph
+
+
+def startup_benchmark(repeat=5):
+    """
+    compare the Graph startup of parsing the csv files(cold) with memory-mapping
+    the compiled cache(warm), and the latency of the first query after each of them
+    """
+    shutil.rmtree(Graph(cache=False).cache_dir, ignore_errors=True)
+
+    def measure(cache):
+        start = time.perf_counter()
+        graph = Graph(cache=cache)
+        loaded = time.perf_counter()
+        AStar(graph, 0, 1894)
+        return loaded - start, time.perf_counter() - loaded
+
+    timings = {'cold csv load': [measure(cache=False) for _ in range(repeat)],
+               'first cache write': [measure(cache=True)],
+               'warm cache load': [measure(cache=True) for _ in range(repeat)]}
+    for name, samples in timings.items():
+        load = min(load for load, _ in samples)
+        query = min(query for _, query in samples)
+        print(f'{name:<20} load: {load * 1000:8.2f} ms, first query: {query * 1000:8.2f} ms')
@@ -0,0 +1,32 @@
+from algorithms import AStar, WAStar, Focal, AnytimeAStar
+from utils import Graph
+from .common import random_points
+
+
+def suboptimal_benchmark(samples=100, epsilons=(0, 0.1, 0.25, 0.5, 1, 2), deadlines=(0.001, 0.005, 0.02)):
+    """
+    the latency versus path cost tradeoff of the bounded-suboptimal searches,
+    the cost is relative to the optimal cost of AStar, and the bound is the mean reported suboptimality
+    """
+    graph = Graph()
+    points = [(start, end) for start, end in random_points(graph, samples) if start != end]
+    optimal = [AStar(graph, start, end) for start, end in points]
+
+    def report(name, results):
+        found = [(res, best) for res, best in zip(results, optimal) if res.path is not None and best.cost]
+        ratios = [res.cost / best.cost for res, best in found]
+        bounds = [res.suboptimality for res, _ in found if res.suboptimality is not None]
+        latency = sum(res.time for res in results) / len(results) * 1000
+        print(f'{name:<28} latency: {latency:8.3f} ms, cost/optimal mean: {sum(ratios) / len(ratios):6.4f}, '
+              f'max: {max(ratios):6.4f}, mean bound: {sum(bounds) / len(bounds) if bounds else 1:6.4f}, '
+              f'found: {len(found)}/{len(results)}')
+
+    report('AStar', optimal)
+    for epsilon in epsilons:
+        for func in [WAStar, Focal]:
+            report(f'{func.__name__}(e={epsilon})',
+                   [func(graph, start, end, epsilon=epsilon) for start, end in points])
+    for deadline in deadlines:
+        report(f'anytime(deadline={deadline * 1000:g} ms)',
+               [AnytimeAStar(graph, start, end, deadline=deadline) for start, end in points])
+    report('anytime(no budget)', [AnytimeAStar(graph, start, end) for start, end in points])
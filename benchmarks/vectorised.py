@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+
+from algorithms import Uniform, AStar
+from utils import Graph
+from .common import random_points
+
+
+def vectorised_benchmark(samples=100, repeat=2000, blocks=(32, 128, 512, 2048)):
+    """
+    the vectorised expansion against the scalar one: the time per expansion of the successor block of
+    a node(cost, heuristic, visited check and push), for the real nodes grouped by degree and for
+    synthetic blocks of high degree, and the whole queries of Uniform and AStar
+    """
+    graph = Graph()
+    end = graph.nodes[-1]
+    heuristic, heuristics = graph.goal(end), graph.goals(end)
+    indptr, indices, weights = graph.csr
+    generation, stamps, stamp_array = 1, [0] * len(graph), np.zeros(len(graph), dtype=np.int64)
+
+    def scalar(successors):
+        frontier = []
+        for next_node, distance in successors:
+            if stamps[next_node] == generation:
+                continue
+            frontier.append((next_node, 1.0 + distance, heuristic(next_node), 0))
+        return frontier
+
+    def vectorised(successors, distances):
+        fresh = stamp_array[successors] != generation
+        successors = successors[fresh]
+        costs, h_vals = (1.0 + distances[fresh]).tolist(), heuristics(successors).tolist()
+        return [(next_node, new_cost, new_h_val, 0) for next_node, new_cost, new_h_val in
+                zip(successors.tolist(), costs, h_vals)]
+
+    degrees = np.diff(indptr)
+    rng = np.random.default_rng(0)
+    cases = {f'degree {degree}': [(graph.successor_arrays(node)) for node in
+                                  rng.choice(np.flatnonzero(degrees == degree), size=20).tolist()]
+             for degree in (2, int(degrees.max()))}
+    for size in blocks:  # synthetic neighbour blocks of random nodes
+        cases[f'block {size}'] = [(rng.integers(len(graph), size=size).astype(indices.dtype),
+                                  rng.random(size)) for _ in range(20)]
+    for name, arrays in cases.items():
+        lists = [list(zip(successors.tolist(), distances.tolist())) for successors, distances in arrays]
+        start = time.perf_counter()
+        for _ in range(repeat // 20):
+            for successors in lists:
+                scalar(successors)
+        scalar_time = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        for _ in range(repeat // 20):
+            for successors, distances in arrays:
+                vectorised(successors, distances)
+        vectorised_time = (time.perf_counter() - start) / repeat
+        print(f'{name:<12} scalar: {scalar_time * 1e6:8.2f} us/expansion, '
+              f'vectorised: {vectorised_time * 1e6:8.2f} us/expansion, '
+              f'speedup: {scalar_time / vectorised_time:5.2f}x')
+
+    points = random_points(graph, samples)
+    for func in [Uniform, AStar]:
+        timings = {mode: sum(func(graph, start, end, vectorised=mode).time for start, end in points)
+                   for mode in (False, True)}
+        print(f'{func.__name__:<20} scalar: {timings[False]:6.3f} s, vectorised: {timings[True]:6.3f} s')
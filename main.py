@@ -1,7 +1,7 @@
 import random
 import pandas as pd
 from algorithms import DFS, BFS, Uniform, AStar, Greedy, IDS
-from utils import Graph, Result
+from utils import Graph, Result, ColumnarWriter
 
 graph = Graph()
 
@@ -12,12 +12,11 @@ def graph_search_test():
                random.choice(graph.nodes))
               for _ in range(100)]
 
-    data_frame = [func(graph, start, end).data
-                  for func in algorithms
-                  for start, end in points]
-
-    df = pd.DataFrame(data_frame)
-    df.to_csv('graph_search_test.csv')
+    # the results are written as the searches finish, read them back with read_results and read_paths
+    with ColumnarWriter('graph_search_test') as writer:
+        for func in algorithms:
+            for start, end in points:
+                writer.write(func(graph, start, end))
 
 
 def tree_like_search_test():
@@ -0,0 +1,525 @@
+"""
+Local query server of the search algorithms, JSON lines over a Unix or TCP socket
+
+    python server.py serve [--unix PATH | --host HOST --port PORT] [--workers N] [--queue-size N] [--deadline S]
+    python server.py load [--unix PATH | --host HOST --port PORT] [--connections N] [--rate QPS] [--duration S]
+
+Every request is a JSON object on a line, and so is every response, with the id of its request,
+a connection may send many requests without waiting, the responses come back as the queries finish:
+
+    {"id": 1, "algorithm": "AStar", "start": 0, "end": 1894, "deadline": 0.5, "path": false}
+    {"id": 1, "ok": true, "algorithm": "aStarSearch", "cost": 3.67, "path": null, "expanded_nodes": 8523,
+     "settled_nodes": 6318, "time": 0.021, "latency": 0.024, "batched": 1}
+    {"id": 2, "op": "metrics"}                          -> {"id": 2, "ok": true, "metrics": {...}}
+    {"id": 3, "op": "sample", "count": 100, "seed": 0}  -> {"id": 3, "ok": true, "nodes": [...]}
+
+A failed request gets {"id": ..., "ok": false, "error": ...}: "overloaded" when the queue is full,
+"deadline exceeded" when the deadline(seconds from the arrival of the request) passed before the answer,
+or the description of a bad request
+
+The server holds one loaded graph, the searches run on a pool of worker processes that memory-map
+the same graph cache, and the queries that queue up while the workers are busy are sent to a worker together,
+the queries of the exact algorithms(COALESCED) that share a start are answered by one batch_search,
+their responses keep the requested algorithm, and "batched" is the number of queries answered together
+"""
+import argparse
+import asyncio
+import collections
+import functools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+import algorithms
+from algorithms import batch_search
+from algorithms.parallel import worker_mirrors
+from utils import Graph
+
+ALGORITHMS = ['DFS', 'BFS', 'LevelBFS', 'Uniform', 'Greedy', 'AStar', 'WAStar', 'Focal', 'AnytimeAStar',
+              'BiUniform', 'BiAStar', 'CH']
+# the exact algorithms, any of them gives the shortest distance, so their queries of a start share one Dijkstra
+COALESCED = {'Uniform', 'AStar', 'BiUniform', 'BiAStar', 'CH'}
+
+LINE_LIMIT = 1 << 24  # the longest line of a request or a response, a path may have thousands of nodes
+DEFAULT_PORT = 8642
+MAX_SAMPLE = 100000  # the most nodes of a 'sample' request
+
+_graph = None  # the graph of a worker process
+
+
+def _load_graph(nodes_file, edges_file, mirrors):
+    """
+    initializer of the worker processes, the graph arrays are memory-mapped from the cache of the server,
+    see algorithms.parallel.worker_mirrors
+    """
+    global _graph
+    _graph = Graph(cache=True, nodes_file=nodes_file, edges_file=edges_file, mirrors=mirrors)
+
+
+def _run_tasks(tasks):
+    return run_tasks(_graph, tasks)
+
+
+def run_tasks(graph: Graph, tasks):
+    """
+    :param tasks: list of (algorithm name, pairs, paths), the pairs of a task of more than one pair
+                  share a start and are answered by one batch_search
+
+    :return: the list of the Result objects of every task
+    """
+    results = []
+    for name, pairs, paths in tasks:
+        if len(pairs) > 1:
+            results.append(batch_search(graph, pairs, paths=paths))
+        else:
+            func = getattr(algorithms, name)
+            results.append([func(graph, start, end) for start, end in pairs])
+    return results
+
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q)) * 1000 if len(samples) else None  # ms
+
+
+@dataclass
+class Query:
+    id: object
+    algorithm: str
+    start: int
+    end: int
+    paths: bool
+    received: float
+    deadline: float = None  # perf_counter time after which the answer is useless, None for no deadline
+    future: asyncio.Future = field(default=None, repr=False)  # resolved with (Result, number of batched queries)
+    waiting: bool = True  # False once the request has been answered with an error
+
+
+class Metrics:
+    """
+    live counters of the server, the throughput and the latency percentiles are those of
+    the queries answered in the last window seconds
+    """
+
+    def __init__(self, window=10.0):
+        self.window = window
+        self.started = time.perf_counter()
+        self.counters = dict.fromkeys(['received', 'completed', 'rejected', 'expired', 'failed', 'invalid',
+                                       'tasks', 'batches', 'coalesced'], 0)
+        self.__finished = collections.deque()  # (time, latency) of the queries answered in the window
+
+    def complete(self, latency):
+        now = time.perf_counter()
+        self.counters['completed'] += 1
+        self.__finished.append((now, latency))
+        self.__trim(now)
+
+    def __trim(self, now):
+        while self.__finished and self.__finished[0][0] < now - self.window:
+            self.__finished.popleft()
+
+    def snapshot(self, gauges=None):
+        now = time.perf_counter()
+        self.__trim(now)
+        latencies = [latency for _, latency in self.__finished]
+        span = min(self.window, now - self.started)
+        return {**self.counters, **(gauges or {}),
+                'uptime(seconds)': now - self.started,
+                'qps': len(latencies) / span if span else 0.0,
+                'p50(ms)': percentile(latencies, 50),
+                'p99(ms)': percentile(latencies, 99),
+                'max(ms)': max(latencies) * 1000 if latencies else None}
+
+
+class QueryServer:
+    """
+    asyncio server of the JSON line protocol, see the docstring of the module
+
+    Backpressure: the queue holds at most queue_size queries, a query that finds it full is rejected
+    at once with "overloaded", instead of waiting in an unbounded queue for an answer that comes too late
+
+    Batching: every worker has a dispatcher that takes a task of up to max_batch queued queries
+    when the worker is free, so the batches grow with the load, and an idle server answers a query alone
+    """
+
+    def __init__(self, nodes_file=None, edges_file=None, workers=None, queue_size=1024, max_batch=32,
+                 deadline=None, processes=True):
+        """
+        :param workers: number of worker processes(or threads), default is the number of cpu cores
+        :param deadline: the deadline in seconds of the requests without one, None for no deadline
+        :param processes: False to run the searches on threads that share the graph of the server,
+                        the searches are CPU-bound Python, so only processes run them in parallel
+        """
+        self.graph = Graph(cache=True, nodes_file=nodes_file, edges_file=edges_file)
+        self.workers = workers or os.cpu_count()
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self.deadline = deadline
+        self.metrics = Metrics()
+        self.in_flight = 0  # queries running on the workers
+        self.service_time = 0.0  # moving average of the worker time of a query, to foresee the waits
+        if processes:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=_load_graph,
+                                                initargs=(nodes_file, edges_file,
+                                                          worker_mirrors(self.graph, self.workers)))
+            self.__run = _run_tasks
+        else:
+            self.executor = ThreadPoolExecutor(self.workers)
+            self.__run = functools.partial(run_tasks, self.graph)
+        self.queue = None  # asyncio.Queue of Query objects, built in the event loop
+        self.__dispatchers = []
+        self.__server = None
+
+    async def start(self, unix=None, host='127.0.0.1', port=DEFAULT_PORT):
+        """
+        listen on the Unix socket unix, or on host:port if unix is None
+
+        :return: the asyncio Server
+        """
+        self.queue = asyncio.Queue(self.queue_size)
+        self.__dispatchers = [asyncio.create_task(self.__dispatch()) for _ in range(self.workers)]
+        if unix is not None:
+            self.__server = await asyncio.start_unix_server(self.__connection, unix, limit=LINE_LIMIT)
+        else:
+            self.__server = await asyncio.start_server(self.__connection, host, port, limit=LINE_LIMIT)
+        return self.__server
+
+    async def close(self):
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+        for dispatcher in self.__dispatchers:
+            dispatcher.cancel()
+        self.executor.shutdown(cancel_futures=True)
+
+    def snapshot(self):
+        return self.metrics.snapshot({'queued': self.queue.qsize() if self.queue else 0, 'in flight': self.in_flight,
+                                      'service time(ms)': self.service_time * 1000})
+
+    async def __connection(self, reader, writer):
+        pending = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self.__respond(line, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await asyncio.gather(*pending)
+        except (ConnectionError, ValueError):  # ValueError: a line above LINE_LIMIT
+            pass
+        finally:
+            writer.close()
+
+    async def __respond(self, line, writer):
+        message = {}
+        try:
+            message = json.loads(line)
+            if not isinstance(message, dict):
+                message = {}  # no id to answer with
+                raise ValueError('a request must be a JSON object')
+            response = await self.handle(message)
+        except (ValueError, TypeError) as e:  # TypeError: e.g. a seed that can not seed a Random
+            self.metrics.counters['invalid'] += 1
+            response = {'ok': False, 'error': str(e)}
+        try:
+            writer.write(json.dumps({'id': message.get('id'), **response}).encode() + b'\n')
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def handle(self, message):
+        """
+        :return: the response to a request, without its id
+
+        :raise ValueError, TypeError: if the request is not valid
+        """
+        op = message.get('op', 'search')
+        if op == 'metrics':
+            return {'ok': True, 'metrics': self.snapshot()}
+        if op == 'sample':
+            count = message.get('count', 1)
+            if not isinstance(count, int) or isinstance(count, bool) or not 0 < count <= MAX_SAMPLE:
+                raise ValueError(f'the count must be an integer from 1 to {MAX_SAMPLE}: {count!r}')
+            rng = random.Random(message.get('seed'))
+            return {'ok': True, 'nodes': [rng.choice(self.graph.nodes) for _ in range(count)]}
+        if op != 'search':
+            raise ValueError(f'unknown op: {op}')
+
+        query = self.__query(message)
+        self.metrics.counters['received'] += 1
+        # the query waits for the queries ahead of it, shared by the workers
+        ahead = (self.queue.qsize() + self.in_flight) / self.workers
+        try:
+            if query.deadline is not None and query.received + (ahead + 1) * self.service_time > query.deadline:
+                # it would miss its deadline, rejecting it now leaves the workers to the others
+                raise asyncio.QueueFull
+            self.queue.put_nowait(query)
+        except asyncio.QueueFull:
+            self.metrics.counters['rejected'] += 1
+            return {'ok': False, 'error': 'overloaded'}
+
+        timeout = None if query.deadline is None else max(query.deadline - time.perf_counter(), 0)
+        try:
+            # shield: a timeout answers the request, the query may still be running on a worker
+            res, batched = await asyncio.wait_for(asyncio.shield(query.future), timeout)
+        except TimeoutError:
+            query.waiting = False
+            self.metrics.counters['expired'] += 1
+            return {'ok': False, 'error': 'deadline exceeded'}
+        except Exception as e:  # the search failed on the worker
+            self.metrics.counters['failed'] += 1
+            return {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+
+        latency = time.perf_counter() - query.received
+        self.metrics.complete(latency)
+        return {'ok': True, 'algorithm': res.algorithms, 'cost': res.cost,
+                'path': res.path if query.paths else None,
+                'expanded_nodes': res.expanded_nodes, 'settled_nodes': res.settled_nodes,
+                'time': res.time, 'latency': latency, 'batched': batched}
+
+    def __query(self, message):
+        received = time.perf_counter()
+        algorithm = message.get('algorithm', 'AStar')
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f'unknown algorithm: {algorithm}')
+        start, end = message.get('start'), message.get('end')
+        for node in (start, end):
+            if not isinstance(node, int) or isinstance(node, bool) or node not in self.graph:
+                raise ValueError(f'unknown node: {node!r}')
+        deadline = message.get('deadline', self.deadline)
+        if deadline is not None and (not isinstance(deadline, (int, float)) or deadline <= 0):
+            raise ValueError(f'the deadline must be a positive number of seconds: {deadline!r}')
+        return Query(id=message.get('id'), algorithm=algorithm, start=start, end=end,
+                     paths=bool(message.get('path', True)), received=received,
+                     deadline=None if deadline is None else received + deadline,
+                     future=asyncio.get_running_loop().create_future())
+
+    async def __dispatch(self):
+        """
+        the dispatcher of a worker: wait for a query, take the other queued ones up to max_batch,
+        drop the ones that would miss their deadline before their turn(their requests are answered
+        when the deadline passes), and run the rest as one task on the worker
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            queries = [await self.queue.get()]
+            while len(queries) < self.max_batch and not self.queue.empty():
+                queries.append(self.queue.get_nowait())
+            now = time.perf_counter()
+            queries = [query for i, query in enumerate(queries)
+                       if query.waiting and (query.deadline is None or query.deadline > now + i * self.service_time)]
+            if not queries:
+                continue
+
+            groups = {}
+            for i, query in enumerate(queries):
+                key = ('batch', query.start) if query.algorithm in COALESCED else (query.algorithm, i)
+                groups.setdefault(key, []).append(query)
+            tasks = [(group[0].algorithm, [(query.start, query.end) for query in group],
+                      any(query.paths for query in group)) for group in groups.values()]
+            counters = self.metrics.counters
+            counters['tasks'] += 1
+            for group in groups.values():
+                if len(group) > 1:
+                    counters['batches'] += 1
+                    counters['coalesced'] += len(group)
+
+            self.in_flight += len(queries)
+            begin = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self.executor, self.__run, tasks)
+                self.service_time += 0.1 * ((time.perf_counter() - begin) / len(queries) - self.service_time)
+            except Exception as e:
+                for query in queries:
+                    if query.waiting:
+                        query.future.set_exception(e)
+                continue
+            finally:
+                self.in_flight -= len(queries)
+            for group, group_results in zip(groups.values(), results):
+                for query, res in zip(group, group_results):
+                    if len(group) > 1:  # answered by batch_search, the response names the requested algorithm
+                        res.algorithms = getattr(algorithms, query.algorithm).__name__
+                    query.future.set_result((res, len(group)))
+
+    async def serve(self, unix=None, host='127.0.0.1', port=DEFAULT_PORT, report=None):
+        """
+        run the server until it is interrupted
+
+        :param report: print the metrics to stderr every report seconds, None for never
+        """
+        server = await self.start(unix, host, port)
+        where = unix or f'{host}:{port}'
+        print(f'serving {len(self.graph)} nodes on {where} with {self.workers} workers', file=sys.stderr)
+        try:
+            async with server:
+                if report is None:
+                    await server.serve_forever()
+                while True:
+                    await asyncio.sleep(report)
+                    print(json.dumps(self.snapshot()), file=sys.stderr)
+        finally:
+            await self.close()
+
+
+class Client:
+    """
+    a connection to a QueryServer, the requests are pipelined and matched to their responses by id
+    """
+
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+        self.__ids = iter(range(1 << 62))
+        self.__pending = {}  # id: future of the response
+        self.__receiver = asyncio.create_task(self.__receive())
+
+    @classmethod
+    async def connect(cls, unix=None, host='127.0.0.1', port=DEFAULT_PORT):
+        if unix is not None:
+            reader, writer = await asyncio.open_unix_connection(unix, limit=LINE_LIMIT)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+        return cls(reader, writer)
+
+    async def __receive(self):
+        try:
+            while line := await self.reader.readline():
+                response = json.loads(line)
+                future = self.__pending.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self.__pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('the server closed the connection'))
+
+    async def request(self, message):
+        """
+        :return: the response to the request(a dict without its id)
+        """
+        request_id = next(self.__ids)
+        future = asyncio.get_running_loop().create_future()
+        self.__pending[request_id] = future
+        self.writer.write(json.dumps({**message, 'id': request_id}).encode() + b'\n')
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        self.__receiver.cancel()
+
+
+async def load(unix=None, host='127.0.0.1', port=DEFAULT_PORT, connections=8, rate=None, duration=10.0,
+               algorithm='AStar', sources=None, deadline=None, paths=False, seed=0):
+    """
+    load generator: send search queries between sampled nodes of the server for duration seconds
+
+    Without a rate, the load is a closed loop, every connection keeps one query in flight,
+    so it measures the sustained throughput. With a rate(queries per second), the load is an open loop,
+    the queries are sent on schedule however slow the answers are, and the latency is counted from
+    the scheduled time, so the queueing of an overloaded server shows in the tail latency
+
+    :param sources: draw the starts from this many nodes, so concurrent queries share their starts
+                    and can be coalesced, None to draw them from all the sampled nodes
+    :param deadline: the deadline in seconds of every query, None for the default of the server
+
+    :return: dict of the counts of the responses, the throughput and the latency percentiles(ms)
+            of the answered queries, and the metrics of the server at the end
+    """
+    clients = [await Client.connect(unix, host, port) for _ in range(connections)]
+    nodes = (await clients[0].request({'op': 'sample', 'count': 10000, 'seed': seed}))['nodes']
+    rng = random.Random(seed)
+    starts = rng.sample(nodes, sources) if sources else nodes
+    message = {'algorithm': algorithm, 'path': paths}
+    if deadline is not None:
+        message['deadline'] = deadline
+
+    latencies, batched = [], []
+    outcomes = collections.Counter()
+
+    async def query(client, scheduled):
+        response = await client.request({**message, 'start': rng.choice(starts), 'end': rng.choice(nodes)})
+        if response['ok']:
+            latencies.append(time.perf_counter() - scheduled)
+            batched.append(response['batched'])
+            outcomes['ok'] += 1
+        else:
+            outcomes[response['error']] += 1
+
+    begin = time.perf_counter()
+    stop = begin + duration
+    if rate is None:
+        async def closed_loop(client):
+            while time.perf_counter() < stop:
+                await query(client, time.perf_counter())
+
+        await asyncio.gather(*map(closed_loop, clients))
+    else:
+        tasks = []
+        for i in range(int(duration * rate)):
+            scheduled = begin + i / rate
+            await asyncio.sleep(max(scheduled - time.perf_counter(), 0))
+            tasks.append(asyncio.create_task(query(clients[i % connections], scheduled)))
+        await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - begin
+
+    metrics = (await clients[0].request({'op': 'metrics'}))['metrics']
+    for client in clients:
+        await client.close()
+    return {'sent': sum(outcomes.values()), **outcomes,
+            'qps': outcomes['ok'] / elapsed,
+            'p50(ms)': percentile(latencies, 50), 'p95(ms)': percentile(latencies, 95),
+            'p99(ms)': percentile(latencies, 99), 'max(ms)': max(latencies) * 1000 if latencies else None,
+            'mean batched': sum(batched) / len(batched) if batched else None,
+            'server': metrics}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve')
+    load_parser = commands.add_parser('load')
+    for command in (serve_parser, load_parser):
+        command.add_argument('--unix', help='path of the Unix socket, instead of TCP')
+        command.add_argument('--host', default='127.0.0.1')
+        command.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--nodes-file')
+    serve_parser.add_argument('--edges-file')
+    serve_parser.add_argument('--workers', type=int)
+    serve_parser.add_argument('--threads', action='store_true', help='run the searches on threads, not processes')
+    serve_parser.add_argument('--queue-size', type=int, default=1024)
+    serve_parser.add_argument('--max-batch', type=int, default=32)
+    serve_parser.add_argument('--deadline', type=float, help='default deadline of the requests in seconds')
+    serve_parser.add_argument('--report', type=float, help='print the metrics every REPORT seconds')
+    load_parser.add_argument('--connections', type=int, default=8)
+    load_parser.add_argument('--rate', type=float, help='queries per second(open loop), closed loop by default')
+    load_parser.add_argument('--duration', type=float, default=10.0)
+    load_parser.add_argument('--algorithm', default='AStar', choices=ALGORITHMS)
+    load_parser.add_argument('--sources', type=int, help='draw the starts from this many nodes')
+    load_parser.add_argument('--deadline', type=float)
+    load_parser.add_argument('--paths', action='store_true', help='ask for the paths too')
+    load_parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        server = QueryServer(args.nodes_file, args.edges_file, workers=args.workers, queue_size=args.queue_size,
+                             max_batch=args.max_batch, deadline=args.deadline, processes=not args.threads)
+        try:
+            asyncio.run(server.serve(args.unix, args.host, args.port, args.report))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    report = asyncio.run(load(args.unix, args.host, args.port, connections=args.connections, rate=args.rate,
+                              duration=args.duration, algorithm=args.algorithm, sources=args.sources,
+                              deadline=args.deadline, paths=args.paths, seed=args.seed))
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
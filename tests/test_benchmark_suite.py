@@ -0,0 +1,24 @@
+import json
+import math
+
+from benchmark_suite import BUCKETS, QUERIES_FILE, compare, load_queries
+
+METRICS = {'p50': 1.0, 'p95': 2.0, 'p99': 3.0, 'peak memory(KiB)': 10.0,
+           'qps': 100.0, 'settled nodes': 50.0, 'expanded nodes': 60.0}
+
+
+def test_queries_file_is_json():
+    with open(QUERIES_FILE) as f:
+        saved = json.load(f, parse_constant=lambda constant: math.nan)  # NaN or Infinity is not JSON
+    assert saved['buckets']['long'] == [4, None]
+    assert set(load_queries(None)) == set(BUCKETS)
+
+
+def test_compare():
+    baseline = {'results': {'AStar/short': METRICS}}
+    assert compare(baseline, baseline) == []
+
+    current = {'results': {'AStar/short': {**METRICS, 'qps': 85.0, 'settled nodes': 51.0, 'p50': 1.05}}}
+    regressions = {regression['metric']: regression for regression in compare(baseline, current)}
+    assert set(regressions) == {'qps', 'settled nodes'}
+    assert math.isclose(regressions['qps']['change'], -0.15)
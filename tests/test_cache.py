@@ -0,0 +1,45 @@
+import gc
+import weakref
+
+import numpy as np
+
+from utils import Graph
+from utils.cache import IndexCache
+
+from test_ingest import write
+
+
+class Index:
+    def __init__(self, values):
+        self.arrays = {'values': values}
+
+
+def test_index_cache(tmp_path):
+    nodes_file, edges_file = write(tmp_path, [(1, 2), (2, 3)])
+    graph = Graph(nodes_file=nodes_file, edges_file=edges_file)
+    indexes = IndexCache('test')
+    built = []
+
+    def load(arrays):
+        return Index(**arrays)
+
+    def build():
+        built.append(len(built))
+        return Index(np.arange(3))
+
+    index = indexes.get(graph, build, load)
+    assert indexes.get(graph, build, load) is index and built == [0]
+    assert (tmp_path / 'graph.test.cache').is_dir()
+
+    # a new cache loads the arrays that the first one saved
+    loaded = IndexCache('test').get(graph, build, load)
+    assert built == [0] and np.array_equal(loaded.arrays['values'], np.arange(3))
+
+    graph.set_cost(1, 2, 5.0)
+    assert indexes.get(graph, build, load) is not index and built == [0, 1]
+    assert indexes.get(graph, build, load, key=2) is not None and built == [0, 1, 2]
+
+    ref = weakref.ref(graph)
+    del graph
+    gc.collect()
+    assert ref() is None
@@ -0,0 +1,41 @@
+from algorithms import AStar, Uniform
+from algorithms.parallel import worker_mirrors
+from utils import Graph
+
+from test_ingest import write
+
+ARCS = [(1, 2), (2, 3), (3, 4), (2, 4)]
+
+
+def accessors(graph):
+    return ([sorted(graph.successors(node)) for node in graph.nodes],
+            [sorted(graph.weighted_successors(node)) for node in graph.nodes],
+            [graph.position(node) for node in graph.nodes],
+            [graph.component(node) for node in graph.nodes],
+            AStar(graph, 1, 4).cost)
+
+
+def test_large_graph_reads_the_arrays(tmp_path, monkeypatch):
+    nodes_file, edges_file = write(tmp_path, ARCS)
+    mirrored = Graph(cache=False, nodes_file=nodes_file, edges_file=edges_file)
+    monkeypatch.setattr(Graph, 'MIRROR_EDGES', 0)
+    large = Graph(cache=False, nodes_file=nodes_file, edges_file=edges_file)
+    assert accessors(large) == accessors(mirrored)
+    assert large.connected(1, 4)
+
+    # a modification builds the lists of the large graph
+    large.remove_edge(2, 4)
+    mirrored.remove_edge(2, 4)
+    assert accessors(large) == accessors(mirrored)
+    assert abs(Uniform(large, 1, 4).cost - 3) < 1e-9
+
+
+def test_mirrors_argument(tmp_path, monkeypatch):
+    nodes_file, edges_file = write(tmp_path, ARCS)
+    mirrored = Graph(cache=False, nodes_file=nodes_file, edges_file=edges_file)
+    arrays = Graph(cache=False, nodes_file=nodes_file, edges_file=edges_file, mirrors=False)
+    assert accessors(arrays) == accessors(mirrored)
+
+    # the mirrors of all the workers share the budget of one process
+    monkeypatch.setattr(Graph, 'MIRROR_EDGES', 3 * len(mirrored.csr[1]))
+    assert worker_mirrors(mirrored, 3) and not worker_mirrors(mirrored, 4)
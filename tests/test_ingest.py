@@ -0,0 +1,40 @@
+import numpy as np
+
+from algorithms import Uniform
+from utils import Graph
+from utils.ingest import read_graph
+
+NODES = 'p aux sp co 4\nv 1 0 0\nv 2 1000000 0\nv 3 2000000 0\nv 4 2000000 1000000\n'
+
+
+def write(directory, arcs):
+    nodes_file, edges_file = directory / 'graph.co', directory / 'graph.gr'
+    nodes_file.write_text(NODES)
+    edges_file.write_text(f'p sp 4 {len(arcs)}\n' + ''.join(f'a {u} {v} 1\n' for u, v in arcs))
+    return str(nodes_file), str(edges_file)
+
+
+def successors(arrays):
+    indptr, indices = arrays['indptr'], arrays['indices']
+    return [sorted(indices[indptr[i]:indptr[i + 1]].tolist()) for i in range(len(indptr) - 1)]
+
+
+def test_reversed_arcs(tmp_path):
+    nodes_file, edges_file = write(tmp_path, [(2, 1), (3, 2)])
+    assert successors(read_graph(nodes_file, edges_file)) == [[1], [0, 2], [1], []]
+
+    graph = Graph(nodes_file=nodes_file, edges_file=edges_file)
+    assert graph.connected(1, 3)
+    assert not graph.connected(1, 4)
+    assert abs(Uniform(graph, 1, 3).cost - 2) < 1e-9
+
+
+def test_duplicate_arcs_across_chunks(tmp_path):
+    arcs = [(1, 2), (3, 4), (2, 1), (2, 3), (4, 3), (3, 2), (1, 2), (4, 4)]
+    nodes_file, edges_file = write(tmp_path, arcs)
+    expected = [[1], [0, 2], [1, 3], [2]]
+    for chunk_size in (1, 2, 3, 100):
+        arrays = read_graph(nodes_file, edges_file, chunk_size=chunk_size)
+        assert successors(arrays) == expected
+        assert len(arrays['weights']) == len(arrays['indices']) == 6
+        assert np.array_equal(arrays['components'], [0, 0, 0, 0])
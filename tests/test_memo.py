@@ -0,0 +1,37 @@
+from algorithms import QueryCache, Uniform
+from utils import Graph
+
+from test_ingest import write
+
+
+def test_trees_of_popular_endpoints(tmp_path):
+    nodes_file, edges_file = write(tmp_path, [(1, 2), (2, 3), (3, 4)])
+    graph = Graph(cache=False, nodes_file=nodes_file, edges_file=edges_file)
+    cache = QueryCache(trees=2, popularity=2)
+    cache.search(Uniform, graph, 1, 3)
+    assert cache.stats['tree builds'] == 0
+
+    res = cache.search(Uniform, graph, 4, 1)  # the second missed query of 1
+    assert cache.stats['tree builds'] == 0 and res.path == [4, 3, 2, 1]
+
+    res = cache.search(Uniform, graph, 2, 1)  # the third one, 1 was popular
+    assert cache.stats['tree builds'] == 1 and not res.cached
+    assert res.path == [2, 1] and abs(res.cost - 1) < 1e-9
+
+    res = cache.search(Uniform, graph, 1, 2)  # the answer of the tree was stored
+    assert res.cached and res.path == [1, 2]
+    assert cache.stats['tree hits'] == 0 and cache.stats['misses'] == 3
+
+
+def test_tree_hits_are_stored(tmp_path):
+    nodes_file, edges_file = write(tmp_path, [(1, 2), (2, 3), (3, 4)])
+    graph = Graph(cache=False, nodes_file=nodes_file, edges_file=edges_file)
+    cache = QueryCache(trees=2, popularity=1)
+    cache.search(Uniform, graph, 1, 3)
+    cache.search(Uniform, graph, 1, 4)  # builds the tree of 1
+    assert cache.stats['tree builds'] == 1
+
+    for _ in range(2):
+        res = cache.search(Uniform, graph, 2, 1)
+        assert res.cached and res.path == [2, 1]
+    assert cache.stats['tree hits'] == 1 and cache.stats['hits'] == 1
@@ -0,0 +1,46 @@
+import pytest
+
+from algorithms import CH, AStar, BiAStar, Focal, Uniform
+from utils import Graph, SearchStats
+
+from test_ingest import write
+
+
+@pytest.fixture
+def graph(tmp_path):
+    nodes_file, edges_file = write(tmp_path, [(1, 2), (2, 3), (3, 4), (1, 4)])
+    return Graph(cache=False, nodes_file=nodes_file, edges_file=edges_file)
+
+
+def test_only_real_heuristics_are_counted(graph):
+    stats = SearchStats()
+    Uniform(graph, 1, 3, stats=stats)
+    assert stats.heuristic_evaluations == 0 and stats.successor_reads > 0
+
+    stats = SearchStats()
+    AStar(graph, 1, 3, stats=stats)
+    assert stats.heuristic_evaluations > 0
+
+
+def test_instrument_keeps_the_problem(graph):
+    problem = graph.multi_goal_problem(1, [3, 4], heuristic=True)
+    _, instrumented, _ = SearchStats().instrument(graph, problem)
+    assert instrumented.goals == problem.goals and instrumented.starts == problem.starts
+    assert instrumented.heuristic(2) == problem.heuristic(2)
+
+    problem = graph.problem(1, 3, heuristic=True)
+    _, instrumented, _ = SearchStats().instrument(graph, problem)
+    assert instrumented.heuristics is problem.heuristics
+
+
+@pytest.mark.parametrize('func', [Focal, BiAStar])
+def test_searches_without_a_container(graph, func):
+    stats = SearchStats()
+    res = func(graph, 1, 3, stats=stats)
+    assert res.stats is stats and res.path == func(graph, 1, 3).path
+    assert stats.successor_reads > 0 and stats.heuristic_evaluations > 0
+
+
+def test_searches_without_stats(graph):
+    with pytest.raises(TypeError):
+        CH(graph, 1, 3, stats=SearchStats())
@@ -1,7 +1,10 @@
+import functools
 import time
 from dataclasses import dataclass
-from .container import Container, Queue, DistinctHeap
-from .graph import Graph
+from .container import Container, Queue, DistinctHeap, IndexedHeap, LazyHeap
+from .graph import Graph, Problem, MultiGoalProblem
+from .stats import SearchStats
+from .sink import JsonlWriter, ColumnarWriter, read_results, read_paths
 
 
 @dataclass
@@ -12,8 +15,13 @@ class Result:
     path: list = None
     cost: float = None
     expanded_nodes: int = None
+    settled_nodes: int = None
     time: float = None
     prune: bool = False
+    cached: bool = False  # True if the result is a lookup of a cached search, time is the lookup time
+    stats: SearchStats = None  # the instrumentation of the search, if it was requested
+    suboptimality: float = None  # upper bound of cost / optimal cost, for the bounded-suboptimal searches
+    goal: int = None  # the goal that was reached, for the searches of a set of goals
 
     @property
     def data(self):
@@ -23,21 +31,28 @@ class Result:
                             'total distance': 'cost',
                             'time cost(seconds)': 'time',
                             'memo cost(number of nodes)': 'expanded_nodes',
+                            'settled nodes': 'settled_nodes',
+                            'suboptimality bound': 'suboptimality',
+                            'goal': 'goal',
+                            'cached': 'cached',
                             'path': 'path'}
         data = {column: getattr(self, attr)
                 for column, attr in columns_to_attrs.items()}
+        if self.stats is not None:
+            data.update(self.stats.data)
         return data
 
 
 # decorator
 def timer(func):
+    @functools.wraps(func)  # keep the module and qualified name, so the wrapped functions can be pickled
     def wrapper(*args, **kwargs) -> Result:
-        # profiling start time
-        start = time.time()
+        # profiling start time, perf_counter is monotonic and has the highest resolution
+        start = time.perf_counter()
         # get result
         res: Result = func(*args, **kwargs)
         # profiling end time
-        end = time.time()
+        end = time.perf_counter()
         time_cost = end - start
 
         # complete the Result object
@@ -47,5 +62,4 @@ def timer(func):
         res.end = kwargs.get('end', None) or args[2]
         return res
 
-    wrapper.__name__ = func.__name__
     return wrapper
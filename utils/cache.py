@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import weakref
+
+import numpy as np
+
+CACHE_VERSION = 4
+META_FILE = "meta.json"
+
+
+def _fingerprint(file):
+    """
+    mtime, size and sha1 of a source file, the cache is only valid for the exact same sources
+    """
+    stat = os.stat(file)
+    sha1 = hashlib.sha1()
+    with open(file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(chunk)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': sha1.hexdigest()}
+
+
+def _is_fresh(meta, sources):
+    """
+    a cached source is fresh if its mtime and size are unchanged,
+    a touched source(new mtime) is still fresh as long as its content hash is unchanged
+    """
+    if meta.get('version') != CACHE_VERSION or set(meta.get('sources', {})) != set(sources):
+        return False
+    for name, file in sources.items():
+        cached = meta['sources'][name]
+        stat = os.stat(file)
+        if stat.st_mtime_ns == cached['mtime_ns'] and stat.st_size == cached['size']:
+            continue
+        if _fingerprint(file)['sha1'] != cached['sha1']:
+            return False
+    return True
+
+
+def load_arrays(cache_dir, sources):
+    """
+    memory-map the arrays cached in cache_dir
+
+    :param cache_dir: the directory that save_arrays wrote
+    :param sources: {name: path} of the files the arrays were compiled from
+
+    :return: {name: read-only np.memmap} if the cache exists and is fresh, otherwise None
+    """
+    try:
+        with open(os.path.join(cache_dir, META_FILE)) as f:
+            meta = json.load(f)
+        if not _is_fresh(meta, sources):
+            return None
+        return {name: np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode='r')
+                for name in meta['arrays']}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_arrays(cache_dir, sources, arrays):
+    """
+    write every array as a .npy file plus a meta.json that records
+    the cache version and the fingerprints of the source files,
+    the directory is written aside and renamed, so readers never see a partial cache
+
+    :param cache_dir: the directory to write
+    :param sources: {name: path} of the files the arrays were compiled from
+    :param arrays: {name: np.ndarray}
+    """
+    tmp_dir = f'{cache_dir}.{os.getpid()}.tmp'
+    os.makedirs(tmp_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(array))
+
+    meta = {'version': CACHE_VERSION,
+            'sources': {name: _fingerprint(file) for name, file in sources.items()},
+            'arrays': list(arrays)}
+    with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    try:
+        os.replace(tmp_dir, cache_dir)
+    except OSError:  # another process has just written the same cache
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def try_save_arrays(cache_dir, sources, arrays):
+    """
+    save_arrays, a read-only location just means no cache
+
+    :return: True if the arrays were saved
+    """
+    try:
+        save_arrays(cache_dir, sources, arrays)
+        return True
+    except OSError:
+        return False
+
+
+class IndexCache:
+    """
+    The indexes derived from graphs(e.g. a contraction hierarchy) of every loaded graph,
+    an index is loaded from its cache next to the cache of the graph, or built and cached,
+    the graphs are weak keys, so an index never keeps its graph alive,
+    a modified graph gets a new index for every version, and it is never cached on disk
+    """
+
+    def __init__(self, name):
+        """
+        :param name: the name of the cache directories of the indexes, see Graph.cache_path
+        """
+        self.name = name
+        self.__indexes = weakref.WeakKeyDictionary()  # {graph: {(key, graph version): index}}
+        self.__lock = threading.Lock()  # concurrent queries build the index of a graph only once
+
+    def get(self, graph, build, load, key='', cache=True):
+        """
+        :param build: build() returns a new index of the graph, index.arrays are the arrays to cache
+        :param load: load(arrays) returns the index of its cached arrays
+        :param key: the variant of the index(e.g. the number of landmarks), a suffix of its cache directory
+        """
+        with self.__lock:
+            indexes = self.__indexes.setdefault(graph, dict())
+            if (key, graph.version) not in indexes:
+                for stale in [item for item in indexes if item[1] != graph.version]:
+                    del indexes[stale]
+                cache = cache and graph.version == 0
+                cache_dir = graph.cache_path(f'{self.name}{key}')
+                arrays = cache and load_arrays(cache_dir, graph.sources)
+                if arrays:
+                    index = load(arrays)
+                else:
+                    index = build()
+                    if cache:
+                        try_save_arrays(cache_dir, graph.sources, index.arrays)
+                indexes[key, graph.version] = index
+            return indexes[key, graph.version]
@@ -1,3 +1,6 @@
+import heapq
+
+
 class Container:
     def __init__(self):
         self._size = 0
@@ -186,6 +189,9 @@ class DistinctHeap(Heap):
         self.__key = key
         self.__dict = dict()  # store the ({key of the item}, {index of the item}) pairs
 
+    def __contains__(self, key):
+        return key in self.__dict
+
     def _heapifyUp(self, index=None):
         """
 
@@ -232,7 +238,7 @@ class DistinctHeap(Heap):
             new_val = self._comparator(item)
             old_val = self._comparator(self._list[index])
             if new_val > old_val:  # if new item is greater than the old, just ignore it
-                return
+                return False
 
             # update the list and dict, then heapifyUp
             self._list[index] = item
@@ -257,6 +263,159 @@ class DistinctHeap(Heap):
         return res
 
 
+class IndexedHeap(Container):
+    """
+    Indexed Min Heap specialised for the search entries (node, cost, heuristic_value, ...),
+    where node is a dense integer id in [0, capacity), or is mapped to one by the index function,
+    the priority of an entry is cost * cost_weight + heuristic_value * heuristic_weight,
+    priorities and nodes are stored in parallel lists that form the heap,
+    and the heap position of every node is stored in a list indexed by the node,
+    so every node is unique in the heap and decrease-key takes O(log n) time
+    without calling any comparator or key function
+    """
+
+    def __init__(self, capacity, weights=(1, 0), index=None):
+        """
+        :param capacity: the number of nodes, nodes must be integers in [0, capacity)
+        :param index: a function that maps a node to its dense id in [0, capacity), e.g. Graph.index,
+                      None if the nodes are the dense ids
+
+        :param weights: (cost_weight, heuristic_weight) of the priority,
+                        (1, 0) for Uniform, (0, 1) for Greedy and (1, 1) for AStar
+        """
+        super().__init__()
+        self._cost_weight, self._heuristic_weight = weights
+        self._priorities = list()  # priority of every slot of the heap
+        self._nodes = list()  # node of every slot of the heap
+        self._items = [None] * capacity  # entry of every node in the heap
+        self._positions = [-1] * capacity  # slot of every node in the heap, -1 if not in the heap
+        self._index = index  # the heap slots hold the dense ids, the entries keep the nodes
+
+    def __str__(self):
+        return str([self._items[node] for node in self._nodes])
+
+    def __contains__(self, node):
+        return self._positions[node if self._index is None else self._index(node)] >= 0
+
+    def append(self, item):
+        """
+        insert the entry, or decrease the key of its node if the entry is not worse than the old one
+        """
+        node = item[0] if self._index is None else self._index(item[0])
+        priority = item[1] * self._cost_weight + item[2] * self._heuristic_weight
+        index = self._positions[node]
+        if index < 0:
+            index = self._size
+            self._priorities.append(priority)
+            self._nodes.append(node)
+            self._size += 1
+        elif priority > self._priorities[index]:  # if new entry is greater than the old, just ignore it
+            return False
+        self._items[node] = item
+        self._sift_up(index, priority, node)
+
+    def pop(self):
+        assert self, 'heap is empty'
+        node = self._nodes[0]
+        item = self._items[node]
+        self._items[node] = None
+        self._positions[node] = -1
+
+        # move the last slot to the root and adjust the heap from up to bottom
+        priority, last = self._priorities.pop(), self._nodes.pop()
+        self._size -= 1
+        if self._size:
+            self._sift_down(0, priority, last)
+        return item
+
+    def _sift_up(self, index, priority, node):
+        """
+        move the hole at index up until its parent is not greater than priority, then fill it with node
+        """
+        priorities, nodes, positions = self._priorities, self._nodes, self._positions
+        while index > 0:
+            parent = (index - 1) >> 1
+            if priorities[parent] <= priority:
+                break
+            priorities[index] = priorities[parent]
+            nodes[index] = nodes[parent]
+            positions[nodes[index]] = index
+            index = parent
+        priorities[index] = priority
+        nodes[index] = node
+        positions[node] = index
+
+    def _sift_down(self, index, priority, node):
+        """
+        move the hole at index down until its smallest child is not less than priority, then fill it with node
+        """
+        priorities, nodes, positions = self._priorities, self._nodes, self._positions
+        size = self._size
+        child = 2 * index + 1
+        while child < size:
+            if child + 1 < size and priorities[child + 1] < priorities[child]:
+                child += 1
+            if priority <= priorities[child]:
+                break
+            priorities[index] = priorities[child]
+            nodes[index] = nodes[child]
+            positions[nodes[index]] = index
+            index = child
+            child = 2 * index + 1
+        priorities[index] = priority
+        nodes[index] = node
+        positions[node] = index
+
+
+class LazyHeap(Container):
+    """
+    Distinct Min Heap on top of heapq with lazy deletion,
+    a decrease-key pushes a new entry and leaves the old one in the heap as a stale entry,
+    stale entries are recognised by their sequence number and skipped when they reach the top,
+    the priority of an entry (node, cost, heuristic_value, ...) is computed as in IndexedHeap
+    """
+
+    def __init__(self, weights=(1, 0)):
+        """
+        :param weights: (cost_weight, heuristic_weight) of the priority
+        """
+        super().__init__()
+        self._cost_weight, self._heuristic_weight = weights
+        self._heap = list()  # (priority, sequence, item), sequence breaks ties in FIFO order
+        self._live = dict()  # (priority, sequence) of the live entry of every node in the heap
+        self._sequence = 0
+
+    def __str__(self):
+        return str([item for priority, sequence, item in sorted(self._heap)
+                    if self._live.get(item[0]) == (priority, sequence)])
+
+    def __contains__(self, node):
+        return node in self._live
+
+    def append(self, item):
+        node = item[0]
+        priority = item[1] * self._cost_weight + item[2] * self._heuristic_weight
+        live = self._live.get(node)
+        if live is None:
+            self._size += 1
+        elif priority > live[0]:  # if new entry is greater than the old, just ignore it
+            return False
+        self._sequence += 1
+        self._live[node] = (priority, self._sequence)
+        heapq.heappush(self._heap, (priority, self._sequence, item))
+
+    def pop(self):
+        assert self, 'heap is empty'
+        heap, live = self._heap, self._live
+        while True:
+            priority, sequence, item = heapq.heappop(heap)
+            if live.get(item[0]) == (priority, sequence):  # skip the stale entries
+                break
+        del live[item[0]]
+        self._size -= 1
+        return item
+
+
 if __name__ == '__main__':
     import random
 
@@ -285,5 +444,22 @@ if __name__ == '__main__':
         print("heap pass test")
 
 
+    def test_indexed_heaps():
+        # do 100 times heap sort with random decrease-key operations
+        for i in range(100):
+            li = [(random.randint(0, 99), random.random(), 0) for _ in range(1000)]
+            best = dict()
+            for node, priority, _ in li:
+                best[node] = min(best.get(node, priority), priority)
+            for heap in [IndexedHeap(100), LazyHeap()]:
+                for item in li:
+                    heap.append(item)
+                sorted_items = [heap.pop() for _ in range(len(heap))]
+                assert [(node, priority) for node, priority, _ in sorted_items] == \
+                       sorted(best.items(), key=lambda item: item[1])
+        print("indexed heaps pass test")
+
+
     test_queue()
     test_heap()
+    test_indexed_heaps()
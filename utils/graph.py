@@ -1,76 +1,507 @@
-import pandas as pd
-import numpy as np
+import math
 import os
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+from .cache import load_arrays, try_save_arrays
+from .ingest import label_components, read_graph
+from .spatial import SpatialIndex
+from .workspace import Workspace
+
+
+def no_heuristic(node):
+    return 0
+
+
+@dataclass(frozen=True)
+class Problem:
+    """
+    An immutable search problem on a Graph, the searches only read the graph,
+    so one loaded Graph can serve many problems at the same time,
+    as long as it is not modified(set_cost, remove_edge, add_edge) while they run
+    """
+    start: int
+    end: int
+    heuristic: Callable = no_heuristic  # heuristic function of the nodes for the end
+    heuristics: Callable = None  # vectorised heuristic of an array of dense ids, if the provider has one
+
+    def is_goal(self, node):
+        return node == self.end
+
+
+@dataclass(frozen=True)
+class MultiGoalProblem:
+    """
+    An immutable search problem from a set of weighted starts to the nearest of a set of goals
+    """
+    starts: dict  # {start: initial cost}, e.g. the time to reach the start from a depot
+    goals: frozenset
+    heuristic: Callable = no_heuristic  # heuristic function of the nodes for the nearest goal
+
+    def is_goal(self, node):
+        return node in self.goals
 
 
 class Graph:
     NODES_FILE = "CaliforniaRoadNetwork_Nodes.csv"
     EDGES_FILE = "CaliforniaRoadNetwork_Edges.csv"
 
-    def __init__(self):
-        file_path = os.path.abspath(__file__)
-        file_dir = os.path.dirname(file_path)
-        nodes_file = os.path.join(file_dir, self.NODES_FILE)
-        edges_file = os.path.join(file_dir, self.EDGES_FILE)
+    CACHE_DIR = "CaliforniaRoadNetwork.cache"
 
-        nodes_df = pd.read_csv(nodes_file)
-        edges_df = pd.read_csv(edges_file)
+    # a heuristic of at most SCAN_GOALS goals compares all of them instead of asking a SpatialIndex
+    SCAN_GOALS = 8
+
+    # a graph of at most MIRROR_EDGES adjacency entries keeps plain python lists of its arrays,
+    # a larger one reads the arrays, since the lists take more than ten times their memory
+    MIRROR_EDGES = 1 << 20
+
+    def __init__(self, cache=True, nodes_file=None, edges_file=None, mirrors=None):
+        """
+        :param cache: if True, the arrays compiled from the csv files are saved in CACHE_DIR
+                    next to the csv files, and later Graphs memory-map them instead of parsing the csv
+        :param nodes_file, edges_file: the files of another graph than the California road network,
+                    csv files with the columns of the California files, or DIMACS .co and .gr files,
+                    their cache is the directory next to the edges file, named after it with .cache
+        :param mirrors: True to keep plain python lists of the arrays for the hot accessors, False to read
+                    the arrays, memory-mapped ones are shared by all the processes that map the cache,
+                    None for the lists if the graph has at most MIRROR_EDGES adjacency entries
+        """
+        if (nodes_file is None) != (edges_file is None):
+            raise ValueError('a graph needs both a nodes file and an edges file')
+        if nodes_file is None:
+            file_dir = os.path.dirname(os.path.abspath(__file__))
+            nodes_file = os.path.join(file_dir, self.NODES_FILE)
+            edges_file = os.path.join(file_dir, self.EDGES_FILE)
+            self.cache_dir = os.path.join(file_dir, self.CACHE_DIR)
+        else:
+            nodes_file, edges_file = os.path.abspath(nodes_file), os.path.abspath(edges_file)
+            self.cache_dir = f'{os.path.splitext(edges_file)[0]}.cache'
+        self.sources = {'nodes': nodes_file, 'edges': edges_file}
 
-        self.__edges = edges_df.values
-        self.__graph = self.__graph_maker()
+        arrays = cache and load_arrays(self.cache_dir, self.sources)
+        if not arrays:
+            arrays = read_graph(nodes_file, edges_file)  # streamed in chunks
+            if cache:
+                try_save_arrays(self.cache_dir, self.sources, arrays)
 
-        # store the position of every node
-        self.__nodes = {int(node_id): (longitude, latitude)
-                        for node_id, longitude, latitude in nodes_df.values}
+        # every array is indexed by the dense id of a node
+        self.__ids = arrays['ids']
+        self.__longitude, self.__latitude = arrays['longitude'], arrays['latitude']  # position of every node
+        self.__indptr, self.__indices, self.__weights = arrays['indptr'], arrays['indices'], arrays['weights']
+        self.__index = self.__index_maker(self.__ids)
+        self.__components = arrays['components']  # connected component label of every node
 
-        self.__start = None
-        self.__end = None
-        self.__heuristic = False
+        # plain ndarray views(slicing a memmap builds a memmap object) for the vectorised expansion
+        self.__indptr_array = self.__indptr.view(np.ndarray)
+        self.__indices_array = self.__indices.view(np.ndarray)
+        self.__weights_array = self.__weights.view(np.ndarray)
+        self.__nodes = None  # the tuple of the node ids, built on the first use
+        self.__mirrored = False
+        if mirrors or mirrors is None and len(self.__indices) <= self.MIRROR_EDGES:
+            self.__mirror()
+        else:  # the node ids of the adjacency, and positions[i] = [longitude, latitude], without python objects
+            self.__heads = self.__indices_array if self.dense else self.__ids[self.__indices_array]
+            self.__positions = np.column_stack([self.__longitude, self.__latitude])
+        self.__local = threading.local()  # the Workspace of every thread
+        self.__spatial = None  # the SpatialIndex that snaps coordinates to the nearest nodes, built on the first use
 
-    def __graph_maker(self):
+        self.version = 0  # changes whenever the graph is modified, results of older versions are stale
+        self.__changes = []  # the edge (node1, node2) of every modification, changes[v] turned version v into v + 1
+        self.__arrays_version = 0  # the version the numpy arrays were built for, built lists are always current
+        self.__structure = 0  # number of added and removed edges, a cost change keeps the component labels
+        self.__components_structure = 0  # the structure the component labels were built for
+
+    def __mirror(self):
+        """
+        build plain python mirrors of the arrays, so the hot accessors
+        never allocate numpy scalars or arrays while searching,
+        a large graph builds them only when it is modified, the lists are the ones it edits
+        """
+        self.__positions = list(zip(self.__longitude.tolist(), self.__latitude.tolist()))
+        self.__indptr_list = self.__indptr.tolist()
+        self.__successors_list = self.__ids[self.__indices].tolist()
+        self.__weights_list = self.__weights.tolist()
+        self.__components_list = self.__components.tolist()
+        self.__heads = None  # the lists replace the array of the successor ids
+        self.__mirrored = True
+
+    @staticmethod
+    def __index_maker(ids):
         """
-        convert all edges into a graph data structure,
-        where the graph is a dict like this:
-        {node: all successors of the node}
+        map the original node ids to dense integers [0, n)
         """
-        graph = dict()
-        for _, start, end in self.__edges:
-            # since edges are bi-directional,
-            # both of start and end should be the key of the dict
-            graph[start] = graph.get(start, [])
-            graph[start].append(end)
-            graph[end] = graph.get(end, [])
-            graph[end].append(start)
-        return graph
+        if np.array_equal(ids, np.arange(len(ids), dtype=ids.dtype)):
+            return range(len(ids))  # ids are already dense, range maps them to themselves
+        return {int(node_id): i for i, node_id in enumerate(ids)}
 
     def __euclidean_distance(self, node1, node2):
-        pos1, pos2 = self.position(node1), self.position(node2)  # get positions of two nodes
-        vector = [x1 - x2 for x1, x2 in zip(pos1, pos2)]  # compute the vector
-        vector = np.array(vector)
-        return np.linalg.norm(vector)
+        (x1, y1), (x2, y2) = self.position(node1), self.position(node2)  # get positions of two nodes
+        dx, dy = x1 - x2, y1 - y2  # compute the vector
+        return math.sqrt(dx * dx + dy * dy)
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def __contains__(self, node):
+        return node in self.__index
 
     @property
     def nodes(self):
-        return list(self.__nodes.keys())
+        """
+        the node ids in the order of the dense ids, built once
+        """
+        if self.__nodes is None:
+            self.__nodes = tuple(self.__ids.tolist())
+        return self.__nodes
+
+    @property
+    def dense(self):
+        """
+        True if the node ids are the dense ids 0, 1, ..., n - 1, then they can index the arrays directly
+        """
+        return isinstance(self.__index, range)
+
+    def workspace(self) -> Workspace:
+        """
+        the scratch Workspace of the current thread, allocated on the first search of the thread
+        """
+        workspace = getattr(self.__local, 'workspace', None)
+        if workspace is None:
+            workspace = self.__local.workspace = Workspace(len(self))
+        return workspace
+
+    def cache_path(self, name):
+        """
+        the directory where an index derived from the graph(e.g. 'ch') is cached next to CACHE_DIR
+        """
+        root, ext = os.path.splitext(self.cache_dir)
+        return f'{root}.{name}{ext}'
+
+    def index(self, node):
+        """
+        the dense id of the node, the position of the node in nodes and in every array of the graph
+        """
+        return self.__index[node]
+
+    @property
+    def indexer(self):
+        """
+        the mapping of the node ids to the dense ids(a range if the graph is dense, otherwise a dict),
+        unlike the bound method index, it holds no reference to the graph, so an index derived from the graph
+        can keep it without keeping the graph alive
+        """
+        return self.__index
+
+    @property
+    def csr(self):
+        """
+        the (indptr, indices, weights) arrays of the adjacency, indexed by dense node ids
+        """
+        if self.__arrays_version != self.version:
+            self.__arrays_refresh()
+        return self.__indptr, self.__indices, self.__weights
+
+    def __arrays_refresh(self):
+        """
+        rebuild the numpy arrays of the adjacency from the python lists after the graph was modified,
+        only when an array is read, so a batch of modifications rebuilds them once
+        """
+        successors = self.__successors_list
+        self.__indptr = np.array(self.__indptr_list, dtype=np.int64)
+        self.__indices = np.array(successors if self.dense else [self.__index[node] for node in successors],
+                                  dtype=np.int32)
+        self.__weights = np.array(self.__weights_list, dtype=np.float64)
+        self.__indices_array, self.__weights_array = self.__indices, self.__weights
+        self.__arrays_version = self.version
 
     def successors(self, node):
-        return self.__graph[node]
+        i = self.__index[node]
+        if self.__mirrored:
+            return self.__successors_list[self.__indptr_list[i]:self.__indptr_list[i + 1]]
+        begin, end = self.__indptr_array[i:i + 2].tolist()
+        return self.__heads[begin:end].tolist()
+
+    def weighted_successors(self, node):
+        """
+        return the successors of the node paired with the precomputed lengths of the edges:
+        [(successor, distance(node, successor)), ...]
+        """
+        i = self.__index[node]
+        if self.__mirrored:
+            begin, end = self.__indptr_list[i], self.__indptr_list[i + 1]
+            return zip(self.__successors_list[begin:end], self.__weights_list[begin:end])
+        begin, end = self.__indptr_array[i:i + 2].tolist()
+        return zip(self.__heads[begin:end].tolist(), self.__weights_array[begin:end].tolist())
+
+    def successor_arrays(self, node):
+        """
+        the vectorised weighted_successors, views of the adjacency arrays without copying
+
+        :return: (dense ids of the successors, lengths of the edges)
+        """
+        if self.__arrays_version != self.version:
+            self.__arrays_refresh()
+        i = self.__index[node]
+        indptr = self.__indptr_list if self.__mirrored else self.__indptr_array
+        begin, end = indptr[i], indptr[i + 1]
+        return self.__indices_array[begin:end], self.__weights_array[begin:end]
+
+    def component(self, node):
+        """
+        the label of the connected component of the node
+        """
+        if self.__components_structure != self.__structure:
+            self.__components_refresh()
+        if self.__mirrored:
+            return self.__components_list[self.__index[node]]
+        return int(self.__components[self.__index[node]])
+
+    def connected(self, node1, node2):
+        """
+        True if a path exists between the two nodes, an O(1) lookup of the component labels
+        """
+        if self.__components_structure != self.__structure:
+            self.__components_refresh()
+        if self.__mirrored:
+            return self.__components_list[self.__index[node1]] == self.__components_list[self.__index[node2]]
+        return self.component(node1) == self.component(node2)
+
+    @property
+    def components(self):
+        """
+        the array of the component labels, indexed by dense node ids
+        """
+        if self.__components_structure != self.__structure:
+            self.__components_refresh()
+        return self.__components
+
+    def __components_refresh(self):
+        """
+        label the components again after edges were added or removed
+        """
+        indptr, indices, _ = self.csr
+        self.__components = label_components(indptr, indices)
+        if self.__mirrored:
+            self.__components_list = self.__components.tolist()
+        self.__components_structure = self.__structure
+
+    def edge_cost(self, node1, node2):
+        """
+        the cost of the edge between the two nodes(the cheapest one of parallel edges), None if there is no edge
+        """
+        costs = [cost for successor, cost in self.weighted_successors(node1) if successor == node2]
+        return min(costs) if costs else None
+
+    def __positions_of(self, node1, node2):
+        """
+        the positions of the edges from node1 to node2 in the lists of the adjacency,
+        every modification looks them up first, so a large graph builds its lists here
+        """
+        if not self.__mirrored:
+            self.__mirror()
+        i = self.__index[node1]
+        successors = self.__successors_list
+        return [p for p in range(self.__indptr_list[i], self.__indptr_list[i + 1]) if successors[p] == node2]
+
+    def __shift(self, node, delta):
+        """
+        move the successor blocks of the nodes after the node by delta positions
+        """
+        i = self.__index[node]
+        self.__indptr_list[i + 1:] = [p + delta for p in self.__indptr_list[i + 1:]]
+
+    def __modified(self, node1, node2):
+        self.__changes.append((node1, node2))
+        self.version += 1
+
+    def changes(self, since=0):
+        """
+        :return: the edges (node1, node2) modified after the version since, in order
+        """
+        return self.__changes[since:]
+
+    def set_cost(self, node1, node2, cost):
+        """
+        change the cost of the edge between the two nodes(in both directions), e.g. a slower road segment
+
+        A* and the other heuristic searches stay optimal only as long as every cost is
+        at least the straight-line length of its edge, like the costs of the csv files
+        """
+        if cost < 0:
+            raise ValueError('edge costs must be non-negative')
+        positions = [*self.__positions_of(node1, node2), *self.__positions_of(node2, node1)]
+        if not positions:
+            raise ValueError(f'no edge between {node1} and {node2}')
+        for p in positions:
+            self.__weights_list[p] = cost
+        self.__modified(node1, node2)
+
+    def remove_edge(self, node1, node2):
+        """
+        remove the edge(and its parallel edges) between the two nodes, e.g. a closed road
+        """
+        if not self.__positions_of(node1, node2):
+            raise ValueError(f'no edge between {node1} and {node2}')
+        for tail, head in [(node1, node2), (node2, node1)]:
+            positions = self.__positions_of(tail, head)
+            for p in reversed(positions):
+                del self.__successors_list[p]
+                del self.__weights_list[p]
+            self.__shift(tail, -len(positions))
+        self.__structure += 1
+        self.__modified(node1, node2)
+
+    def add_edge(self, node1, node2, cost=None):
+        """
+        add an edge between the two nodes
+
+        :param cost: the cost of the edge, the straight-line length by default
+        """
+        if node1 == node2:
+            raise ValueError('an edge needs two different nodes')
+        if self.__positions_of(node1, node2):
+            raise ValueError(f'{node1} and {node2} are already connected, use set_cost to change the cost')
+        if cost is None:
+            cost = self.__euclidean_distance(node1, node2)
+        elif cost < 0:
+            raise ValueError('edge costs must be non-negative')
+        for tail, head in [(node1, node2), (node2, node1)]:
+            p = self.__indptr_list[self.__index[tail] + 1]  # the end of the successor block of the tail
+            self.__successors_list.insert(p, head)
+            self.__weights_list.insert(p, cost)
+            self.__shift(tail, 1)
+        self.__structure += 1
+        self.__modified(node1, node2)
 
     def position(self, node):
-        # nodes = {1, (20.1, 0.0)}
-        return self.__nodes[node]
+        # positions[i] = (longitude, latitude)
+        if self.__mirrored:
+            return self.__positions[self.__index[node]]
+        return tuple(self.__positions[self.__index[node]].tolist())
+
+    def __spatial_index(self):
+        """
+        the SpatialIndex of the nodes, built on the first snap, most graphs never snap a coordinate,
+        two threads may both build it, they build the same index
+        """
+        if self.__spatial is None:
+            self.__spatial = SpatialIndex(self.__longitude, self.__latitude)
+        return self.__spatial
+
+    def nearest(self, longitude, latitude):
+        """
+        the node closest to the position (longitude, latitude)
+        """
+        _, i = self.__spatial_index().nearest(longitude, latitude)[0]
+        return int(self.__ids[i])
+
+    def k_nearest(self, longitude, latitude, k):
+        """
+        the k nodes closest to the position (longitude, latitude), from the nearest
+        """
+        return [int(self.__ids[i]) for _, i in self.__spatial_index().nearest(longitude, latitude, k)]
+
+    def snap(self, longitudes, latitudes):
+        """
+        vectorised nearest for arrays of positions
+
+        :return: (nodes, distances), the int64 array of the closest node of every position,
+                and the float64 array of the distances to them
+        """
+        indices, distances = self.__spatial_index().query(longitudes, latitudes)
+        return self.__ids[indices[:, 0]], distances[:, 0]
 
     # initialize the search problem
-    def set_problem(self, start, end, heuristic=False):
-        self.__start = start
-        self.__end = end
-        self.__heuristic = heuristic
+    def problem(self, start, end, heuristic=False) -> Problem:
+        """
+        :param heuristic: False for no heuristic, True for the euclidean distance to the end,
+                        or a heuristic provider that implements goal(end),
+                        which returns the heuristic function of the nodes for that end
+        """
+        if heuristic is False:
+            return Problem(start, end)
+        if heuristic is True:
+            return Problem(start, end, self.goal(end), self.goals(end))
+        # the heuristic function of a provider, e.g. the landmarks lower bound
+        goals = getattr(heuristic, 'goals', None)
+        return Problem(start, end, heuristic.goal(end), goals and goals(end))
 
-    def get_initial_state(self):
-        return self.__start
+    def multi_goal_problem(self, starts, goals, heuristic=False) -> MultiGoalProblem:
+        """
+        :param starts: a start node, an iterable of start nodes, or a dict {start: initial cost}
+        :param goals: an iterable of goal nodes
+        :param heuristic: False for no heuristic, True for the euclidean distance to the nearest goal
+        """
+        if isinstance(starts, dict):
+            starts = dict(starts)
+        elif isinstance(starts, (int, np.integer)):
+            starts = {starts: 0}
+        else:
+            starts = dict.fromkeys(starts, 0)
+        goals = frozenset(goals)
+        if heuristic is False:
+            return MultiGoalProblem(starts, goals)
+        return MultiGoalProblem(starts, goals, self.goal_set(goals))
 
-    def is_goal(self, node):
-        return node == self.__end
+    def goal_set(self, goals):
+        """
+        the euclidean heuristic of a set of goals: the straight-line distance to the nearest goal,
+        the min of consistent heuristics is consistent,
+        a large set is answered by a k-d tree of the goals, and the values are memoised,
+        since a node is pushed once for every improvement of its cost
+        """
+        positions, index = self.__positions, self.__index
+        goal_positions = [self.position(goal) for goal in goals]
+        if len(goal_positions) <= self.SCAN_GOALS:
+            def heuristic(node):
+                x, y = positions[index[node]]
+                return min(math.sqrt((x - x_goal) * (x - x_goal) + (y - y_goal) * (y - y_goal))
+                           for x_goal, y_goal in goal_positions)
+
+            return heuristic
+
+        spatial = SpatialIndex(*zip(*goal_positions))
+        values = dict()
+
+        def heuristic(node):
+            value = values.get(node)
+            if value is None:
+                value = values[node] = spatial.nearest(*positions[index[node]])[0][0]
+            return value
+
+        return heuristic
+
+    def goal(self, end):
+        """
+        the graph is the provider of the euclidean heuristic,
+        best heuristic for this problem we have explored out so far
+        is euclidean distance between the current node and the end
+        """
+        positions, index = self.__positions, self.__index
+        x_end, y_end = self.position(end)
+
+        def heuristic(node):
+            x, y = positions[index[node]]
+            dx, dy = x - x_end, y - y_end
+            return math.sqrt(dx * dx + dy * dy)
+
+        return heuristic
+
+    def goals(self, end):
+        """
+        the vectorised goal(end), the heuristic function of an array of dense ids,
+        it gives the same floats as goal(end) for every node
+        """
+        longitude, latitude = self.__longitude.view(np.ndarray), self.__latitude.view(np.ndarray)
+        x_end, y_end = self.position(end)
+
+        def heuristics(indices):
+            dx, dy = longitude[indices] - x_end, latitude[indices] - y_end
+            return np.sqrt(dx * dx + dy * dy)
+
+        return heuristics
 
     def distance(self, *nodes):
         """
@@ -88,13 +519,6 @@ class Graph:
         res = sum(distances)
         return res
 
-    def heuristic(self, node):
-        if self.__heuristic is False:
-            return 0
-        # best heuristic for this problem we have explored out so far
-        # is euclidean distance between the current node and the end
-        return self.distance(node, self.__end)
-
     @staticmethod
     def has_circle(path):
         # check if there is a circle in the path by check if there are repeated nodes,
@@ -111,5 +535,5 @@ if __name__ == '__main__':
     print(graph.distance(points))
     print(graph.nodes)
     print('=' * 50)
-    graph.set_problem(0, 21040, True)
-    print(graph.heuristic(1894))
+    problem = graph.problem(0, 21040, True)
+    print(problem.heuristic(1894))
@@ -0,0 +1,276 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 1 << 20  # rows of a file parsed at once
+
+# the columns of the csv files, like the California road network files
+NODE_COLUMNS = ['NodeID', 'Longitude', 'Latitude']
+EDGE_COLUMNS = ['StartNodeID', 'EndNodeID']
+
+# DIMACS coordinates are integers in millionths of a degree
+DIMACS_SCALE = 1e-6
+
+
+def is_dimacs(file):
+    return os.path.splitext(file)[1].lower() in ('.gr', '.co')
+
+
+def count_lines(file, block=1 << 24):
+    """
+    the number of lines of the file, an upper bound of its rows to preallocate the arrays
+    """
+    lines = 0
+    last = b'\n'
+    with open(file, 'rb') as f:
+        for data in iter(lambda: f.read(block), b''):
+            lines += data.count(b'\n')
+            last = data[-1:]
+    return lines + (last != b'\n')  # the last line may not end with a newline
+
+
+def header_lines(file, data_kind):
+    """
+    the indices of the DIMACS problem lines('p ...') before the first data line,
+    the comment lines('c ...') are skipped by the parser itself
+    """
+    indices = []
+    with open(file, 'rb') as f:
+        for i, line in enumerate(f):
+            if line.startswith(data_kind):
+                break
+            if line.startswith(b'p'):
+                indices.append(i)
+    return indices
+
+
+def read_chunks(file, kind, chunk_size=CHUNK_SIZE):
+    """
+    stream the rows of a nodes file('nodes') or an edges file('edges') in DataFrames of chunk_size rows,
+    DIMACS files(.co, .gr) get the column names of the csv files
+    """
+    if not is_dimacs(file):
+        columns = NODE_COLUMNS if kind == 'nodes' else EDGE_COLUMNS
+        return pd.read_csv(file, usecols=columns, chunksize=chunk_size)
+    # 'v id x y' lines of a .co file, 'a u v w' lines of a .gr file
+    columns = NODE_COLUMNS if kind == 'nodes' else EDGE_COLUMNS + ['Weight']
+    return pd.read_csv(file, sep=' ', header=None, comment='c', names=['kind', *columns], usecols=columns,
+                       skiprows=header_lines(file, b'v' if kind == 'nodes' else b'a'), chunksize=chunk_size)
+
+
+def read_nodes(nodes_file, chunk_size=CHUNK_SIZE):
+    """
+    :return: (ids, longitude, latitude) arrays in the order of the file
+    """
+    capacity = count_lines(nodes_file)
+    ids = np.empty(capacity, dtype=np.int32)
+    longitude = np.empty(capacity, dtype=np.float64)
+    latitude = np.empty(capacity, dtype=np.float64)
+    scale = DIMACS_SCALE if is_dimacs(nodes_file) else 1
+    n = 0
+    for chunk in read_chunks(nodes_file, 'nodes', chunk_size):
+        chunk_ids = chunk['NodeID'].to_numpy(dtype=np.int64)
+        if len(chunk_ids) and (chunk_ids.min() < 0 or chunk_ids.max() > np.iinfo(np.int32).max):
+            raise ValueError('node ids must fit in int32')
+        size = len(chunk_ids)
+        ids[n:n + size] = chunk_ids
+        longitude[n:n + size] = chunk['Longitude'].to_numpy(dtype=np.float64) * scale
+        latitude[n:n + size] = chunk['Latitude'].to_numpy(dtype=np.float64) * scale
+        n += size
+    if n < capacity:  # the header and comment lines, the arrays are shrunk in place instead of copied
+        for array in (ids, longitude, latitude):
+            array.resize(n, refcheck=False)
+    return ids, longitude, latitude
+
+
+def dense_mapper(ids):
+    """
+    :return: a function that maps an array of node ids to their dense ids(positions in ids)
+    """
+    n = len(ids)
+    if n and ids[-1] - ids[0] == n - 1 and np.array_equal(ids, np.arange(ids[0], ids[0] + n, dtype=ids.dtype)):
+        offset = int(ids[0])  # consecutive ids, e.g. 0..n-1 of the csv files or 1..n of the DIMACS files
+
+        def to_dense(nodes):
+            if len(nodes) and (nodes.min() < offset or nodes.max() >= offset + n):
+                raise ValueError('an edge of an unknown node')
+            return nodes - offset
+
+        return to_dense
+
+    order = np.argsort(ids, kind='stable')
+    sorted_ids = ids[order]
+
+    def to_dense(nodes):
+        positions = np.minimum(np.searchsorted(sorted_ids, nodes), n - 1)
+        if not np.array_equal(sorted_ids[positions], nodes):
+            raise ValueError('an edge of an unknown node')
+        return order[positions]
+
+    return to_dense
+
+
+def edge_chunks(edges_file, to_dense, chunk_size=CHUNK_SIZE):
+    """
+    stream the edges as the arrays (tails, heads) of dense ids of both directions of every edge,
+    interleaved, so every node sees its edges in the order of the file
+
+    The DIMACS road graphs list a road as two arcs, or as one arc in either direction, so every arc u -> v
+    becomes the edge (min(u, v), max(u, v)), the duplicates within a chunk are dropped here
+    and those across chunks by drop_duplicate_edges, the self loops are dropped,
+    and the weights are ignored, the cost of an edge is the euclidean length like the csv graphs
+    """
+    dimacs = is_dimacs(edges_file)
+    for chunk in read_chunks(edges_file, 'edges', chunk_size):
+        starts = chunk['StartNodeID'].to_numpy(dtype=np.int64)
+        ends = chunk['EndNodeID'].to_numpy(dtype=np.int64)
+        if dimacs:
+            starts, ends = np.minimum(starts, ends), np.maximum(starts, ends)
+            keys = starts[starts != ends] << 32 | ends[starts != ends]
+            _, first = np.unique(keys, return_index=True)
+            keys = keys[np.sort(first)]  # the first arc of every edge, in the order of the file
+            starts, ends = keys >> 32, keys & 0xffffffff
+        starts, ends = to_dense(starts).astype(np.int32), to_dense(ends).astype(np.int32)
+        yield np.column_stack([starts, ends]).ravel(), np.column_stack([ends, starts]).ravel()
+
+
+def group_counts(sorted_tails):
+    """
+    :return: (distinct tails, number of entries of every one) of a sorted array
+    """
+    if not len(sorted_tails):
+        return sorted_tails, np.zeros(0, dtype=np.int64)
+    boundaries = np.flatnonzero(np.diff(sorted_tails)) + 1
+    starts = np.concatenate([[0], boundaries])
+    return sorted_tails[starts], np.diff(np.append(starts, len(sorted_tails)))
+
+
+def read_graph(nodes_file, edges_file, chunk_size=CHUNK_SIZE):
+    """
+    stream the nodes file and the edges file(csv, or DIMACS .co and .gr) into the arrays of a Graph
+
+    The edges file is read twice: the first pass counts the degree of every node, so the CSR
+    adjacency arrays are allocated once at their final size(the duplicate DIMACS edges of different chunks
+    are dropped afterwards, in place), and the second pass writes
+    every chunk of edges straight into its place, so the peak memory is the final arrays
+    plus a few chunks, instead of DataFrames of the whole files
+
+    :return: {'ids', 'longitude', 'latitude', 'indptr', 'indices', 'weights', 'components'},
+            like the arrays cached by Graph, where the successors of the dense node i are
+            indices[indptr[i]:indptr[i + 1]] and weights holds the euclidean lengths of those edges
+    """
+    ids, longitude, latitude = read_nodes(nodes_file, chunk_size)
+    n = len(ids)
+    to_dense = dense_mapper(ids)
+
+    # first pass: the degrees
+    degrees = np.zeros(n, dtype=np.int64)
+    for tails, _ in edge_chunks(edges_file, to_dense, chunk_size):
+        nodes, counts = group_counts(np.sort(tails))
+        degrees[nodes] += counts
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(degrees, out=indptr[1:])
+    del degrees
+
+    # second pass: every successor is written at the next free position of its tail
+    indices = np.empty(indptr[-1], dtype=np.int32)
+    cursor = indptr[:-1].copy()
+    for tails, heads in edge_chunks(edges_file, to_dense, chunk_size):
+        order = np.argsort(tails, kind='stable')
+        tails, heads = tails[order], heads[order]
+        nodes, counts = group_counts(tails)
+        # the rank of every entry among the entries of its tail in this chunk
+        ranks = np.arange(len(tails)) - np.repeat(np.cumsum(counts) - counts, counts)
+        indices[cursor[tails] + ranks] = heads
+        cursor[nodes] += counts
+    del cursor
+    if is_dimacs(edges_file):
+        indptr, indices = drop_duplicate_edges(indptr, indices, chunk_size)
+
+    weights = edge_lengths(indptr, indices, longitude, latitude, chunk_size)
+    return {'ids': ids, 'longitude': longitude, 'latitude': latitude,
+            'indptr': indptr, 'indices': indices, 'weights': weights,
+            'components': label_components(indptr, indices, chunk_size)}
+
+
+def node_blocks(indptr, chunk_size):
+    """
+    split the nodes into blocks [begin, end) of about chunk_size successors
+    """
+    n = len(indptr) - 1
+    bounds = np.searchsorted(indptr, np.arange(0, indptr[-1], chunk_size), side='right') - 1
+    bounds = np.unique(np.append(np.clip(bounds, 0, n), n))
+    return zip(bounds[:-1].tolist(), bounds[1:].tolist())
+
+
+def drop_duplicate_edges(indptr, indices, chunk_size=CHUNK_SIZE):
+    """
+    drop the repeated successors of every node in place, block by block, the first occurrence is kept,
+    so the successors stay in the order of the file
+
+    :return: (indptr, indices) of the adjacency without duplicates, indices is shrunk in place
+    """
+    n = len(indptr) - 1
+    degrees = np.zeros(n, dtype=np.int64)
+    written = 0
+    for begin, end in node_blocks(indptr, chunk_size):
+        tails = np.repeat(np.arange(begin, end), np.diff(indptr[begin:end + 1]))
+        heads = indices[indptr[begin]:indptr[end]]
+        order = np.lexsort((heads, tails))  # stable, so the first of equal entries is the first occurrence
+        repeated = (tails[order][1:] == tails[order][:-1]) & (heads[order][1:] == heads[order][:-1])
+        keep = np.ones(len(heads), dtype=bool)
+        keep[order[1:][repeated]] = False
+        kept = heads[keep]
+        indices[written:written + len(kept)] = kept  # written never passes the block being read
+        written += len(kept)
+        degrees[begin:end] = np.bincount(tails[keep] - begin, minlength=end - begin)
+    np.cumsum(degrees, out=indptr[1:])
+    indices.resize(written, refcheck=False)
+    return indptr, indices
+
+
+def edge_lengths(indptr, indices, longitude, latitude, chunk_size=CHUNK_SIZE):
+    """
+    the euclidean length of every edge of the CSR adjacency, computed block by block
+    """
+    weights = np.empty(len(indices), dtype=np.float64)
+    for begin, end in node_blocks(indptr, chunk_size):
+        tails = np.repeat(np.arange(begin, end), np.diff(indptr[begin:end + 1]))
+        heads = indices[indptr[begin]:indptr[end]]
+        dx = longitude[tails] - longitude[heads]
+        dy = latitude[tails] - latitude[heads]
+        weights[indptr[begin]:indptr[end]] = np.sqrt(dx * dx + dy * dy)
+    return weights
+
+
+def label_components(indptr, indices, chunk_size=CHUNK_SIZE):
+    """
+    label the connected components of the CSR adjacency with a vectorised union-find:
+    every round hooks the root of every edge tail to the smallest root of its heads,
+    then compresses every node straight to its root, until no edge joins two roots,
+    the edges are visited in blocks, so the memory is bounded by the node arrays
+
+    :return: int32 array of the component labels 0, 1, ... of the dense ids, numbered by their smallest node
+    """
+    n = len(indptr) - 1
+    blocks = list(node_blocks(indptr, chunk_size))
+    roots = np.arange(n, dtype=np.int32)
+    while True:
+        hooked = roots.copy()
+        # a root only ever points to a smaller id, so the forest never gets a cycle
+        for begin, end in blocks:
+            tails = np.repeat(roots[begin:end], np.diff(indptr[begin:end + 1]))
+            np.minimum.at(hooked, tails, roots[indices[indptr[begin]:indptr[end]]])
+        while True:  # path compression
+            compressed = hooked[hooked]
+            if np.array_equal(compressed, hooked):
+                break
+            hooked = compressed
+        if np.array_equal(hooked, roots):
+            break
+        roots = hooked
+    # every root is the smallest node of its component, so the roots numbered in order are the labels
+    is_root = roots == np.arange(n, dtype=np.int32)
+    labels = (np.cumsum(is_root, dtype=np.int32) - 1)[roots]
+    return labels
@@ -0,0 +1,303 @@
+import itertools
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+SINK_VERSION = 1
+META_FILE = 'meta.json'
+ROWS_FILE = 'results.jsonl'
+PATHS_FILE = 'paths.bin'  # the varint bytes of the delta-encoded paths of all the rows
+OFFSETS_FILE = 'offsets.bin'  # int64 byte offset of the path of every row in PATHS_FILE, plus the end
+LENGTHS_FILE = 'lengths.bin'  # int32 number of nodes of the path of every row, -1 for no path
+
+CHUNK_ROWS = 1024  # rows buffered before they are written
+
+MAX_VARINT_BYTES = 10  # 7 bits per byte, enough for any int64
+
+
+def encode_paths(paths):
+    """
+    encode the paths(lists of node ids) as one blob: every path is delta-encoded from 0,
+    every delta is zigzag-mapped to an unsigned integer(small magnitudes of either sign stay small)
+    and written as a varint(LEB128: 7 bits per byte, the high bit set on every byte but the last),
+    the consecutive nodes of a road path mostly have close ids, so most deltas take one or two bytes
+
+    :return: (blob as bytes, int64 array of the number of bytes of every path)
+    """
+    lengths = np.fromiter(map(len, paths), dtype=np.int64, count=len(paths))
+    nodes = np.fromiter(itertools.chain.from_iterable(paths), dtype=np.int64, count=int(lengths.sum()))
+    if not len(nodes):
+        return b'', np.zeros(len(paths), dtype=np.int64)
+    deltas = np.diff(nodes, prepend=0)
+    starts = (np.cumsum(lengths) - lengths)[lengths > 0]
+    deltas[starts] = nodes[starts]  # the first node of every path is its own delta
+    values = ((deltas << 1) ^ (deltas >> 63)).view(np.uint64)  # zigzag
+
+    sizes = np.ones(len(values), dtype=np.int64)
+    for i in range(1, MAX_VARINT_BYTES):
+        sizes += values >= np.uint64(1) << np.uint64(7 * i)
+    width = int(sizes.max())
+    groups = np.empty((len(values), width), dtype=np.uint8)
+    for i in range(width):  # a byte position at a time, so the temporaries stay one array of values
+        groups[:, i] = (values >> np.uint64(7 * i)) & np.uint64(0x7f)
+    place = np.arange(width)
+    groups[place < sizes[:, None] - 1] |= 0x80  # the continuation bits
+    blob = groups[place < sizes[:, None]].tobytes()  # row-major, so the varints stay in order
+
+    path_sizes = np.zeros(len(paths), dtype=np.int64)
+    path_sizes[lengths > 0] = np.add.reduceat(sizes, starts)
+    return blob, path_sizes
+
+
+def decode_paths(blob, lengths):
+    """
+    the reverse of encode_paths
+
+    :param blob: the bytes of the paths, one after the other
+    :param lengths: the number of nodes of every path
+
+    :return: list of the paths as lists of node ids
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    data = np.frombuffer(blob, dtype=np.uint8)
+    if not len(data):
+        return [[] for _ in lengths]
+    ends = np.flatnonzero(data < 0x80)  # the last byte of every varint
+    begins = np.concatenate([[0], ends[:-1] + 1])
+    place = np.arange(len(data)) - np.repeat(begins, ends - begins + 1)
+    parts = (data & 0x7f).astype(np.uint64) << (place.astype(np.uint64) * np.uint64(7))
+    values = np.add.reduceat(parts, begins)
+    deltas = (values >> np.uint64(1)).view(np.int64) ^ -(values & np.uint64(1)).view(np.int64)  # zigzag
+
+    # the running sum goes across the paths, so the sum before its first node is taken off every path
+    nodes = np.cumsum(deltas)
+    starts = np.cumsum(lengths) - lengths
+    before = np.concatenate([[0], nodes])[starts]
+    nodes -= np.repeat(before, lengths)
+    return [path.tolist() for path in np.split(nodes, np.cumsum(lengths)[:-1])]
+
+
+class ResultWriter:
+    """
+    Streaming writer of search results into a directory: the rows are buffered chunk_size at a time,
+    then the summary columns are appended to the files of the format(JsonlWriter, ColumnarWriter)
+    and the paths are appended to PATHS_FILE with encode_paths, their byte offsets to OFFSETS_FILE,
+    so a path can be read without decoding the others, and the summary without decoding any path
+
+    The memory is bounded by one chunk, and meta.json(the format and the number of rows)
+    is written on close, use the writer as a context manager
+    """
+    format = None
+
+    def __init__(self, directory, chunk_size=CHUNK_ROWS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self._buffer = []  # (row, path) of the rows that are not written yet
+        self.__offset = 0
+        self.__paths = open(os.path.join(directory, PATHS_FILE), 'wb')
+        self.__offsets = open(os.path.join(directory, OFFSETS_FILE), 'wb')
+        self.__lengths = open(os.path.join(directory, LENGTHS_FILE), 'wb')
+        self.__offsets.write(np.zeros(1, dtype=np.int64).tobytes())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, result):
+        """
+        :param result: a Result object, or a dict of columns like Result.data, 'path' is the list of nodes
+        """
+        row = dict(getattr(result, 'data', result))
+        path = row.pop('path', None)
+        self._buffer.append((row, path))
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def write_all(self, results):
+        for result in results:
+            self.write(result)
+
+    def flush(self):
+        if not self._buffer:
+            return
+        rows, paths = zip(*self._buffer)
+        lengths = np.array([-1 if path is None else len(path) for path in paths], dtype=np.int32)
+        blob, sizes = encode_paths([path or [] for path in paths])
+        self.__paths.write(blob)
+        self.__offsets.write((self.__offset + np.cumsum(sizes)).tobytes())
+        self.__lengths.write(lengths.tobytes())
+        self.__offset += len(blob)
+        self._write_rows(rows)
+        self.rows += len(rows)
+        self._buffer = []
+
+    def close(self):
+        if self.__paths.closed:
+            return
+        self.flush()
+        for f in (self.__paths, self.__offsets, self.__lengths):
+            f.close()
+        self._close()
+        meta = {'version': SINK_VERSION, 'format': self.format, 'rows': self.rows, **self._meta()}
+        with open(os.path.join(self.directory, META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    # abstract method
+    def _write_rows(self, rows):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def _meta(self):
+        return {}
+
+
+class JsonlWriter(ResultWriter):
+    """
+    the summary columns of every row as a line of JSON in ROWS_FILE
+    """
+    format = 'jsonl'
+
+    def __init__(self, directory, chunk_size=CHUNK_ROWS):
+        super().__init__(directory, chunk_size)
+        self.__file = open(os.path.join(directory, ROWS_FILE), 'w')
+
+    def _write_rows(self, rows):
+        self.__file.write(''.join(json.dumps(row) + '\n' for row in rows))
+
+    def _close(self):
+        self.__file.close()
+
+
+class ColumnarWriter(ResultWriter):
+    """
+    every summary column as a binary file of its values, the columns are those of the first row:
+    the strings are dictionary-encoded(int32 codes, -1 for None, the categories in meta.json),
+    the booleans are bytes, and the numbers are float64(NaN for None), the reader gives back integers
+    for the columns whose values were all integers
+    """
+    format = 'columnar'
+
+    def __init__(self, directory, chunk_size=CHUNK_ROWS):
+        super().__init__(directory, chunk_size)
+        self.columns = None  # {name: {'file', 'kind', ...}}
+        self.__files = []
+
+    def __open(self, rows):
+        self.columns = {}
+        for i, name in enumerate(rows[0]):
+            values = [row[name] for row in rows]
+            if any(isinstance(value, str) for value in values):
+                column = {'kind': 'category', 'categories': []}
+            elif all(isinstance(value, bool) for value in values):
+                column = {'kind': 'bool'}
+            else:
+                column = {'kind': 'number', 'integer': True}
+            column['file'] = f'column{i}.bin'
+            self.columns[name] = column
+            self.__files.append(open(os.path.join(self.directory, column['file']), 'wb'))
+
+    def _write_rows(self, rows):
+        if self.columns is None:
+            self.__open(rows)
+        for row in rows:
+            if row.keys() != self.columns.keys():
+                raise ValueError('every row of a columnar file must have the same columns')
+        for (name, column), f in zip(self.columns.items(), self.__files):
+            values = [row[name] for row in rows]
+            if column['kind'] == 'category':
+                categories = column['categories']
+                codes = {category: code for code, category in enumerate(categories)}
+                for value in values:
+                    if value is not None and value not in codes:
+                        codes[value] = len(categories)
+                        categories.append(value)
+                array = np.array([-1 if value is None else codes[value] for value in values], dtype=np.int32)
+            elif column['kind'] == 'bool':
+                array = np.array(values, dtype=bool)
+            else:
+                if column['integer'] and not all(value is None or isinstance(value, (int, np.integer))
+                                                 for value in values):
+                    column['integer'] = False
+                array = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+            f.write(array.tobytes())
+
+    def _close(self):
+        for f in self.__files:
+            f.close()
+
+    def _meta(self):
+        return {'columns': self.columns or {}}
+
+
+def read_meta(directory):
+    with open(os.path.join(directory, META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get('version') != SINK_VERSION:
+        raise ValueError(f'unsupported result file version: {meta.get("version")}')
+    return meta
+
+
+def read_results(directory, columns=None):
+    """
+    load the summary columns of a directory written by JsonlWriter or ColumnarWriter, the paths are not read
+
+    :param columns: the names of the columns to load, None for all of them,
+                    a columnar file only reads the files of these columns
+
+    :return: pd.DataFrame with a row for every written result
+    """
+    meta = read_meta(directory)
+    if meta['format'] == 'jsonl':
+        with open(os.path.join(directory, ROWS_FILE)) as f:
+            df = pd.DataFrame([json.loads(line) for line in f])
+        return df if columns is None else df[list(columns)]
+
+    data = {}
+    for name in meta['columns'] if columns is None else columns:
+        column = meta['columns'][name]
+        file = os.path.join(directory, column['file'])
+        if column['kind'] == 'category':
+            data[name] = pd.Categorical.from_codes(np.fromfile(file, dtype=np.int32), column['categories'])
+        elif column['kind'] == 'bool':
+            data[name] = np.fromfile(file, dtype=bool)
+        else:
+            values = np.fromfile(file, dtype=np.float64)
+            if column['integer'] and not np.isnan(values).all():  # an empty column stays float
+                values = pd.array(values, dtype='Int64') if np.isnan(values).any() else values.astype(np.int64)
+            data[name] = values
+    return pd.DataFrame(data, index=pd.RangeIndex(meta['rows']))
+
+
+def read_paths(directory, rows=None):
+    """
+    decode the paths of a directory written by JsonlWriter or ColumnarWriter
+
+    :param rows: the indices of the rows, None for all the rows, only the bytes of these paths are read
+
+    :return: list of the paths as lists of node ids, None for the rows without a path
+    """
+    read_meta(directory)
+    lengths = np.fromfile(os.path.join(directory, LENGTHS_FILE), dtype=np.int32).astype(np.int64)
+    offsets = np.fromfile(os.path.join(directory, OFFSETS_FILE), dtype=np.int64)
+    with open(os.path.join(directory, PATHS_FILE), 'rb') as f:
+        if rows is None:
+            rows = range(len(lengths))
+            blob = f.read()
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            parts = []
+            for row in rows.tolist():
+                f.seek(offsets[row])
+                parts.append(f.read(offsets[row + 1] - offsets[row]))
+            blob = b''.join(parts)
+    selected = lengths[rows]
+    paths = decode_paths(blob, np.maximum(selected, 0))
+    return [None if length < 0 else path for length, path in zip(selected.tolist(), paths)]
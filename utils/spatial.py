@@ -0,0 +1,226 @@
+import heapq
+import math
+
+import numpy as np
+
+
+class SpatialIndex:
+    """
+    Nearest-node index over the node positions(euclidean distance of (longitude, latitude), like the graph)
+
+    A k-d tree answers single points in O(log n), it is kept in plain python lists
+    like the hot accessors of the graph, so a query never allocates numpy objects
+
+    A uniform grid answers arrays of points vectorised: the nodes are bucketed into square-ish cells
+    of about `density` nodes, and every point scans the rings of cells around its own cell until
+    no unscanned cell can hold a closer node, all the unfinished points scan a ring at once,
+    the few points still unfinished after MAX_RINGS rings(far away from every node, e.g. in the sea)
+    are answered by the k-d tree
+    """
+
+    LEAF_SIZE = 8
+    MAX_RINGS = 4
+
+    def __init__(self, longitude, latitude, density=2):
+        """
+        :param longitude, latitude: the position arrays of the nodes, indexed by dense ids
+        :param density: average number of nodes per cell of the grid
+        """
+        self.longitude = np.asarray(longitude, dtype=np.float64)
+        self.latitude = np.asarray(latitude, dtype=np.float64)
+        self.__tree_maker()
+        self.__grid_maker(density)
+
+    def __len__(self):
+        return len(self.longitude)
+
+    def __tree_maker(self):
+        """
+        build the balanced k-d tree level by level, in the implicit layout of a binary heap:
+        the children of the tree node t are 2t + 1 and 2t + 2, every level halves the nodes of every tree node
+        at the median of the wider axis, and every leaf holds at most LEAF_SIZE nodes,
+        the leaf t holds the dense ids tree_ids[bounds[t - first_leaf]:bounds[t - first_leaf + 1]],
+        and box[t] = (min longitude, min latitude, max longitude, max latitude) bounds all the nodes of t
+        """
+        n = len(self.longitude)
+        tree_ids = np.arange(n)
+        bounds = np.array([0, n])
+        boxes = []
+        while True:
+            sizes = np.diff(bounds)
+            segments = np.repeat(np.arange(len(sizes)), sizes)
+            x, y = self.longitude[tree_ids], self.latitude[tree_ids]
+            low_x, high_x = np.minimum.reduceat(x, bounds[:-1]), np.maximum.reduceat(x, bounds[:-1])
+            low_y, high_y = np.minimum.reduceat(y, bounds[:-1]), np.maximum.reduceat(y, bounds[:-1])
+            boxes.extend(zip(low_x.tolist(), low_y.tolist(), high_x.tolist(), high_y.tolist()))
+            if sizes.max() <= self.LEAF_SIZE:
+                break
+            # sort the nodes of every tree node by the wider axis, and split it at the middle
+            wider_x = (high_x - low_x) >= (high_y - low_y)
+            low = np.where(wider_x, low_x, low_y)
+            extent = np.maximum(np.where(wider_x, high_x - low_x, high_y - low_y), 1e-300)
+            # the coordinate on the wider axis scaled into [segment, segment + 1), so one argsort
+            # orders the tree nodes and the nodes inside every one of them
+            key = segments + 0.999 * (np.where(wider_x[segments], x, y) - low[segments]) / extent[segments]
+            tree_ids = tree_ids[np.argsort(key)]
+            middle = bounds[:-1] + sizes // 2
+            bounds = np.column_stack([bounds[:-1], middle]).ravel()
+            bounds = np.append(bounds, n)
+
+        self.__box = boxes
+        self.__first_leaf = len(boxes) - (len(bounds) - 1)
+        self.__leaf_bounds = bounds.tolist()
+        self.__tree_ids = tree_ids.tolist()
+        # positions in the order of the leaves, so a leaf reads a contiguous slice
+        self.__tree_positions = list(zip(self.longitude[tree_ids].tolist(), self.latitude[tree_ids].tolist()))
+
+    def __grid_maker(self, density):
+        n = len(self.longitude)
+        self.x0, self.y0 = float(self.longitude.min()), float(self.latitude.min())
+        width = max(float(self.longitude.max()) - self.x0, 1e-12)
+        height = max(float(self.latitude.max()) - self.y0, 1e-12)
+        # cells of about the same side in both axes, and about n / density cells in total
+        side = math.sqrt(width * height * density / n)
+        self.nx, self.ny = max(1, math.ceil(width / side)), max(1, math.ceil(height / side))
+        self.cell_width, self.cell_height = width / self.nx, height / self.ny
+
+        cx, cy = self.__cells(self.longitude, self.latitude)
+        cells = cx * self.ny + cy
+        # CSR of the cells like the adjacency of the graph,
+        # the dense ids of the nodes in the cell c are order[starts[c]:starts[c + 1]]
+        self.order = np.argsort(cells, kind='stable')
+        self.starts = np.zeros(self.nx * self.ny + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=self.nx * self.ny), out=self.starts[1:])
+
+    def __cells(self, x, y):
+        """
+        the (column, row) of the cells of the points, points outside the grid are clamped into it
+        """
+        cx = np.clip(((x - self.x0) / self.cell_width).astype(np.int64), 0, self.nx - 1)
+        cy = np.clip(((y - self.y0) / self.cell_height).astype(np.int64), 0, self.ny - 1)
+        return cx, cy
+
+    def __scanned_radius(self, x, y, cx, cy, r):
+        """
+        the distance from the points to the closest cell outside the (2r + 1) x (2r + 1) block of cells
+        around (cx, cy), every node closer than it has been scanned,
+        the sides of the block at the border of the grid have nothing beyond them
+        """
+        left = np.where(cx - r > 0, x - (self.x0 + (cx - r) * self.cell_width), np.inf)
+        right = np.where(cx + r < self.nx - 1, self.x0 + (cx + r + 1) * self.cell_width - x, np.inf)
+        bottom = np.where(cy - r > 0, y - (self.y0 + (cy - r) * self.cell_height), np.inf)
+        top = np.where(cy + r < self.ny - 1, self.y0 + (cy + r + 1) * self.cell_height - y, np.inf)
+        return np.minimum(np.minimum(left, right), np.minimum(bottom, top))
+
+    @staticmethod
+    def ring(r):
+        """
+        the (dx, dy) offsets of the cells at the Chebyshev distance r from a cell
+        """
+        if r == 0:
+            return np.zeros((1, 2), dtype=np.int64)
+        side = np.arange(-r, r + 1)
+        edges = [np.column_stack([side, np.full_like(side, -r)]), np.column_stack([side, np.full_like(side, r)]),
+                 np.column_stack([np.full(2 * r - 1, -r), side[1:-1]]),
+                 np.column_stack([np.full(2 * r - 1, r), side[1:-1]])]
+        return np.concatenate(edges)
+
+    def nearest(self, x, y, k=1):
+        """
+        :return: [(distance, dense id), ...] of the k nodes nearest to the point (x, y), from the nearest
+        """
+        k = min(k, len(self))
+        boxes, first_leaf, leaf_bounds = self.__box, self.__first_leaf, self.__leaf_bounds
+        ids, positions = self.__tree_ids, self.__tree_positions
+
+        def box_distance(t):
+            # squared distance from the point to the box of the tree node t, 0 inside the box
+            min_x, min_y, max_x, max_y = boxes[t]
+            dx = min_x - x if x < min_x else x - max_x if x > max_x else 0.0
+            dy = min_y - y if y < min_y else y - max_y if y > max_y else 0.0
+            return dx * dx + dy * dy
+
+        best = []  # max heap of the k nearest nodes found, as (-squared distance, dense id)
+        stack = [(box_distance(0), 0)]  # (lower bound of the squared distance to its nodes, tree node)
+        while stack:
+            bound, t = stack.pop()
+            if len(best) == k and bound >= -best[0][0]:
+                continue
+            if t >= first_leaf:
+                leaf = t - first_leaf
+                for j in range(leaf_bounds[leaf], leaf_bounds[leaf + 1]):
+                    px, py = positions[j]
+                    dx, dy = px - x, py - y
+                    squared = dx * dx + dy * dy
+                    if len(best) < k:
+                        heapq.heappush(best, (-squared, ids[j]))
+                    elif squared < -best[0][0]:
+                        heapq.heapreplace(best, (-squared, ids[j]))
+                continue
+            left, right = 2 * t + 1, 2 * t + 2
+            left_bound, right_bound = box_distance(left), box_distance(right)
+            # the nearer child is pushed last to be visited first
+            if left_bound < right_bound:
+                stack.append((right_bound, right))
+                stack.append((left_bound, left))
+            else:
+                stack.append((left_bound, left))
+                stack.append((right_bound, right))
+        return sorted((math.sqrt(-squared), i) for squared, i in best)
+
+    def query(self, x, y, k=1):
+        """
+        vectorised nearest of arrays of points
+
+        :param x, y: arrays of the longitudes and the latitudes of the points
+        :return: (indices, distances), arrays of shape (len(x), k) of the dense ids of the k nearest nodes
+                of every point and their euclidean distances, sorted from the nearest
+        """
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+        k = min(k, len(self))
+        best = np.full((len(x), k), -1, dtype=np.int64)
+        best_distances = np.full((len(x), k), np.inf)
+        cx, cy = self.__cells(x, y)
+        active = np.arange(len(x))  # the points that may still have a closer node in an unscanned cell
+        for r in range(self.MAX_RINGS):
+            if not len(active):
+                break
+            offsets = self.ring(r)
+            ox = (cx[active, None] + offsets[:, 0]).ravel()
+            oy = (cy[active, None] + offsets[:, 1]).ravel()
+            points = np.repeat(active, len(offsets))
+            inside = (ox >= 0) & (ox < self.nx) & (oy >= 0) & (oy < self.ny)
+            cells, points = ox[inside] * self.ny + oy[inside], points[inside]
+
+            # flatten the nodes of all the scanned cells, paired with the point that scans them
+            counts = self.starts[cells + 1] - self.starts[cells]
+            points = np.repeat(points, counts)
+            offsets_in_cell = np.arange(len(points)) - np.repeat(np.cumsum(counts) - counts, counts)
+            candidates = self.order[np.repeat(self.starts[cells], counts) + offsets_in_cell]
+            dx = self.longitude[candidates] - x[points]
+            dy = self.latitude[candidates] - y[points]
+            distances = np.sqrt(dx * dx + dy * dy)
+            closer = distances < best_distances[points, -1]  # only the candidates that can enter the k best
+            points, candidates, distances = points[closer], candidates[closer], distances[closer]
+
+            # merge the candidates of the ring into the k best of every point
+            known = best[active] >= 0
+            points = np.concatenate([np.broadcast_to(active[:, None], known.shape)[known], points])
+            candidates = np.concatenate([best[active][known], candidates])
+            distances = np.concatenate([best_distances[active][known], distances])
+            by_point = np.lexsort((distances, points))
+            points, candidates, distances = points[by_point], candidates[by_point], distances[by_point]
+            rank = np.arange(len(points)) - np.searchsorted(points, points)  # rank of the entry in its point
+            kept = rank < k
+            best[points[kept], rank[kept]] = candidates[kept]
+            best_distances[points[kept], rank[kept]] = distances[kept]
+
+            radius = self.__scanned_radius(x[active], y[active], cx[active], cy[active], r)
+            active = active[(radius < np.inf) & (best_distances[active, -1] > radius)]
+
+        for i in active.tolist():  # far from every node
+            nearest = self.nearest(float(x[i]), float(y[i]), k)
+            best_distances[i] = [distance for distance, _ in nearest]
+            best[i] = [node for _, node in nearest]
+        return best, best_distances
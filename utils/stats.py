@@ -0,0 +1,148 @@
+import dataclasses
+import time
+
+from .container import Container, DistinctHeap, IndexedHeap, LazyHeap
+from .graph import Problem, no_heuristic
+
+
+class SearchStats:
+    """
+    Opt-in instrumentation of a search,
+    the search only wraps its frontier, graph and heuristic function with counting proxies
+    when a SearchStats object is passed, so a search without it runs the plain code
+
+    Counters: pops, pushes, stale pops(popped entries of nodes that were already visited),
+    decrease-key updates(pushes that replaced the entry of a node in a distinct heap),
+    heuristic evaluations and successor-list reads,
+    and the time is split between the heuristic, the container operations and the expansion(the rest)
+
+    The searches whose frontier is not a Container(IDS, IDA*, focal, anytime and bidirectional searches)
+    only count the successor reads and the heuristic, LevelBFS and CH never read the successors
+    one node at a time, so they take no stats
+    """
+
+    def __init__(self, callback=None, every=1000):
+        """
+        :param callback: a function callback(stats, frontiers) that samples the state of the frontier,
+                        called after every `every` pops
+        """
+        self.callback = callback
+        self.every = every
+        self.pops = self.pushes = self.stale_pops = self.decrease_keys = 0
+        self.heuristic_evaluations = self.successor_reads = 0
+        self.total_time = self.heuristic_time = self.container_time = 0.0
+        self.__start = None
+        self.__pops = 0  # the pops before the current search
+
+    @property
+    def expansion_time(self):
+        return self.total_time - self.heuristic_time - self.container_time
+
+    @property
+    def data(self):
+        return {'pops': self.pops,
+                'pushes': self.pushes,
+                'stale pops': self.stale_pops,
+                'decrease-key updates': self.decrease_keys,
+                'heuristic evaluations': self.heuristic_evaluations,
+                'successor reads': self.successor_reads,
+                'expansion time(seconds)': self.expansion_time,
+                'heuristic time(seconds)': self.heuristic_time,
+                'container time(seconds)': self.container_time}
+
+    def instrument(self, graph, problem: Problem = None, frontiers=None):
+        """
+        start the timer, and wrap the graph, the heuristic function of the problem and the frontiers,
+        no_heuristic is not a heuristic, it is neither timed nor counted
+
+        :param problem: a Problem or a MultiGoalProblem, only its heuristic function is replaced
+
+        :return: (graph, problem, frontiers) to search with
+        """
+        self.__start = time.perf_counter()
+        self.__pops = self.pops
+        if problem is not None and problem.heuristic is not no_heuristic:
+            problem = dataclasses.replace(problem, heuristic=self.timed_heuristic(problem.heuristic))
+        if frontiers is not None:
+            frontiers = InstrumentedFrontier(frontiers, self)
+        return InstrumentedGraph(graph, self), problem, frontiers
+
+    def finish(self, settled=None):
+        """
+        stop the timer
+
+        :param settled: the number of visited nodes of the current search, every other pop of it was a stale pop
+        """
+        self.total_time += time.perf_counter() - self.__start
+        if settled is not None:
+            self.stale_pops += max(self.pops - self.__pops - settled, 0)
+
+    def timed_heuristic(self, heuristic):
+        """
+        :return: the heuristic function that counts and times its evaluations
+        """
+        def timed_heuristic(node):
+            begin = time.perf_counter()
+            value = heuristic(node)
+            self.heuristic_time += time.perf_counter() - begin
+            self.heuristic_evaluations += 1
+            return value
+
+        return timed_heuristic
+
+
+class InstrumentedFrontier(Container):
+    """
+    a proxy of the frontier that counts and times the pushes and pops
+    """
+
+    def __init__(self, frontiers, stats: SearchStats):
+        super().__init__()
+        self.frontiers = frontiers
+        self.stats = stats
+        # only the distinct heaps can tell if an entry replaces the entry of the same node
+        self.__distinct = isinstance(frontiers, (DistinctHeap, IndexedHeap, LazyHeap))
+
+    def __len__(self):
+        return len(self.frontiers)
+
+    def append(self, item):
+        stats = self.stats
+        begin = time.perf_counter()
+        present = self.__distinct and item[0] in self.frontiers
+        accepted = self.frontiers.append(item) is not False  # the heaps return False for an ignored entry
+        stats.container_time += time.perf_counter() - begin
+        stats.pushes += 1
+        if present and accepted:
+            stats.decrease_keys += 1
+
+    def pop(self):
+        stats = self.stats
+        begin = time.perf_counter()
+        item = self.frontiers.pop()
+        stats.container_time += time.perf_counter() - begin
+        stats.pops += 1
+        if stats.callback is not None and stats.pops % stats.every == 0:
+            stats.callback(stats, self.frontiers)
+        return item
+
+
+class InstrumentedGraph:
+    """
+    a proxy of the graph that counts the successor-list reads
+    """
+
+    def __init__(self, graph, stats: SearchStats):
+        self.graph = graph
+        self.stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self.graph, name)
+
+    def successors(self, node):
+        self.stats.successor_reads += 1
+        return self.graph.successors(node)
+
+    def weighted_successors(self, node):
+        self.stats.successor_reads += 1
+        return self.graph.weighted_successors(node)
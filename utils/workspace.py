@@ -0,0 +1,29 @@
+import numpy as np
+
+
+class Workspace:
+    """
+    Scratch arrays of one search, indexed by the dense node ids, that are reused by every search of a thread
+
+    Instead of clearing the arrays, every search takes a new generation number,
+    and an entry is only valid if its stamp is the current generation,
+    so a search starts in O(1) time without allocating a visited set or dicts of the size of the search
+
+    A workspace is not re-entrant, a search must not start another search on the same thread
+    while it is still using the workspace
+    """
+
+    def __init__(self, size):
+        self.generation = 0
+        self.stamps = [0] * size  # generation of the search that visited the node
+        self.parents = [None] * size  # predecessor of the node, valid if the node is stamped
+        self.stamp_array = np.zeros(size, dtype=np.int64)  # stamps of the vectorised searches
+
+    def begin(self):
+        """
+        invalidate all the entries of the previous search
+
+        :return: the generation of the new search
+        """
+        self.generation += 1
+        return self.generation